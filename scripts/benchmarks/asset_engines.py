@@ -0,0 +1,189 @@
+"""
+Asset Engine Benchmark
+----------------------
+Row vs columnar asset normalization (parsers/asset_list_parser.py) on
+synthetic asset list workbooks, by default 10,000 and 100,000 rows.
+
+Design:
+- Workbooks are written once under data/synthetic/asset-engines/ with
+  title rows, duplicate serials, spare devices and blank cells, so every
+  branch of the normalization runs
+- The sheet is read once per size; normalization (row dicts vs picked
+  columns, then assets) is timed on the rows in memory, so the two
+  engines are compared without openpyxl noise
+- End-to-end parse_asset_list_xlsx is timed per engine as well, and run
+  once more in a fresh spawned process for its peak RSS over the
+  interpreter's baseline (the snapshot itself included)
+- Outputs of both engines are compared byte for byte (serialized JSON)
+- Results printed and written to runs/benchmarks/asset-engines-<timestamp>.json
+"""
+
+import json
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.synthetic_data import SYNTHETIC_ROOT, make_asset, make_user, write_asset_list
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+DEFAULT_ROWS = [10_000, 100_000]
+ENGINES = ["rows", "columnar"]
+MONTH = "2025-01"
+
+DUPLICATE_RATE = 0.01
+BLANK_RATE = 0.02
+
+
+# =====================================================
+# Data
+# =====================================================
+
+def ensure_workbook(rows: int, seed: int = 7) -> Path:
+    path = SYNTHETIC_ROOT / "asset-engines" / f"asset-list-{rows}.xlsx"
+    if path.exists():
+        return path
+
+    print(f"🧪 Writing {rows}-row synthetic asset list")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    assets = []
+    for i in range(rows):
+        if assets and rng.random() < DUPLICATE_RATE:
+            # Same serial seen again under another name: overwrites
+            assets.append(dict(rng.choice(assets), device_name=f"SYN-RE-{i:06d}"))
+            continue
+        user = make_user(i, rng) if rng.random() > 0.05 else None
+        asset = make_asset(i, rng, user)
+        if rng.random() < BLANK_RATE:
+            asset[rng.choice(["serial", "model", "os"])] = None
+        assets.append(asset)
+
+    write_asset_list(path, "Asset Engine Benchmark", MONTH, assets)
+    return path
+
+
+# =====================================================
+# Measurement
+# =====================================================
+
+def timed_call(func, *args) -> Tuple[float, Any]:
+    # Skipped-row / duplicate warnings would dominate the timing on a terminal
+    with redirect_stdout(StringIO()):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+    return round(elapsed, 4), result
+
+
+def parse_memory(path: str, engine: str) -> Dict:
+    """Peak RSS of one parse_asset_list_xlsx (runs in a fresh process)."""
+    from common.metrics import current_rss_mb, drain, track
+    from parsers import asset_list_parser as parser
+
+    base = current_rss_mb()
+    with track(engine):
+        timed_call(parser.parse_asset_list_xlsx, path, MONTH, engine)
+    peak = drain()[-1]["peak_rss_mb"]
+
+    return {"base_rss_mb": base, "peak_rss_mb": peak}
+
+
+def run(rows: int, engines: List[str]) -> Dict:
+    from parsers import asset_list_parser as parser
+
+    path = ensure_workbook(rows)
+
+    def read_sheet():
+        columns, rows = parser.open_xlsx_table(str(path))
+        return columns, list(rows)
+
+    read_s, (columns, rows_read) = timed_call(read_sheet)
+
+    normalize = {
+        "rows": lambda: parser.assets_from_rows(
+            parser.frame_records(parser.collect_columns(columns, iter(rows_read))), MONTH
+        ),
+        "columnar": lambda: parser.assets_from_frame(parser.collect_columns(columns, iter(rows_read)), MONTH),
+    }
+
+    results, outputs = [], {}
+    for engine in engines:
+        normalize_s, assets = timed_call(normalize[engine])
+        parse_s, _ = timed_call(parser.parse_asset_list_xlsx, str(path), MONTH, engine)
+        outputs[engine] = json.dumps(assets, indent=2)
+
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            memory = pool.submit(parse_memory, str(path), engine).result()
+
+        results.append({
+            "engine": engine,
+            "normalize_s": normalize_s,
+            "parse_s": parse_s,
+            "parse_peak_rss_mb": memory["peak_rss_mb"],
+            "parse_rss_growth_mb": (
+                round(memory["peak_rss_mb"] - memory["base_rss_mb"], 1)
+                if memory["peak_rss_mb"] and memory["base_rss_mb"] else None
+            ),
+            "assets": len(assets),
+            "rows_per_s": round(rows / normalize_s, 1) if normalize_s else None
+        })
+
+    return {
+        "rows": rows,
+        "read_s": read_s,
+        "identical": len(set(outputs.values())) == 1,
+        "engines": results
+    }
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Row vs columnar asset normalization")
+    parser.add_argument("--rows", nargs="+", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/asset-engines-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    results = [run(rows, args.engines) for rows in args.rows]
+
+    for r in results:
+        print(f"\n📊 {r['rows']} rows — sheet read {r['read_s']}s, "
+              f"outputs {'identical ✅' if r['identical'] else 'DIFFER ❌'}")
+        print(f"   {'engine':<10}{'normalize s':>13}{'rows/s':>12}{'parse s':>10}{'peak MB':>10}"
+              f"{'growth MB':>11}{'assets':>9}")
+        for e in r["engines"]:
+            print(f"   {e['engine']:<10}{e['normalize_s']:>13.3f}{e['rows_per_s'] or '-':>12}"
+                  f"{e['parse_s']:>10.3f}{e['parse_peak_rss_mb'] or '-':>10}"
+                  f"{e['parse_rss_growth_mb'] or '-':>11}{e['assets']:>9}")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"asset-engines-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "metadata": {"generated_at": datetime.utcnow().isoformat() + "Z", "month": MONTH},
+            "results": results
+        }, f, indent=2)
+
+    print(f"\n📄 Results written to: {output}")
+
+    if not all(r["identical"] for r in results):
+        sys.exit("❌ Engines produced different snapshots")
@@ -0,0 +1,217 @@
+"""
+Inventory Format Parity Check
+-----------------------------
+Builds one asset and one user inventory, writes each as XLSX, CSV and
+Parquet, and checks that the parsers (parsers/asset_list_parser.py,
+parsers/user_list_parser.py) produce the same canonical snapshot from
+every format.
+
+Usage:
+    cd scripts
+    python3 -m benchmarks.format_parity
+    python3 -m benchmarks.format_parity --rows 20000
+
+Design:
+- The inventory holds the cells whose type differs between formats:
+  integer serials with gaps (read_excel makes them floats: SN:12345.0),
+  1 / 0 sign-in flags with gaps, blank cells and duplicate serials
+- XLSX cells keep their Python types; CSV cells are str() of the value,
+  blank when missing, as an export writes them; Parquet columns are
+  typed by pandas (an int column with gaps is a float column)
+- The asset files carry title rows above the header, like the RMM
+  export; the user files start with the header, like the Entra export
+- Snapshots are compared without metadata.generated_at; parse time per
+  format is reported alongside
+- Results printed and written to runs/benchmarks/format-parity-<timestamp>.json;
+  the run fails if any format differs from XLSX
+"""
+
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+
+from benchmarks.synthetic_data import make_asset, make_user
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+DEFAULT_ROWS = 2_000
+FORMATS = ["xlsx", "csv", "parquet"]
+MONTH = "2025-01"
+
+BLANK_RATE = 0.05
+DUPLICATE_RATE = 0.01
+
+ASSET_HEADERS = ["Device Name", "Serial Number", "Last User", "Model", "Operating System"]
+USER_HEADERS = ["Display Name", "User principal name", "Enabled", "Assigned Products"]
+
+
+# =====================================================
+# Inventory
+# =====================================================
+
+def blank_some(value, rng: random.Random):
+    return None if rng.random() < BLANK_RATE else value
+
+
+def build_inventory(rows: int, seed: int = 7) -> Dict[str, List[List]]:
+    """{"assets": rows, "users": rows}, cells as Python values (None = blank)."""
+    rng = random.Random(seed)
+    users = [make_user(i, rng) for i in range(rows)]
+
+    assets = []
+    for i in range(rows):
+        if assets and rng.random() < DUPLICATE_RATE:
+            # Same serial under another name: the later row wins
+            assets.append([f"SYN-RE-{i:05d}"] + rng.choice(assets)[1:])
+            continue
+        user = rng.choice(users) if rng.random() > 0.05 else None
+        asset = make_asset(i, rng, user)
+        assets.append([
+            asset["device_name"],
+            blank_some(rng.randrange(10 ** 6, 10 ** 7), rng),
+            f"SYNTH\\{asset['user']}" if asset["user"] else None,
+            blank_some(asset["model"], rng),
+            blank_some(asset["os"], rng),
+        ])
+
+    return {
+        "assets": assets,
+        "users": [
+            [u["name"], u["email"], blank_some(int(u["enabled"]), rng), blank_some(u["product"], rng)]
+            for u in users
+        ]
+    }
+
+
+# =====================================================
+# Writers
+# =====================================================
+
+def write_xlsx(path: Path, title: Optional[str], headers: List[str], rows: List[List]):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Inventory")
+    if title:
+        ws.append([title])
+        ws.append([])
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    wb.save(str(path))
+
+
+def write_csv(path: Path, title: Optional[str], headers: List[str], rows: List[List]):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        if title:
+            writer.writerow([title])
+            writer.writerow([])
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+
+def write_parquet(path: Path, title: Optional[str], headers: List[str], rows: List[List]):
+    # Parquet has no title rows: the column names are the header
+    pd.DataFrame(rows, columns=headers).to_parquet(path, index=False)
+
+
+WRITERS: Dict[str, Callable] = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+
+# =====================================================
+# Measurement
+# =====================================================
+
+def parse(build: Callable, path: Path) -> Dict:
+    with redirect_stdout(StringIO()):
+        started = time.perf_counter()
+        snapshot = build(str(path), MONTH, {})
+        elapsed = time.perf_counter() - started
+
+    snapshot["metadata"].pop("generated_at", None)
+    return {"s": round(elapsed, 4), "json": json.dumps(snapshot, sort_keys=True)}
+
+
+def run(rows: int, formats: List[str]) -> List[Dict]:
+    from parsers import asset_list_parser, user_list_parser
+
+    inventory = build_inventory(rows)
+    kinds = {
+        "assets": (asset_list_parser.build_asset_snapshot, "Asset List - Format Parity", ASSET_HEADERS),
+        "users": (user_list_parser.build_user_snapshot, None, USER_HEADERS),
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind, (build, title, headers) in kinds.items():
+            parsed = {}
+            for fmt in formats:
+                path = Path(tmp) / f"{kind}.{fmt}"
+                WRITERS[fmt](path, title, headers, inventory[kind])
+                parsed[fmt] = parse(build, path)
+
+            reference = parsed[formats[0]]["json"]
+            results.append({
+                "kind": kind,
+                "rows": rows,
+                "entities": len(json.loads(reference)[kind]),
+                "formats": [
+                    {"format": fmt, "parse_s": p["s"], "identical": p["json"] == reference}
+                    for fmt, p in parsed.items()
+                ]
+            })
+
+    return results
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Same inventory as XLSX, CSV and Parquet: same snapshots?")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS,
+                        help="The first one is the reference")
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/format-parity-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    results = run(args.rows, args.formats)
+
+    for r in results:
+        print(f"\n📊 {r['kind']} — {r['rows']} rows, {r['entities']} in the snapshot")
+        print(f"   {'format':<10}{'parse s':>10}  snapshot")
+        for f in r["formats"]:
+            same = "reference" if f["format"] == args.formats[0] else (
+                "identical ✅" if f["identical"] else "DIFFERS ❌"
+            )
+            print(f"   {f['format']:<10}{f['parse_s']:>10.3f}  {same}")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"format-parity-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "metadata": {"generated_at": datetime.utcnow().isoformat() + "Z", "month": MONTH},
+            "results": results
+        }, f, indent=2)
+
+    print(f"\n📄 Results written to: {output}")
+
+    if not all(f["identical"] for r in results for f in r["formats"]):
+        sys.exit("❌ Formats produced different snapshots")
@@ -0,0 +1,186 @@
+"""
+History Log Benchmark
+---------------------
+Full monthly copies vs the change log of the history store
+(common/history_store.py) over a run of months, by default 10,000
+assets and users over 24 months.
+
+Design:
+- Month one is a synthetic inventory (benchmarks/snapshot_formats.py);
+  every later month is resolved by the real parsers' finalize step:
+  every active record's last_seen moves, a share of devices / users
+  leave (assets are carried forward as retired, users drop out), new
+  ones arrive and a few records change a field
+- "full" is the store with a checkpoint every month (one complete copy
+  per month, as before the change log); "log" uses CHECKPOINT_EVERY
+- Measured: time to write all months, database size, time to load the
+  last month; every month read back must equal what was written
+- Results printed and written to runs/benchmarks/history-log-<timestamp>.json
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.snapshot_formats import build_snapshots
+from common import history_store
+from parsers import asset_list_parser, user_list_parser
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+CLIENT = "Benchmark Client"
+
+LEAVE_RATE = 0.01      # per month
+ARRIVE_RATE = 0.01
+CHANGE_RATE = 0.02     # records with an edited field (model / name)
+
+
+# =====================================================
+# Data
+# =====================================================
+
+def month_name(index: int) -> str:
+    return f"{2023 + index // 12}-{index % 12 + 1:02d}"
+
+
+def next_month(previous: Dict, kind: str, month: str, rng: random.Random, serial: List[int]) -> Dict:
+    """The month after previous, resolved by the parser's finalize step."""
+    entities = previous[kind]
+    current = {}
+
+    for entity_id, record in entities.items():
+        if record.get("status") == "retired" or rng.random() < LEAVE_RATE:
+            continue
+        record = json.loads(json.dumps(record))
+        record["last_seen"] = month
+        if rng.random() < CHANGE_RATE:
+            record["model" if kind == "assets" else "name"] += " (updated)"
+        current[entity_id] = record
+
+    template = next(iter(entities.values()))
+    for _ in range(int(len(entities) * ARRIVE_RATE)):
+        serial[0] += 1
+        record = json.loads(json.dumps(template))
+        record.update(status="active", last_seen=month)
+        if kind == "assets":
+            record["serial_number"] = f"NEW{serial[0]:08d}"
+            current[f"SN:{record['serial_number']}"] = record
+        else:
+            current[f"new{serial[0]}@benchmark.example"] = record
+
+    with redirect_stdout(StringIO()):
+        if kind == "assets":
+            return asset_list_parser.finalize_asset_snapshot(current, entities, month)
+        return user_list_parser.finalize_user_snapshot(current, entities, month)
+
+
+def build_months(entities: int, months: int, seed: int = 7) -> Dict[str, List[Dict]]:
+    rng = random.Random(seed)
+    first = build_snapshots(entities, seed)
+    serial = [0]
+
+    history = {}
+    for kind, snapshot in first.items():
+        snapshot["metadata"]["month"] = month_name(0)
+        chain = [snapshot]
+        for index in range(1, months):
+            chain.append(next_month(chain[-1], kind, month_name(index), rng, serial))
+        history[kind] = chain
+
+    return history
+
+
+# =====================================================
+# Measurement
+# =====================================================
+
+def measure(history: Dict[str, List[Dict]], checkpoint_every: int, path: Path) -> Dict:
+    history_store.CHECKPOINT_EVERY = checkpoint_every
+    store = history_store.HistoryStore(path)
+
+    started = time.perf_counter()
+    for chain in history.values():
+        for snapshot in chain:
+            store.write_snapshot(CLIENT, snapshot)
+    write_s = time.perf_counter() - started
+
+    store.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(path)
+
+    last = {kind: chain[-1]["metadata"]["month"] for kind, chain in history.items()}
+    started = time.perf_counter()
+    for kind, month in last.items():
+        store.load_entities(CLIENT, month, kind)
+    load_s = time.perf_counter() - started
+
+    lossless = all(
+        json.dumps(store.load_entities(CLIENT, snapshot["metadata"]["month"], kind))
+        == json.dumps(snapshot[kind])
+        for kind, chain in history.items()
+        for snapshot in chain
+    )
+
+    store.close()
+    return {
+        "checkpoint_every": checkpoint_every,
+        "write_s": round(write_s, 3),
+        "load_last_s": round(load_s, 3),
+        "bytes": size,
+        "lossless": lossless
+    }
+
+
+def run(entities: int, months: int) -> Dict:
+    history = build_months(entities, months)
+    layouts = {"full": 1, "log": history_store.CHECKPOINT_EVERY}
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, every in layouts.items():
+            results[name] = measure(history, every, Path(tmp) / f"{name}.sqlite")
+
+    return {"entities": entities, "months": months, "layouts": results}
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Full monthly copies vs change log (history store)")
+    parser.add_argument("--entities", type=int, default=10_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/history-log-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    result = run(args.entities, args.months)
+
+    print(f"\n📊 {result['entities']} assets + users over {result['months']} months")
+    print(f"   {'layout':<8}{'checkpoint':>11}{'write s':>10}{'load s':>9}{'MB':>9}  lossless")
+    for name, r in result["layouts"].items():
+        print(f"   {name:<8}{r['checkpoint_every']:>11}{r['write_s']:>10.2f}{r['load_last_s']:>9.3f}"
+              f"{r['bytes'] / 1e6:>9.2f}  {'✅' if r['lossless'] else '❌'}")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"history-log-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"metadata": {"generated_at": datetime.utcnow().isoformat() + "Z"}, "results": result}, f, indent=2)
+
+    print(f"\n📄 Results written to: {output}")
+
+    if not all(r["lossless"] for r in result["layouts"].values()):
+        sys.exit("❌ History store round trip is not lossless")
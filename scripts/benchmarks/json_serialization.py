@@ -0,0 +1,137 @@
+"""
+JSON Serialization Benchmark
+----------------------------
+Today's stdlib calls (json.dump(..., indent=2) / json.load) vs the shared
+serialization layer (common/serialization.py), compact and pretty, for
+enriched asset / user snapshots and the insights built from them, by
+default 10,000 and 100,000 entities.
+
+Design:
+- Payloads are built with the real builders, enrichers and insight
+  engine (benchmarks/snapshot_formats.py)
+- Save and load are timed per method, best of --repeat runs; disk size
+  is the size of the file written
+- Every method's round trip is checked against the payload (==), the
+  run fails if one is not lossless
+- Results printed and written to runs/benchmarks/json-serialization-<timestamp>.json
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.snapshot_formats import best_of, build_snapshots
+from common import serialization
+from insight_engine import build_insights, empty_diff
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+DEFAULT_ENTITIES = [10_000, 100_000]
+
+
+# =====================================================
+# Methods
+# =====================================================
+
+def save_stdlib(data: Dict, path: Path) -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def load_stdlib(path: Path) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_compact(data: Dict, path: Path) -> Path:
+    return serialization.save_json(data, path, pretty=False)
+
+
+def save_pretty(data: Dict, path: Path) -> Path:
+    return serialization.save_json(data, path, pretty=True)
+
+
+METHODS: Dict[str, Tuple[Callable, Callable]] = {
+    "stdlib": (save_stdlib, load_stdlib),
+    "compact": (save_compact, serialization.load_json),
+    "pretty": (save_pretty, serialization.load_json),
+}
+
+
+# =====================================================
+# Measurement
+# =====================================================
+
+def build_payloads(entities: int) -> Dict[str, Dict]:
+    snapshots = build_snapshots(entities)
+    insights = build_insights(snapshots["users"], snapshots["assets"], empty_diff())
+    return {**snapshots, "insights": insights}
+
+
+def run(entities: int, repeat: int) -> Dict:
+    payloads = build_payloads(entities)
+    results = []
+    lossless = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for payload, data in payloads.items():
+            for name, (save, load) in METHODS.items():
+                save_s, written = best_of(repeat, save, data, Path(tmp) / f"{payload}-{name}.json")
+                load_s, loaded = best_of(repeat, load, written)
+                lossless = lossless and loaded == data
+                results.append({
+                    "payload": payload,
+                    "method": name,
+                    "save_s": save_s,
+                    "load_s": load_s,
+                    "bytes": os.path.getsize(written)
+                })
+
+    return {"entities": entities, "lossless": lossless, "methods": results}
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="stdlib json vs the serialization layer (save / load / size)")
+    parser.add_argument("--entities", nargs="+", type=int, default=DEFAULT_ENTITIES)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best kept)")
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/json-serialization-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    backend = "orjson" if serialization.orjson is not None else "json"
+    results: List[Dict] = [run(n, args.repeat) for n in args.entities]
+
+    for r in results:
+        print(f"\n📊 {r['entities']} entities ({backend}) — round trip {'lossless ✅' if r['lossless'] else 'LOSSY ❌'}")
+        print(f"   {'payload':<10}{'method':<9}{'save s':>9}{'load s':>9}{'MB':>9}")
+        for m in r["methods"]:
+            print(f"   {m['payload']:<10}{m['method']:<9}{m['save_s']:>9.3f}{m['load_s']:>9.3f}"
+                  f"{m['bytes'] / 1e6:>9.2f}")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"json-serialization-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    serialization.save_json({
+        "metadata": {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "backend": backend
+        },
+        "results": results
+    }, output, pretty=True)
+
+    print(f"\n📄 Results written to: {output}")
+
+    if not all(r["lossless"] for r in results):
+        sys.exit("❌ JSON round trip is not lossless")
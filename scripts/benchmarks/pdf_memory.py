@@ -0,0 +1,149 @@
+"""
+PDF Memory Benchmark
+--------------------
+Peak RSS of table extraction on a long synthetic report (default 1,000
+pages): the plain pdfplumber page loop vs the streaming iterator in
+common/pdf_tables.py.
+
+Design:
+- Each mode runs in a fresh spawned process so baselines are comparable
+- RSS is sampled at page checkpoints to show growth (or its absence)
+- Streaming runs without the table cache and without page sharding,
+  so it measures the iterator itself
+- Results printed and written to runs/benchmarks/pdf-memory-<timestamp>.json
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.synthetic_data import ROWS_PER_PAGE, SYNTHETIC_ROOT, make_user, render_table_pdf
+from common.metrics import current_rss_mb, drain, track
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+MODES = ["pdfplumber", "streaming"]
+
+
+# =====================================================
+# Data
+# =====================================================
+
+def ensure_report(pages: int, seed: int = 7) -> Path:
+    path = SYNTHETIC_ROOT / "pdf-memory" / f"user-list-{pages}p.pdf"
+    if path.exists():
+        return path
+
+    print(f"🧪 Rendering {pages}-page synthetic user list")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    users = [make_user(i, rng) for i in range(pages * ROWS_PER_PAGE)]
+    render_table_pdf(path, "User List - PDF Memory Benchmark", [{
+        "headers": ["Display Name", "Email", "Sign-in allowed", "Assigned Products"],
+        "rows": [[u["name"], u["email"], "Yes", u["product"]] for u in users]
+    }])
+    return path
+
+
+def checkpoints(pages: int) -> List[int]:
+    return sorted({max(1, pages * pct // 100) for pct in (1, 10, 25, 50, 75, 100)})
+
+
+# =====================================================
+# Measurement (runs in a fresh process)
+# =====================================================
+
+def measure(mode: str, path: str, marks: List[int]) -> Dict:
+    os.environ["PDF_TABLE_CACHE"] = "0"
+    os.environ["PDF_EXTRACT_WORKERS"] = "1"
+
+    rss = {}
+    rows = 0
+    started = time.perf_counter()
+
+    with track(mode):
+        if mode == "pdfplumber":
+            import pdfplumber
+
+            with pdfplumber.open(path) as pdf:
+                for page_no, page in enumerate(pdf.pages, start=1):
+                    table = page.extract_table()
+                    rows += len(table or [])
+                    if page_no in marks:
+                        rss[page_no] = current_rss_mb()
+        else:
+            from common.pdf_tables import iter_pdf_pages
+
+            for page_no, tables in enumerate(iter_pdf_pages(path), start=1):
+                rows += len(tables[0]) if tables else 0
+                if page_no in marks:
+                    rss[page_no] = current_rss_mb()
+
+    record = drain()[-1]
+
+    return {
+        "mode": mode,
+        "pages": max(rss, default=0),
+        "rows": rows,
+        "wall_s": round(time.perf_counter() - started, 3),
+        "peak_rss_mb": record["peak_rss_mb"],
+        "rss_mb_at_page": rss,
+        "rss_growth_mb": round(rss[max(rss)] - rss[min(rss)], 1) if rss else None
+    }
+
+
+def run(pages: int, modes: List[str]) -> List[Dict]:
+    path = ensure_report(pages)
+    marks = checkpoints(pages)
+    results = []
+
+    for mode in modes:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.append(pool.submit(measure, mode, str(path), marks).result())
+
+    return results
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Peak RSS of PDF table extraction on a long report")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/pdf-memory-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    results = run(args.pages, args.modes)
+
+    print(f"\n📊 Table extraction memory — {args.pages} pages")
+    print(f"   {'mode':<12}{'wall s':>9}{'rows':>9}{'peak MB':>10}{'growth MB':>11}")
+    for r in results:
+        print(f"   {r['mode']:<12}{r['wall_s']:>9.2f}{r['rows']:>9}"
+              f"{r['peak_rss_mb'] or '-':>10}{r['rss_growth_mb'] or '-':>11}")
+        print("      RSS by page: " + ", ".join(f"{p}: {mb} MB" for p, mb in r["rss_mb_at_page"].items()))
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"pdf-memory-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "metadata": {"generated_at": datetime.utcnow().isoformat() + "Z", "pages": args.pages},
+            "results": results
+        }, f, indent=2)
+
+    print(f"\n📄 Results written to: {output}")
@@ -0,0 +1,121 @@
+"""
+PDF Pre-filter Benchmark
+------------------------
+Table extraction time with and without the page pre-filter
+(common/pdf_tables.py, PDF_PREFILTER) on the real vendor reports of a
+month, chart-heavy ones (Dark Web, Phishing) included.
+
+Usage:
+    cd scripts
+    python3 -m benchmarks.pdf_prefilter                     # latest month in data/raw
+    python3 -m benchmarks.pdf_prefilter --reports a.pdf b.pdf --repeat 5
+
+Design:
+- Runs extract_pages() directly: no table cache, no page sharding, no
+  layout template, so only the pre-filter differs between the two runs
+- Best of --repeat runs per mode; the tables of both modes are compared
+- chart objects = curves + rects on the report, to spot chart-heavy ones
+- Results printed and written to runs/benchmarks/pdf-prefilter-<timestamp>.json
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import pdfplumber
+
+from common.metrics import drain, track
+from common.pdf_tables import extract_pages
+from pipeline.layout import DATA, ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+MODES = {"prefilter": "1", "no-prefilter": "0"}
+
+
+# =====================================================
+# Measurement
+# =====================================================
+
+def chart_objects(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        total = 0
+        for page in pdf.pages:
+            total += len(page.curves) + len(page.rects)
+            page.close()
+        return total
+
+
+def extract(path: str, mode: str) -> Dict:
+    os.environ["PDF_PREFILTER"] = MODES[mode]
+
+    started = time.perf_counter()
+    with track(f"prefilter:{mode}"):
+        pages = list(extract_pages(path, workers=1))
+    wall = time.perf_counter() - started
+
+    record = drain()[-1]
+    return {"wall_s": wall, "skipped": record.get("pages_skipped") or 0, "pages": pages}
+
+
+def measure(path: str, repeat: int) -> Dict:
+    runs = {mode: [extract(path, mode) for _ in range(repeat)] for mode in MODES}
+    best = {mode: min(r["wall_s"] for r in results) for mode, results in runs.items()}
+
+    return {
+        "report": Path(path).name,
+        "pages": len(runs["prefilter"][0]["pages"]),
+        "chart_objects": chart_objects(path),
+        "pages_skipped": runs["prefilter"][0]["skipped"],
+        "prefilter_s": round(best["prefilter"], 3),
+        "no_prefilter_s": round(best["no-prefilter"], 3),
+        "saved_pct": round(100 * (1 - best["prefilter"] / best["no-prefilter"]), 1),
+        "identical": runs["prefilter"][0]["pages"] == runs["no-prefilter"][0]["pages"]
+    }
+
+
+def default_reports() -> List[str]:
+    months = sorted(d for d in (DATA / "raw").iterdir() if d.is_dir())
+    return [str(p) for p in sorted(months[-1].glob("*.pdf"))] if months else []
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Table extraction time with and without the page pre-filter")
+    parser.add_argument("--reports", nargs="+", help="PDF reports (default: every PDF of the latest month in data/raw)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/pdf-prefilter-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    results = sorted(
+        (measure(path, args.repeat) for path in args.reports or default_reports()),
+        key=lambda r: -r["chart_objects"]
+    )
+
+    print(f"\n📊 Page pre-filter — best of {args.repeat}")
+    print(f"   {'report':<58}{'pages':>6}{'charts':>8}{'skipped':>9}{'on s':>8}{'off s':>8}{'saved':>8}")
+    for r in results:
+        print(f"   {r['report'][:57]:<58}{r['pages']:>6}{r['chart_objects']:>8}{r['pages_skipped']:>9}"
+              f"{r['prefilter_s']:>8.3f}{r['no_prefilter_s']:>8.3f}{r['saved_pct']:>7.1f}%"
+              f" {'✅' if r['identical'] else '❌ tables differ'}")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"pdf-prefilter-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "metadata": {"generated_at": datetime.utcnow().isoformat() + "Z", "repeat": args.repeat},
+            "results": results
+        }, f, indent=2)
+
+    print(f"\n📄 Results written to: {output}")
@@ -0,0 +1,194 @@
+"""
+PDF Layout Template Benchmark
+-----------------------------
+Table extraction time with and without layout templates
+(common/pdf_templates.py, PDF_TEMPLATES) and whether the tables are the
+same.
+
+Usage:
+    cd scripts
+    python3 -m benchmarks.pdf_templates                      # synthetic: learn Jan, read Feb
+    python3 -m benchmarks.pdf_templates --reports ../data/raw/2025-10/*.pdf
+    python3 -m benchmarks.pdf_templates --reports ../data/raw/2025-11/*.pdf --teach-dir ../data/raw/2025-10
+
+Design:
+- Each report runs in a fresh spawned process with its own template
+  directory, so templates never leak between reports or into data/templates
+- The template is first learned from the same-named report in --teach-dir
+  (default: from the report itself, i.e. re-running the teaching document)
+- detection: table detection alone, page objects preloaded, so page
+  parsing (the same in both modes) does not hide the difference
+- end to end: extract_pages() without the table cache and page sharding,
+  page parsing included
+- Best of --repeat runs per mode; the tables of both modes are compared
+- Results printed and written to runs/benchmarks/pdf-templates-<timestamp>.json
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.synthetic_data import generate_client, synthetic_dir
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+FAMILY = "benchmark"
+SYNTHETIC_ENTITIES = 1000
+SYNTHETIC_MONTHS = ["2025-01", "2025-02"]
+
+
+# =====================================================
+# Measurement (runs in a fresh process)
+# =====================================================
+
+def detection(path: str, template: Dict, repeat: int) -> Dict:
+    """Best-of-repeat detection time per mode, both modes timed on the same loaded page."""
+    import pdfplumber
+    from common.pdf_tables import detect_tables
+
+    templates = {"off": None, "on": template}
+    seconds = {mode: 0.0 for mode in templates}
+    tables = {mode: [] for mode in templates}
+    templated = 0
+
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            page.chars, page.edges
+            times = {mode: [] for mode in templates}
+            for _ in range(repeat):
+                for mode, t in templates.items():
+                    started = time.perf_counter()
+                    found, n = detect_tables(page, None, t)
+                    times[mode].append(time.perf_counter() - started)
+                    if len(times[mode]) == 1:
+                        tables[mode].append(found)
+                        templated += bool(n)
+            for mode in templates:
+                seconds[mode] += min(times[mode])
+            page.close()
+
+    return {"s": seconds, "identical": tables["off"] == tables["on"], "templated": templated}
+
+
+def end_to_end(path: str, enabled: bool, repeat: int) -> Dict:
+    from common.metrics import drain, track
+    from common.pdf_tables import extract_pages
+
+    os.environ["PDF_TEMPLATES"] = "1" if enabled else "0"
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with track("templates" if enabled else "no-templates"):
+            pages = list(extract_pages(path, workers=1, family=FAMILY))
+        runs.append(time.perf_counter() - started)
+    drain()
+
+    return {"s": min(runs), "tables": pages}
+
+
+def measure(path: str, teach: str, repeat: int) -> Dict:
+    with tempfile.TemporaryDirectory() as template_dir:
+        os.environ.update(PDF_TABLE_CACHE="0", PDF_EXTRACT_WORKERS="1", PDF_TEMPLATE_DIR=template_dir)
+
+        from common.metrics import drain
+        from common.pdf_tables import extract_pages
+        from common.pdf_templates import load_template
+
+        # Teaching pass: full detection learns the data tables
+        os.environ["PDF_TEMPLATES"] = "1"
+        list(extract_pages(teach, workers=1, family=FAMILY))
+        drain()
+        template = load_template(FAMILY)
+
+        detect = detection(path, template, repeat)
+        runs = {enabled: end_to_end(path, enabled, repeat) for enabled in (False, True)}
+
+    return {
+        "report": Path(path).name,
+        "taught_by": Path(teach).name if teach != path else "itself",
+        "pages": len(runs[False]["tables"]),
+        "shapes": len(template["shapes"]),
+        "pages_templated": detect["templated"],
+        "detect_s": round(detect["s"]["off"], 3),
+        "detect_templated_s": round(detect["s"]["on"], 3),
+        "detect_speedup": round(detect["s"]["off"] / detect["s"]["on"], 2) if detect["s"]["on"] else None,
+        "e2e_s": round(runs[False]["s"], 3),
+        "e2e_templated_s": round(runs[True]["s"], 3),
+        "e2e_saved_pct": round(100 * (1 - runs[True]["s"] / runs[False]["s"]), 1),
+        "identical": detect["identical"] and runs[False]["tables"] == runs[True]["tables"]
+    }
+
+
+def run(reports: List[str], teach_dir: Optional[str], repeat: int) -> List[Dict]:
+    results = []
+    for path in reports:
+        teach = Path(teach_dir) / Path(path).name if teach_dir else Path(path)
+        if not teach.exists():
+            print(f"⚠️  No {teach.name} in {teach_dir}, teaching with the report itself")
+            teach = Path(path)
+
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.append(pool.submit(measure, str(path), str(teach), repeat).result())
+    return results
+
+
+def synthetic_reports() -> Tuple[List[str], str]:
+    """Reports of the second synthetic month, taught by the first one."""
+    out_dir = synthetic_dir(SYNTHETIC_ENTITIES)
+    raw = [out_dir / "raw" / month for month in SYNTHETIC_MONTHS]
+    if not all(d.exists() for d in raw):
+        print(f"🧪 Generating synthetic reports ({SYNTHETIC_ENTITIES} entities)")
+        generate_client(out_dir, SYNTHETIC_ENTITIES, SYNTHETIC_MONTHS)
+    return [str(p) for p in sorted(raw[1].glob("*.pdf"))], str(raw[0])
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Table extraction time with and without layout templates")
+    parser.add_argument("--reports", nargs="+", help="PDF reports (default: synthetic reports, second month)")
+    parser.add_argument("--teach-dir", help="Learn each template from the same-named report here (default: the report itself)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/pdf-templates-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    reports, teach_dir = (args.reports, args.teach_dir) if args.reports else synthetic_reports()
+    results = run(reports, teach_dir, args.repeat)
+
+    print(f"\n📊 Layout templates — best of {args.repeat}")
+    print(f"   {'report':<42}{'pages':>6}{'tmpl':>6}{'detect s':>10}{'tmpl s':>8}{'x':>6}"
+          f"{'e2e s':>8}{'tmpl s':>8}{'saved':>8}")
+    for r in results:
+        print(f"   {r['report'][:41]:<42}{r['pages']:>6}{r['pages_templated']:>6}"
+              f"{r['detect_s']:>10.3f}{r['detect_templated_s']:>8.3f}{r['detect_speedup'] or 0:>6.2f}"
+              f"{r['e2e_s']:>8.3f}{r['e2e_templated_s']:>8.3f}{r['e2e_saved_pct']:>7.1f}%"
+              f" {'✅' if r['identical'] else '❌ tables differ'}")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"pdf-templates-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "metadata": {
+                "generated_at": datetime.utcnow().isoformat() + "Z",
+                "repeat": args.repeat,
+                "teach_dir": teach_dir
+            },
+            "results": results
+        }, f, indent=2)
+
+    print(f"\n📄 Results written to: {output}")
@@ -0,0 +1,180 @@
+"""
+Record Types Benchmark
+----------------------
+Enriched asset / user snapshots held as dicts vs as slotted records
+(common/records.py): memory held, conversion time both ways, and the
+insight engine's security scan, by default 10,000 and 50,000 entities.
+
+Design:
+- Snapshots are built with the real builders and enrichers
+  (benchmarks/snapshot_formats.py), then decoded from JSON, so the dicts
+  are what a loaded snapshot holds (no strings shared with the generator)
+- Memory is what tracemalloc counts as held once the snapshot is built
+  (records: after the dicts they were converted from are released)
+- The scan is analyze_security() on records vs the dict version it
+  replaced (dict_security below), best of --repeat runs; both must
+  return the same findings
+- Every snapshot's round trip is checked (to_snapshot(from_snapshot(x))
+  == x), the run fails if one is not lossless
+- Results printed and written to runs/benchmarks/record-types-<timestamp>.json
+"""
+
+import gc
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.snapshot_formats import best_of, build_snapshots
+from common import records, serialization
+from insight_engine import analyze_security
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+DEFAULT_ENTITIES = [10_000, 50_000]
+
+
+# =====================================================
+# Dict Baseline
+# =====================================================
+
+def dict_security(users: Dict, assets: Dict) -> Dict:
+    """analyze_security() as it read dict snapshots."""
+    risks = []
+
+    phishing_failed_users = []
+    darkweb_exposed_users = []
+    devices_without_backup = []
+    edr_affected_devices = []
+
+    for email, user in users["users"].items():
+        signals = user.get("risk_signals", {})
+
+        if signals.get("phishing_clicked"):
+            phishing_failed_users.append(email)
+            risks.append(f"User {email} failed a phishing simulation.")
+
+        if signals.get("dark_web_exposed"):
+            darkweb_exposed_users.append(email)
+            risks.append(f"User {email} credentials were found on the dark web.")
+
+    for asset in assets["assets"].values():
+        name = asset.get("device_name") or asset.get("serial_number")
+        backup = asset.get("backup_state", {})
+        security = asset.get("security_state", {})
+
+        if backup.get("enabled") is False:
+            devices_without_backup.append(name)
+            risks.append(f"Asset {name} does not have backups configured.")
+
+        if security.get("risk_level") == "high":
+            edr_affected_devices.append(name)
+            risks.append(f"Asset {name} has unresolved EDR incidents.")
+
+    return {
+        "summary": risks,
+        "phishing_failed_users": phishing_failed_users,
+        "darkweb_exposed_users": darkweb_exposed_users,
+        "devices_without_backup": devices_without_backup,
+        "edr_affected_devices": edr_affected_devices
+    }
+
+
+# =====================================================
+# Measurement
+# =====================================================
+
+def held(build: Callable, *args):
+    """(bytes tracemalloc counts as held by build's result, result)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def load_records(body: bytes) -> Dict:
+    return records.from_snapshot(serialization.loads(body))
+
+
+def run(entities: int, repeat: int) -> Dict:
+    snapshots = build_snapshots(entities)
+    payloads = {}
+    lossless = True
+
+    for kind, snapshot in snapshots.items():
+        body = serialization.dumps(snapshot)
+        dict_bytes, as_dicts = held(serialization.loads, body)
+        record_bytes, as_records = held(load_records, body)
+
+        from_s, _ = best_of(repeat, records.from_snapshot, as_dicts)
+        to_s, restored = best_of(repeat, records.to_snapshot, as_records)
+        lossless = lossless and restored == as_dicts
+
+        payloads[kind] = {
+            "dicts": as_dicts,
+            "records": as_records,
+            "result": {
+                "snapshot": kind,
+                "dict_mb": round(dict_bytes / 1e6, 2),
+                "record_mb": round(record_bytes / 1e6, 2),
+                "from_dict_s": from_s,
+                "to_dict_s": to_s
+            }
+        }
+
+    users, assets = payloads["users"], payloads["assets"]
+    dict_s, expected = best_of(repeat, dict_security, users["dicts"], assets["dicts"])
+    record_s, found = best_of(repeat, analyze_security, users["records"], assets["records"])
+
+    return {
+        "entities": entities,
+        "lossless": lossless,
+        "same_findings": found == expected,
+        "snapshots": [p["result"] for p in payloads.values()],
+        "security_scan": {"dict_s": dict_s, "record_s": record_s}
+    }
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dict snapshots vs slotted records (memory / conversion / scan)")
+    parser.add_argument("--entities", nargs="+", type=int, default=DEFAULT_ENTITIES)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best kept)")
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/record-types-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    results: List[Dict] = [run(n, args.repeat) for n in args.entities]
+
+    for r in results:
+        print(f"\n📊 {r['entities']} entities — round trip {'lossless ✅' if r['lossless'] else 'LOSSY ❌'}, "
+              f"findings {'identical ✅' if r['same_findings'] else 'DIFFER ❌'}")
+        print(f"   {'snapshot':<10}{'dict MB':>9}{'rec MB':>9}{'from s':>9}{'to s':>9}")
+        for s in r["snapshots"]:
+            print(f"   {s['snapshot']:<10}{s['dict_mb']:>9.2f}{s['record_mb']:>9.2f}"
+                  f"{s['from_dict_s']:>9.3f}{s['to_dict_s']:>9.3f}")
+        scan = r["security_scan"]
+        print(f"   security scan: dicts {scan['dict_s']:.3f}s, records {scan['record_s']:.3f}s")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"record-types-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    serialization.save_json({
+        "metadata": {"generated_at": datetime.utcnow().isoformat() + "Z"},
+        "results": results
+    }, output, pretty=True)
+
+    print(f"\n📄 Results written to: {output}")
+
+    if not all(r["lossless"] and r["same_findings"] for r in results):
+        sys.exit("❌ Records are not lossless or change the findings")
@@ -0,0 +1,262 @@
+"""
+End-to-End Benchmark
+--------------------
+Runs every parser, enricher, diff_engine, insight_engine and pdf_exporter
+stage against synthetic clients (benchmarks/synthetic_data.py) and reports
+throughput and memory per stage.
+
+Design:
+- Data is generated once per size and reused (data/synthetic/synthetic-<n>/)
+- The first month only builds the previous snapshot; the last month is measured
+- Each stage is measured with common.metrics.track: wall / CPU time,
+  peak RSS, pages read and rows produced → rows/s and pages/s
+- The parsed-PDF cache is disabled unless --cache (measures cold parsing)
+- The LLM polish step is excluded: pdf_exporter renders the deterministic
+  report_generator Markdown
+- Results printed as a table and written to runs/benchmarks/<timestamp>.json
+"""
+
+import copy
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.synthetic_data import (
+    GENERATOR_VERSION,
+    generate_client,
+    load_descriptor,
+    synthetic_dir
+)
+from common.metrics import drain, track
+from pipeline.layout import ROOT
+
+
+# =====================================================
+# Config
+# =====================================================
+
+DEFAULT_SIZES = [50, 500, 5000]
+DEFAULT_MONTHS = ["2025-01", "2025-02"]
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+
+
+# =====================================================
+# Data
+# =====================================================
+
+def ensure_dataset(entities: int, months: List[str], seed: int, regenerate: bool = False) -> Path:
+    out_dir = synthetic_dir(entities)
+    descriptor = load_descriptor(out_dir)
+
+    current = (
+        descriptor.get("generator_version") == GENERATOR_VERSION
+        and descriptor.get("months") == months
+        and descriptor.get("seed") == seed
+    )
+
+    if regenerate or not current:
+        print(f"🧪 Generating synthetic client: {entities} entities")
+        with track(f"generate:{entities}", kind="generate"):
+            generate_client(out_dir, entities, months, seed)
+        drain()
+
+    return out_dir
+
+
+def month_files(raw_dir: Path) -> Dict[str, str]:
+    # Imported lazily like the stages: classification reads the first page
+    from common.report_classifier import index_reports
+    return {kind: str(path) for kind, path in index_reports(raw_dir).found().items()}
+
+
+# =====================================================
+# Stages
+# =====================================================
+
+def run_month(client: str, month: str, files: Dict[str, str], previous: Dict, work_dir: str) -> Dict:
+    """
+    Runs the month through every stage in pipeline order. Each stage is a
+    tracked block; rows are the entities the stage produced.
+    """
+    # Imported here so `--help` works without the parsing toolchain
+    from diff_engine import build_diff
+    from enrichers.backup_enricher import apply_backup_enrichment
+    from enrichers.darkweb_enricher import apply_darkweb_enrichment
+    from enrichers.edr_enricher import apply_edr_enrichment
+    from enrichers.phishing_enricher import apply_phishing_enrichment
+    from exporters.pdf_exporter import build_pdf
+    from insight_engine import build_insights
+    from narrative_builder import build_narrative
+    from parsers import asset_list_parser, user_list_parser
+    from report_generator import build_markdown_report
+
+    with track("user_list_parser", kind="stage") as m:
+        users = user_list_parser.build_user_snapshot(files["users"], month, previous.get("users", {}))
+        m["rows"] = len(users["users"])
+
+    with track("asset_list_parser", kind="stage") as m:
+        assets = asset_list_parser.build_asset_snapshot(files["assets"], month, previous.get("assets", {}))
+        m["rows"] = len(assets["assets"])
+
+    base = {"users": copy.deepcopy(users), "assets": copy.deepcopy(assets)}
+
+    with track("edr_enricher", kind="stage") as m:
+        apply_edr_enrichment(assets, files["edr"])
+        m["rows"] = len(assets["assets"])
+
+    with track("backup_enricher", kind="stage") as m:
+        apply_backup_enrichment(assets, files["backup"])
+        m["rows"] = len(assets["assets"])
+
+    with track("phishing_enricher", kind="stage") as m:
+        apply_phishing_enrichment(users, files["phishing"])
+        m["rows"] = len(users["users"])
+
+    with track("darkweb_enricher", kind="stage") as m:
+        apply_darkweb_enrichment(users, files["darkweb"])
+        m["rows"] = len(users["users"])
+
+    diff = None
+    if previous:
+        with track("diff_engine", kind="stage") as m:
+            diff = build_diff(
+                prev_users=previous["users"],
+                curr_users=base["users"]["users"],
+                prev_assets=previous["assets"],
+                curr_assets=base["assets"]["assets"],
+                from_month=previous["month"],
+                to_month=month
+            )
+            m["rows"] = len(base["users"]["users"]) + len(base["assets"]["assets"])
+
+    with track("insight_engine", kind="stage") as m:
+        insights = build_insights(users, assets, diff)
+        m["rows"] = len(users["users"]) + len(assets["assets"])
+
+    with track("pdf_exporter", kind="stage") as m:
+        narrative = build_narrative(insights)
+        markdown = build_markdown_report(narrative, f"Executive Security Report — {client}", month)
+        build_pdf(markdown, os.path.join(work_dir, f"{month}-report.pdf"), client, month)
+        m["rows"] = 1
+
+    return {
+        "month": month,
+        "users": base["users"]["users"],
+        "assets": base["assets"]["assets"]
+    }
+
+
+def benchmark_size(entities: int, months: List[str], seed: int, regenerate: bool) -> Dict:
+    data_dir = ensure_dataset(entities, months, seed, regenerate)
+    client = load_descriptor(data_dir)["client"]
+    previous = {}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for month in months:
+            # Earlier months only build the previous snapshot
+            drain()
+            previous = run_month(client, month, month_files(data_dir / "raw" / month), previous, work_dir)
+
+    stages = [r for r in drain() if r["kind"] == "stage"]
+    for record in stages:
+        wall = record["wall_s"] or 0
+        record["rows_per_s"] = round(record["rows"] / wall, 1) if wall and record.get("rows") else None
+        record["pages_per_s"] = round(record["pages"] / wall, 1) if wall and record.get("pages") else None
+
+    return {
+        "entities": entities,
+        "month": months[-1],
+        "totals": {
+            "wall_s": round(sum(r["wall_s"] for r in stages), 4),
+            "cpu_s": round(sum(r["cpu_s"] for r in stages), 4),
+            "pages": sum(r.get("pages") or 0 for r in stages),
+            "peak_rss_mb": max((r["peak_rss_mb"] or 0 for r in stages), default=None)
+        },
+        "stages": stages
+    }
+
+
+# =====================================================
+# Report
+# =====================================================
+
+def print_results(results: List[Dict]):
+    for result in results:
+        totals = result["totals"]
+        print(f"\n📊 {result['entities']} entities — {totals['wall_s']}s, "
+              f"{totals['pages']} pages, peak {totals['peak_rss_mb']} MB")
+        print(f"   {'stage':<20}{'wall s':>9}{'cpu s':>9}{'rows':>9}{'rows/s':>11}"
+              f"{'pages':>7}{'pages/s':>9}{'peak MB':>9}")
+        for r in result["stages"]:
+            print(
+                f"   {r['step']:<20}{r['wall_s']:>9.3f}{r['cpu_s']:>9.3f}"
+                f"{r.get('rows') or 0:>9}{r['rows_per_s'] or '-':>11}"
+                f"{r.get('pages') or 0:>7}{r['pages_per_s'] or '-':>9}"
+                f"{r['peak_rss_mb'] or '-':>9}"
+            )
+
+
+def write_results(results: List[Dict], path: Path = None, **metadata) -> Path:
+    path = path or BENCHMARKS / f"benchmark-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    body = {
+        "metadata": {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            **metadata
+        },
+        "results": results
+    }
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(body, f, indent=2)
+
+    return path
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic clients")
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+        help="Entity counts to benchmark (50–50000)"
+    )
+    parser.add_argument("--months", nargs="+", default=DEFAULT_MONTHS, help="Months YYYY-MM (last one is measured)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate synthetic data")
+    parser.add_argument("--cache", action="store_true", help="Keep the parsed-PDF cache enabled")
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/benchmark-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ["PDF_TABLE_CACHE"] = "0"
+
+    months = sorted(args.months)
+    results = [
+        benchmark_size(size, months, args.seed, args.regenerate)
+        for size in args.sizes
+    ]
+
+    print_results(results)
+
+    output = write_results(
+        results,
+        Path(args.output) if args.output else None,
+        months=months,
+        seed=args.seed,
+        pdf_cache=args.cache
+    )
+    print(f"\n📄 Results written to: {output}")
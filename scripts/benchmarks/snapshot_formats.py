@@ -0,0 +1,204 @@
+"""
+Snapshot Format Benchmark
+-------------------------
+Indented JSON (the format every stage used to write) vs the snapshot
+store (common/snapshot_store.py, Parquet) for fully enriched asset and
+user snapshots, by default 10,000 and 100,000 entities.
+
+Design:
+- Snapshots are built with the real builders and enrichers (asset /
+  user parsers, EDR, backup, phishing, dark web) from synthetic records,
+  so every nested field the schema knows is populated
+- Save and load are timed per format, best of --repeat runs; disk size
+  is the size of the file written
+- The store's round trip is checked against the input (== on the
+  snapshot), the run fails if it is not lossless
+- Results printed and written to runs/benchmarks/snapshot-formats-<timestamp>.json
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.synthetic_data import (
+    BACKUP_COVERAGE, BREACH_SOURCES, DARKWEB_EXPOSURE, EDR_COVERAGE, make_asset, make_user
+)
+from common import snapshot_store
+from enrichers import backup_enricher, darkweb_enricher, edr_enricher, phishing_enricher
+from parsers import asset_list_parser, user_list_parser
+from pipeline.layout import ROOT
+
+
+BENCHMARKS = ROOT / "runs" / "benchmarks"
+DEFAULT_ENTITIES = [10_000, 100_000]
+MONTH = "2025-01"
+
+
+# =====================================================
+# Data
+# =====================================================
+
+def build_snapshots(entities: int, seed: int = 7) -> Dict[str, Dict]:
+    """Enriched {"assets": snapshot, "users": snapshot} of the given size."""
+    rng = random.Random(seed)
+    people = [make_user(i, rng) for i in range(entities)]
+    devices = [make_asset(i, rng, person) for i, person in enumerate(people)]
+
+    users = {
+        p["email"]: user_list_parser.build_user(
+            p["email"], p["name"], "active" if p["enabled"] else "blocked", p["product"], MONTH
+        )
+        for p in people
+    }
+    assets = dict(
+        asset_list_parser.build_xlsx_asset({
+            "Device Name": d["device_name"],
+            "Serial Number": d["serial"],
+            "Last User": d["user"] or "",
+            "Model": d["model"],
+            "Operating System": d["os"],
+        }, MONTH)
+        for d in devices
+    )
+    for user in users.values():
+        user["first_seen"] = MONTH
+    for asset in assets.values():
+        asset["first_seen"] = MONTH
+
+    metadata = {"generated_at": datetime.utcnow().isoformat() + "Z", "month": MONTH}
+    asset_snapshot = {"metadata": dict(metadata, source="asset_list"), "assets": assets}
+    user_snapshot = {"metadata": dict(metadata, source="user_list"), "users": users}
+
+    edr = {
+        d["serial"]: {"alerts": rng.randint(0, 5), "incidents": rng.randint(0, 2)}
+        for d in devices if rng.random() < EDR_COVERAGE
+    }
+    backup = {
+        d["device_name"]: {"enabled": True, "status": rng.choice(["healthy", "warning", "failed"])}
+        for d in devices if rng.random() < BACKUP_COVERAGE
+    }
+    phishing = {
+        p["email"]: {"sent": rng.randint(1, 4), "clicked": rng.randint(0, 1)}
+        for p in people if rng.random() < 0.5
+    }
+    darkweb = {
+        p["email"]: {"exposed": True, "source": rng.choice(BREACH_SOURCES), "severity": "high"}
+        for p in people if rng.random() < DARKWEB_EXPOSURE
+    }
+
+    with redirect_stdout(StringIO()):
+        edr_enricher.apply_edr_data(asset_snapshot, edr)
+        backup_enricher.apply_backup_data(asset_snapshot, backup)
+        phishing_enricher.apply_phishing_data(user_snapshot, phishing)
+        darkweb_enricher.apply_darkweb_data(user_snapshot, darkweb)
+
+    return {"assets": asset_snapshot, "users": user_snapshot}
+
+
+# =====================================================
+# Formats
+# =====================================================
+
+def save_json(snapshot: Dict, path: Path) -> Path:
+    path = path.with_suffix(".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2)
+    return path
+
+
+def load_json(path: Path) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+FORMATS: Dict[str, Tuple[Callable, Callable]] = {
+    "json": (save_json, load_json),
+    "store": (snapshot_store.save_snapshot, snapshot_store.load_snapshot),
+}
+
+
+# =====================================================
+# Measurement
+# =====================================================
+
+def best_of(repeat: int, func, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 4), result
+
+
+def run(entities: int, repeat: int) -> Dict:
+    snapshots = build_snapshots(entities)
+    results = []
+    lossless = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind, snapshot in snapshots.items():
+            for name, (save, load) in FORMATS.items():
+                save_s, written = best_of(repeat, save, snapshot, Path(tmp) / f"{kind}-{name}")
+                load_s, loaded = best_of(repeat, load, written)
+                if name == "store":
+                    lossless = lossless and loaded == snapshot
+                results.append({
+                    "snapshot": kind,
+                    "format": name,
+                    "save_s": save_s,
+                    "load_s": load_s,
+                    "bytes": os.path.getsize(written)
+                })
+
+    return {"entities": entities, "lossless": lossless, "formats": results}
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JSON vs snapshot store (save / load / size)")
+    parser.add_argument("--entities", nargs="+", type=int, default=DEFAULT_ENTITIES)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best kept)")
+    parser.add_argument("--output", help="Results JSON (default: runs/benchmarks/snapshot-formats-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    results: List[Dict] = [run(n, args.repeat) for n in args.entities]
+
+    for r in results:
+        print(f"\n📊 {r['entities']} entities — round trip {'lossless ✅' if r['lossless'] else 'LOSSY ❌'}")
+        print(f"   {'snapshot':<10}{'format':<8}{'save s':>9}{'load s':>9}{'MB':>9}")
+        for f in r["formats"]:
+            print(f"   {f['snapshot']:<10}{f['format']:<8}{f['save_s']:>9.3f}{f['load_s']:>9.3f}"
+                  f"{f['bytes'] / 1e6:>9.2f}")
+
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / f"snapshot-formats-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "metadata": {
+                "generated_at": datetime.utcnow().isoformat() + "Z",
+                "compression": snapshot_store.COMPRESSION
+            },
+            "results": results
+        }, f, indent=2)
+
+    print(f"\n📄 Results written to: {output}")
+
+    if not all(r["lossless"] for r in results):
+        sys.exit("❌ Snapshot store round trip is not lossless")
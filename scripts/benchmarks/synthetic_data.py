@@ -0,0 +1,407 @@
+"""
+Synthetic Vendor Reports
+------------------------
+Generates a client's raw monthly reports at arbitrary scale for
+benchmarking: asset list XLSX plus user list, EDR, Cove backup,
+phishing and dark-web PDFs.
+
+Design:
+- Headers match what the parsers and enrichers look for
+- PDFs are reportlab-rendered ruled tables (pdfplumber "lines" strategy),
+  ROWS_PER_PAGE rows per page with the header repeated on every page,
+  so 50,000 entities is ~1,000 pages per report
+- Deterministic for a given (entities, months, seed)
+- Month-to-month churn (joiners / leavers / retired devices) so the
+  diff engine and first_seen logic have work to do
+- Output follows the client layout (<out>/raw/<month>/...), so a tree
+  generated under data/clients/<slug>/ also runs through run_full_pipeline.py
+"""
+
+import json
+import math
+import random
+from pathlib import Path
+from typing import Dict, List
+
+from openpyxl import Workbook
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from pipeline.layout import DATA
+
+
+# =====================================================
+# Config
+# =====================================================
+
+GENERATOR_VERSION = 1
+
+MIN_ENTITIES = 50
+MAX_ENTITIES = 50_000
+ROWS_PER_PAGE = 50
+
+SYNTHETIC_ROOT = DATA / "synthetic"
+
+DOMAIN = "synthetic-client.com"
+CHURN = 0.03            # share of users leaving / joining per month
+SPARE_DEVICES = 0.05    # share of assets with no assigned user
+EDR_COVERAGE = 0.92
+BACKUP_COVERAGE = 0.85
+DARKWEB_EXPOSURE = 0.08
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael",
+    "Linda", "David", "Elizabeth", "William", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Priya",
+    "Wei", "Fatima", "Carlos", "Aiko", "Olu", "Sven", "Ana"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson",
+    "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+    "Patel", "Chen", "Khan", "Silva", "Tanaka", "Okafor", "Berg", "Costa"
+]
+MODELS = [
+    "Latitude 5440", "Latitude 7440", "OptiPlex 7010", "ThinkPad T14 Gen 4",
+    "ThinkPad X1 Carbon", "EliteBook 840 G10", "Surface Laptop 5", "MacBook Pro 14"
+]
+OPERATING_SYSTEMS = [
+    "Windows 11 Pro", "Windows 11 Enterprise", "Windows 10 Pro", "macOS 14 Sonoma"
+]
+PRODUCTS = [
+    "Microsoft 365 Business Premium", "Microsoft 365 Business Standard",
+    "Exchange Online (Plan 1)", "Microsoft 365 E3"
+]
+BREACH_SOURCES = [
+    "LinkedIn 2021 Scrape", "Canva 2019", "Adobe 2013", "Dropbox 2012",
+    "Combolist 2024", "Stealer Logs", "MyFitnessPal 2018"
+]
+BACKUP_FAILURES = [
+    "VSS snapshot failed", "Device offline", "Access denied",
+    "Quota exceeded", "Network timeout"
+]
+
+
+# =====================================================
+# Entities
+# =====================================================
+
+def make_user(index: int, rng: random.Random) -> Dict:
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    return {
+        "index": index,
+        "name": f"{first} {last}",
+        "email": f"{first[0].lower()}{last.lower()}{index:05d}@{DOMAIN}",
+        "enabled": rng.random() > 0.04,
+        "product": rng.choice(PRODUCTS),
+    }
+
+
+def make_asset(index: int, rng: random.Random, user: Dict = None) -> Dict:
+    os_name = rng.choice(OPERATING_SYSTEMS)
+    kind = "LT" if rng.random() < 0.7 else "WS"
+    return {
+        "index": index,
+        "device_name": f"SYN-{kind}-{index:05d}",
+        "serial": f"SN{rng.getrandbits(40):010X}",
+        "user": user["email"] if user else None,
+        "model": rng.choice(MODELS) if "mac" not in os_name.lower() else "MacBook Pro 14",
+        "os": os_name,
+    }
+
+
+def build_population(entities: int, months: List[str], seed: int) -> Dict[str, Dict]:
+    """
+    month → {"users": [...], "assets": [...]}. Each month drops CHURN of the
+    users (and their devices) and adds the same number of joiners.
+    """
+    if not MIN_ENTITIES <= entities <= MAX_ENTITIES:
+        raise ValueError(f"❌ entities must be between {MIN_ENTITIES} and {MAX_ENTITIES}")
+
+    rng = random.Random(seed)
+
+    spares = max(1, int(entities * SPARE_DEVICES))
+    users = [make_user(i, rng) for i in range(entities - spares)]
+    assets = [make_asset(i, rng, user) for i, user in enumerate(users)]
+    assets += [make_asset(len(assets) + i, rng) for i in range(spares)]
+
+    next_user, next_asset = len(users), len(assets)
+    population = {}
+
+    for month_index, month in enumerate(months):
+        if month_index:
+            leavers = set(rng.sample([u["email"] for u in users], int(len(users) * CHURN)))
+            users = [u for u in users if u["email"] not in leavers]
+            # Most leavers' devices are returned; a few stay assigned (resigned_user_device)
+            assets = [
+                a for a in assets
+                if a["user"] not in leavers or rng.random() < 0.1
+            ]
+
+            for _ in range(len(leavers)):
+                user = make_user(next_user, rng)
+                users.append(user)
+                assets.append(make_asset(next_asset, rng, user))
+                next_user += 1
+                next_asset += 1
+
+        population[month] = {"users": list(users), "assets": list(assets)}
+
+    return population
+
+
+# =====================================================
+# Rendering
+# =====================================================
+
+TABLE_STYLE = TableStyle([
+    ("FONT", (0, 0), (-1, -1), "Helvetica", 6.5),
+    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 6.5),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#E8EEF4")),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+
+def render_table_pdf(path: Path, title: str, sections: List[Dict]):
+    """
+    sections: [{"headers": [...], "rows": [[...], ...]}, ...]
+    Each section starts on a new page and is split into one Table per page
+    (header repeated), which keeps reportlab layout linear in row count.
+    """
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(
+        str(path), pagesize=LETTER,
+        leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36,
+        title=title
+    )
+    width = LETTER[0] - 72
+
+    elements = [Paragraph(title, styles["Heading2"])]
+
+    for section_index, section in enumerate(sections):
+        headers, rows = section["headers"], section["rows"]
+        col_width = width / len(headers)
+        pages = max(1, math.ceil(len(rows) / ROWS_PER_PAGE))
+
+        for page in range(pages):
+            if section_index or page:
+                elements.append(PageBreak())
+            chunk = rows[page * ROWS_PER_PAGE:(page + 1) * ROWS_PER_PAGE]
+            table = Table(
+                [headers] + [[str(v) for v in row] for row in chunk],
+                colWidths=[col_width] * len(headers),
+                rowHeights=12.5
+            )
+            table.setStyle(TABLE_STYLE)
+            elements.append(table)
+
+    doc.build(elements)
+
+
+# =====================================================
+# Vendor Reports
+# =====================================================
+
+def write_asset_list(path: Path, client: str, month: str, assets: List[Dict]):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Assets")
+
+    # Title rows above the header exercise the parser's header detection
+    ws.append([f"Asset List - {client}"])
+    ws.append([f"Reporting period: {month}"])
+    ws.append([])
+    ws.append(["Device Name", "Serial Number", "Last User", "Model", "Operating System"])
+
+    for asset in assets:
+        ws.append([
+            asset["device_name"],
+            asset["serial"],
+            f"SYNTH\\{asset['user']}" if asset["user"] else None,
+            asset["model"],
+            asset["os"],
+        ])
+
+    wb.save(str(path))
+
+
+def write_user_list(path: Path, client: str, users: List[Dict]):
+    render_table_pdf(path, f"User List - {client}", [{
+        "headers": ["Display Name", "Email", "Sign-in allowed", "Assigned Products"],
+        "rows": [
+            [u["name"], u["email"], "Yes" if u["enabled"] else "No", u["product"]]
+            for u in users
+        ]
+    }])
+
+
+def write_edr(path: Path, client: str, assets: List[Dict], rng: random.Random):
+    rows = []
+    for asset in assets:
+        if rng.random() > EDR_COVERAGE:
+            continue
+        alerts = rng.choices([0, 1, 2, 5], weights=[80, 12, 6, 2])[0]
+        incidents = 1 if alerts and rng.random() < 0.15 else 0
+        rows.append([asset["device_name"], asset["serial"], alerts, incidents])
+
+    render_table_pdf(path, f"EDR Report - {client}", [{
+        "headers": ["Device Name", "Serial Number", "Alerts", "Incidents"],
+        "rows": rows
+    }])
+
+
+def write_backup(path: Path, client: str, assets: List[Dict], rng: random.Random):
+    devices, failures, pending = [], [], []
+
+    for asset in assets:
+        # Cove lists devices as <device>_<username>
+        owner = asset["user"].split("@")[0] if asset["user"] else "svc"
+        name = f"{asset['device_name']}_{owner}"
+        roll = rng.random()
+
+        if roll > BACKUP_COVERAGE + 0.03:
+            continue
+        if roll > BACKUP_COVERAGE:
+            pending.append([name, "Awaiting agent"])
+            continue
+
+        status = rng.choices(
+            ["Completed", "Completed with errors", "In process", "Failed"],
+            weights=[85, 8, 4, 3]
+        )[0]
+        devices.append([name, status, f"{rng.randint(5, 900)} GB"])
+        if status == "Failed":
+            failures.append([name, rng.choice(BACKUP_FAILURES)])
+
+    sections = [{"headers": ["Device", "Total Status", "Selected Size"], "rows": devices}]
+    if failures:
+        sections.append({"headers": ["Device", "Failure Reason"], "rows": failures})
+    if pending:
+        sections.append({"headers": ["Pending Installation", "Note"], "rows": pending})
+
+    render_table_pdf(path, f"Files and Folders Backup Report - {client}", sections)
+
+
+def write_phishing(path: Path, client: str, users: List[Dict], rng: random.Random):
+    rows = []
+    for user in users:
+        sent = rng.randint(1, 4)
+        clicked = sum(1 for _ in range(sent) if rng.random() < 0.06)
+        rows.append([user["email"], sent, clicked, sent - clicked])
+
+    render_table_pdf(path, f"Phishing Report - {client}", [{
+        "headers": ["Email", "Emails Sent", "Clicked", "Reported"],
+        "rows": rows
+    }])
+
+
+def write_darkweb(path: Path, client: str, month: str, users: List[Dict], rng: random.Random):
+    rows = [
+        [
+            user["email"],
+            rng.choice(BREACH_SOURCES),
+            rng.choices(["High", "Medium", "Low"], weights=[2, 3, 5])[0],
+            f"{month}-{rng.randint(1, 28):02d}"
+        ]
+        for user in users
+        if rng.random() < DARKWEB_EXPOSURE
+    ]
+
+    render_table_pdf(path, f"Dark Web Monitoring - {client}", [{
+        "headers": ["Email", "Breach Source", "Severity", "Date Found"],
+        "rows": rows
+    }])
+
+
+# =====================================================
+# Main
+# =====================================================
+
+def synthetic_dir(entities: int) -> Path:
+    return SYNTHETIC_ROOT / f"synthetic-{entities}"
+
+
+def generate_client(
+    out_dir: Path,
+    entities: int,
+    months: List[str],
+    seed: int = 7,
+    client: str = None
+) -> Dict:
+    """
+    Writes <out_dir>/raw/<month>/ for every month and a synthetic.json
+    descriptor. Returns the descriptor.
+    """
+    client = client or f"Synthetic {entities}"
+    population = build_population(entities, months, seed)
+
+    for month_index, month in enumerate(months):
+        raw_dir = Path(out_dir) / "raw" / month
+        raw_dir.mkdir(parents=True, exist_ok=True)
+
+        users = population[month]["users"]
+        assets = population[month]["assets"]
+        rng = random.Random(seed * 1000 + month_index)
+
+        write_asset_list(raw_dir / f"Asset List-{client}.xlsx", client, month, assets)
+        write_user_list(raw_dir / f"User List-{client}.pdf", client, users)
+        write_edr(raw_dir / f"EDR-{client}.pdf", client, assets, rng)
+        write_backup(raw_dir / f"Backup-{client}.pdf", client, assets, rng)
+        write_phishing(raw_dir / f"Phishing-{client}.pdf", client, users, rng)
+        write_darkweb(raw_dir / f"Dark Web-{client}.pdf", client, month, users, rng)
+
+        print(f"✅ {client} {month}: {len(users)} users, {len(assets)} assets")
+
+    descriptor = {
+        "generator_version": GENERATOR_VERSION,
+        "client": client,
+        "entities": entities,
+        "months": months,
+        "seed": seed,
+        "rows_per_page": ROWS_PER_PAGE
+    }
+
+    with open(Path(out_dir) / "synthetic.json", "w", encoding="utf-8") as f:
+        json.dump(descriptor, f, indent=2)
+
+    return descriptor
+
+
+def load_descriptor(out_dir: Path) -> Dict:
+    path = Path(out_dir) / "synthetic.json"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic vendor reports")
+    parser.add_argument(
+        "--entities", type=int, required=True,
+        help=f"Users / assets per month ({MIN_ENTITIES}–{MAX_ENTITIES})"
+    )
+    parser.add_argument("--months", nargs="+", default=["2025-01", "2025-02"], help="Months YYYY-MM")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--client", help="Client name (default: Synthetic <entities>)")
+    parser.add_argument(
+        "--out",
+        help="Output tree (default: data/synthetic/synthetic-<entities>; "
+             "use data/clients/<slug> to run it through the pipeline)"
+    )
+
+    args = parser.parse_args()
+
+    out_dir = Path(args.out) if args.out else synthetic_dir(args.entities)
+    generate_client(out_dir, args.entities, sorted(args.months), args.seed, args.client)
+
+    print(f"📁 Written to: {out_dir}")
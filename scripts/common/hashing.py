@@ -0,0 +1,34 @@
+"""
+Content Hashing
+---------------
+SHA-256 of files, memoized per (path, size, mtime) so a file shared by
+several consumers (stage manifests, extraction caches) is read once per
+process.
+"""
+
+import hashlib
+import os
+from typing import Dict, Optional
+
+
+_HASH_CACHE: Dict[tuple, str] = {}
+
+
+def file_sha256(path: str) -> Optional[str]:
+    """Content hash of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    cache_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if cache_key in _HASH_CACHE:
+        return _HASH_CACHE[cache_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    _HASH_CACHE[cache_key] = digest.hexdigest()
+    return _HASH_CACHE[cache_key]
@@ -0,0 +1,905 @@
+"""
+History Store
+-------------
+Embedded SQLite store of every month's users, assets, enrichment
+observations and diff alerts, per client. Cross-month questions (when was
+this serial first seen, which devices did this user hold) are indexed
+queries instead of a scan of every month's snapshot file.
+
+Usage:
+    with HistoryStore(history_path(data_dir)) as store:
+        store.write_snapshot(client, users_snapshot)
+        store.write_observations(client, edr_overlay)
+        store.write_alerts(client, month, diff["alerts"])
+
+        prev = store.previous_month(client, "2025-11")     # latest month before
+        assets = store.load_entities(client, prev, "assets")
+        enriched = store.load_snapshot(client, "2025-11", "assets", enriched=True)
+        store.asset_history(client, "SN:0F003DS213201J")
+
+Design:
+- WAL journal (readers never block the writer, e.g. parallel pipeline
+  branches), synchronous=NORMAL, one transaction per write
+- A month is replaced as a whole and bulk-loaded with executemany; a
+  write whose content digest matches the stored one is skipped
+- users / assets are an append-only change log, not monthly copies: per
+  month only inserts, field-level updates (top-level fields and keys of
+  nested objects), unsets and retirements (the entity left the month's
+  set) are recorded, plus the entity order when it changed. Unchanged
+  records, e.g. retired assets carried forward, cost nothing; an update
+  most records share (last_seen = the month) is one fill row listing
+  the records it skips
+- Every CHECKPOINT_EVERY months a compacted checkpoint (the full state,
+  one row per entity with the queried fields as indexed columns) is
+  written, so a month is its latest checkpoint plus at most
+  CHECKPOINT_EVERY - 1 months of changes replayed (lossless: load
+  returns exactly the snapshot written)
+- Rewriting a month re-derives the log of the months after it
+- observations: the enrichment overlays (common/overlays.py), one row
+  per entity, field and month; an enriched snapshot is the normalized
+  record with the observations replayed over it in recorded order
+- alerts: the diff engine's alerts, per month
+- Indexed on (client, month) in every table, on asset_id, serial_number,
+  assigned_user and email in the checkpoints, and on entity and
+  (field, value) in the change log
+- previous_month() finds the latest earlier month on record, so a month
+  missing from the chain no longer breaks first_seen / retirement
+- A database written with full monthly copies is converted to the log
+  when opened
+
+Environment:
+- HISTORY_STORE=0               do not read / write the store from the pipelines
+- HISTORY_DB=path               database file (default <data dir>/history.sqlite)
+- HISTORY_CHECKPOINT_EVERY=n    months per compacted checkpoint (default 12)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from common.overlays import SOURCES
+
+
+ENABLED = os.environ.get("HISTORY_STORE", "1") != "0"
+DB_NAME = "history.sqlite"
+BUSY_TIMEOUT_MS = 30_000
+CHECKPOINT_EVERY = max(1, int(os.environ.get("HISTORY_CHECKPOINT_EVERY", 12)))
+
+# 0: full users / assets copies every month; 1: change log + checkpoints
+SCHEMA_VERSION = 1
+
+KINDS = ("users", "assets")
+
+# Fields entity_months() looks up through the change log (partial indexes)
+LOOKUP_FIELDS = ("serial_number", "assigned_user")
+
+# Enrichment source → (snapshot kind, nested object, fields it sets, metadata stamp)
+OBSERVATIONS = SOURCES
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    client TEXT NOT NULL,
+    month TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    entities INTEGER NOT NULL,
+    written_at TEXT NOT NULL,
+    checkpoint INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (client, month, kind)
+);
+
+-- users / assets: compacted checkpoints (full state of a checkpoint month)
+CREATE TABLE IF NOT EXISTS users (
+    client TEXT NOT NULL,
+    month TEXT NOT NULL,
+    email TEXT NOT NULL,
+    name TEXT,
+    status TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (client, month, email)
+);
+
+CREATE TABLE IF NOT EXISTS assets (
+    client TEXT NOT NULL,
+    month TEXT NOT NULL,
+    asset_id TEXT NOT NULL,
+    device_name TEXT,
+    serial_number TEXT,
+    assigned_user TEXT,
+    status TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (client, month, asset_id)
+);
+
+-- op: insert (field NULL starts the record) | update | unset | retire | fill | order
+CREATE TABLE IF NOT EXISTS changes (
+    client TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    month TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    op TEXT NOT NULL,
+    field TEXT,
+    key TEXT,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS observations (
+    client TEXT NOT NULL,
+    month TEXT NOT NULL,
+    source TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    client TEXT NOT NULL,
+    month TEXT NOT NULL,
+    type TEXT,
+    severity TEXT,
+    message TEXT,
+    alert TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS users_client_month ON users (client, month);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+CREATE INDEX IF NOT EXISTS assets_client_month ON assets (client, month);
+CREATE INDEX IF NOT EXISTS assets_asset_id ON assets (asset_id);
+CREATE INDEX IF NOT EXISTS assets_serial_number ON assets (serial_number);
+CREATE INDEX IF NOT EXISTS assets_assigned_user ON assets (assigned_user);
+CREATE INDEX IF NOT EXISTS changes_client_month ON changes (client, kind, month);
+CREATE INDEX IF NOT EXISTS changes_entity_id ON changes (entity_id);
+CREATE INDEX IF NOT EXISTS changes_serial_number ON changes (value) WHERE field = 'serial_number';
+CREATE INDEX IF NOT EXISTS changes_assigned_user ON changes (value) WHERE field = 'assigned_user';
+CREATE INDEX IF NOT EXISTS observations_client_month ON observations (client, month, source);
+CREATE INDEX IF NOT EXISTS observations_entity_id ON observations (entity_id);
+CREATE INDEX IF NOT EXISTS alerts_client_month ON alerts (client, month);
+"""
+
+
+def history_path(data_dir: Path) -> Optional[Path]:
+    """The database the pipelines use for data_dir, or None when disabled."""
+    if not ENABLED:
+        return None
+    return Path(os.environ.get("HISTORY_DB") or Path(data_dir) / DB_NAME)
+
+
+def now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def content_digest(rows: Iterable[Tuple]) -> str:
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update("\x1f".join("" if v is None else str(v) for v in row).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def text(value) -> Optional[str]:
+    """Indexed columns hold text; anything else is only in the record JSON."""
+    return value if isinstance(value, str) else None
+
+
+# =====================================================
+# Row Builders
+# =====================================================
+
+def user_rows(users: Dict) -> List[Tuple]:
+    return [
+        (
+            email,
+            text(user.get("name")),
+            text(user.get("status")),
+            text(user.get("first_seen")),
+            text(user.get("last_seen")),
+            json.dumps(user)
+        )
+        for email, user in users.items()
+    ]
+
+
+def asset_rows(assets: Dict) -> List[Tuple]:
+    return [
+        (
+            asset_id,
+            text(asset.get("device_name")),
+            text(asset.get("serial_number")),
+            text(asset.get("assigned_user")),
+            text(asset.get("status")),
+            text(asset.get("first_seen")),
+            text(asset.get("last_seen")),
+            json.dumps(asset)
+        )
+        for asset_id, asset in assets.items()
+    ]
+
+
+ROW_BUILDERS = {"users": user_rows, "assets": asset_rows}
+
+COLUMNS = {
+    "users": ("email", "name", "status", "first_seen", "last_seen", "record"),
+    "assets": (
+        "asset_id", "device_name", "serial_number", "assigned_user",
+        "status", "first_seen", "last_seen", "record"
+    ),
+}
+
+
+def observation_rows(overlay: Dict) -> List[Tuple]:
+    """(entity_id, field, value JSON) for every field of an enrichment overlay, in overlay order."""
+    return [
+        (entity_id, field, json.dumps(value))
+        for entity_id, fields in overlay["entities"].items()
+        for field, value in fields.items()
+    ]
+
+
+# =====================================================
+# Change Log
+# =====================================================
+
+# A change row: (entity_id, op, field, key, value JSON)
+
+def same(a, b) -> bool:
+    """a and b serialize to the same JSON (type and key order sensitive, unlike ==)."""
+    if type(a) is not type(b):
+        return False
+    if type(a) is dict:
+        return list(a) == list(b) and all(same(a[key], b[key]) for key in a)
+    if type(a) is list:
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def appends_only(old: Dict, new: Dict) -> bool:
+    """Keys new adds to old come after the ones it keeps (what replay produces)."""
+    kept = [key for key in old if key in new]
+    return list(new) == kept + [key for key in new if key not in old]
+
+
+def insert_rows(entity_id: str, record: Dict) -> List[Tuple]:
+    rows = [(entity_id, "insert", None, None, None)]
+    rows += [(entity_id, "insert", field, None, json.dumps(value)) for field, value in record.items()]
+    return rows
+
+
+def record_changes(entity_id: str, old: Dict, new: Dict) -> Optional[List[Tuple]]:
+    """
+    Field-level changes old → new (keys of nested objects included), or
+    None when replaying them would not reproduce new's key order.
+    """
+    if not appends_only(old, new):
+        return None
+
+    rows = [(entity_id, "unset", field, None, None) for field in old if field not in new]
+
+    for field, value in new.items():
+        if field not in old:
+            rows.append((entity_id, "update", field, None, json.dumps(value)))
+            continue
+
+        before = old[field]
+        if same(before, value):
+            continue
+
+        if type(before) is dict and type(value) is dict and appends_only(before, value):
+            rows += [(entity_id, "unset", field, key, None) for key in before if key not in value]
+            rows += [
+                (entity_id, "update", field, key, json.dumps(child))
+                for key, child in value.items()
+                if key not in before or not same(before[key], child)
+            ]
+        else:
+            rows.append((entity_id, "update", field, None, json.dumps(value)))
+
+    return rows
+
+
+def apply_change(state: Dict, entity_id: str, op: str, field, key, value) -> Dict:
+    """Applies one change row to {id: record}; returns the state (order rebuilds it)."""
+    if op == "insert":
+        if field is None:
+            state[entity_id] = {}
+        else:
+            state[entity_id][field] = json.loads(value)
+    elif op == "update":
+        if key is None:
+            state[entity_id][field] = json.loads(value)
+        else:
+            state[entity_id][field][key] = json.loads(value)
+    elif op == "unset":
+        if key is None:
+            del state[entity_id][field]
+        else:
+            del state[entity_id][field][key]
+    elif op == "retire":
+        state.pop(entity_id, None)
+    elif op == "fill":
+        value, exceptions = json.loads(value)
+        skip = set(exceptions)
+        for other, record in state.items():
+            if other not in skip:
+                record[field] = value
+    elif op == "order":
+        state = {entity_id: state[entity_id] for entity_id in json.loads(value)}
+    else:
+        raise ValueError(f"Unknown change: {op}")
+
+    return state
+
+
+def replay(state: Dict, rows: Iterable[Tuple]) -> Dict:
+    loads = json.loads
+    for entity_id, op, field, key, value in rows:
+        # Fast path: the bulk of a month is top-level updates (last_seen)
+        if op == "update" and key is None:
+            state[entity_id][field] = loads(value)
+        else:
+            state = apply_change(state, entity_id, op, field, key, value)
+    return state
+
+
+def fill_rows(rows: List[Tuple], old: Dict, new: Dict) -> List[Tuple]:
+    """
+    Folds a top-level update most entities share (e.g. last_seen = this
+    month) into one fill row listing the entities it does not apply to.
+    Only scalar values of fields the record already had, and never the
+    LOOKUP_FIELDS, so replay order and the indexed lookups are unchanged.
+    """
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for i, (entity_id, op, field, key, value) in enumerate(rows):
+        if op == "update" and key is None and field not in LOOKUP_FIELDS and field in old[entity_id]:
+            groups.setdefault((field, value), []).append(i)
+
+    folded, fills = set(), []
+    for (field, value), picked in sorted(groups.items(), key=lambda item: -len(item[1])):
+        decoded = json.loads(value)
+        if isinstance(decoded, (dict, list)):
+            continue
+        exceptions = [
+            entity_id for entity_id, record in new.items()
+            if field not in record or not same(record[field], decoded)
+        ]
+        if len(picked) <= len(exceptions):
+            break
+        folded.update(picked)
+        fills.append(("", "fill", field, None, json.dumps([decoded, exceptions])))
+
+    if not fills:
+        return rows
+    return [row for i, row in enumerate(rows) if i not in folded] + fills
+
+
+def change_rows(old: Dict, new: Dict) -> List[Tuple]:
+    """
+    The change log rows that turn state old into new ({id: record}).
+    A record whose changes would not replay to the same JSON (e.g. a new
+    field in the middle) is re-inserted instead.
+    """
+    rows = [(entity_id, "retire", None, None, None) for entity_id in old if entity_id not in new]
+
+    for entity_id, record in new.items():
+        before = old.get(entity_id)
+        if before is None:
+            rows += insert_rows(entity_id, record)
+        elif not same(before, record):
+            changes = record_changes(entity_id, before, record)
+            rows += insert_rows(entity_id, record) if changes is None else changes
+
+    rows = fill_rows(rows, old, new)
+
+    # Replay keeps surviving entities in place and appends new ones
+    if not appends_only(old, new):
+        rows.append(("", "order", None, None, json.dumps(list(new))))
+
+    return rows
+
+
+# =====================================================
+# Store
+# =====================================================
+
+class HistoryStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.db = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION and self.has_table("snapshots"):
+            self.convert_full_copies()
+        else:
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def has_table(self, name: str) -> bool:
+        return self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------
+    # Writes
+    # -------------------------
+
+    def stored_digest(self, client: str, month: str, kind: str) -> Optional[str]:
+        row = self.db.execute(
+            "SELECT digest FROM snapshots WHERE client = ? AND month = ? AND kind = ?",
+            (client, month, kind)
+        ).fetchone()
+        return row[0] if row else None
+
+    def replace_month(
+        self,
+        client: str,
+        month: str,
+        kind: str,
+        metadata: Dict,
+        table: str,
+        columns: Tuple[str, ...],
+        rows: List[Tuple],
+        scope: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """
+        Replaces one month of a table (bulk insert; scope narrows it, e.g.
+        to one observation source) and records it in snapshots.
+        Returns False when the stored month is identical.
+        """
+        digest = content_digest([(json.dumps(metadata, sort_keys=True),), *rows])
+        if self.stored_digest(client, month, kind) == digest:
+            return False
+
+        scope = scope or {}
+        keys = ("client", "month", *scope)
+        prefix = (client, month, *scope.values())
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute(
+                f"DELETE FROM {table} WHERE " + " AND ".join(f"{key} = ?" for key in keys),
+                prefix
+            )
+            self.db.executemany(
+                f"INSERT INTO {table} ({', '.join(keys + columns)}) "
+                f"VALUES ({', '.join('?' * (len(keys) + len(columns)))})",
+                (prefix + row for row in rows)
+            )
+            self.record_month(client, month, kind, metadata, digest, len(rows))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+        return True
+
+    def record_month(self, client: str, month: str, kind: str, metadata: Dict, digest: str, entities: int):
+        self.db.execute(
+            "INSERT OR REPLACE INTO snapshots "
+            "(client, month, kind, metadata, digest, entities, written_at, checkpoint) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+            (client, month, kind, json.dumps(metadata), digest, entities, now())
+        )
+
+    def write_snapshot(self, client: str, snapshot: Dict) -> bool:
+        """
+        A normalized users / assets snapshot; the month comes from its
+        metadata. Only the changes against the month before are logged.
+        """
+        kind = next(k for k in KINDS if k in snapshot)
+        metadata = snapshot.get("metadata", {})
+        month = metadata["month"]
+        entities = snapshot[kind]
+
+        digest = content_digest([
+            (json.dumps(metadata, sort_keys=True),),
+            *((entity_id, json.dumps(record)) for entity_id, record in entities.items())
+        ])
+        if self.stored_digest(client, month, kind) == digest:
+            return False
+
+        earlier = [m for m in self.months(client, kind) if m < month]
+        later = [(m, self.load_entities(client, m, kind)) for m in self.months(client, kind) if m > month]
+        state = self.load_entities(client, earlier[-1], kind) if earlier else {}
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.truncate_log(client, kind, month)
+            self.record_month(client, month, kind, metadata, digest, len(entities))
+
+            since = self.months_since_checkpoint(client, kind, month)
+            since = self.append_month(client, kind, month, state, entities, since)
+
+            # Later months were logged against the old version of this month
+            for later_month, later_entities in later:
+                since = self.append_month(client, kind, later_month, entities, later_entities, since)
+                entities = later_entities
+
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+        return True
+
+    def truncate_log(self, client: str, kind: str, month: str):
+        """Drops the changes and checkpoints of month and every month after it."""
+        self.db.execute(
+            "DELETE FROM changes WHERE client = ? AND kind = ? AND month >= ?", (client, kind, month)
+        )
+        self.db.execute(f"DELETE FROM {kind} WHERE client = ? AND month >= ?", (client, month))
+        self.db.execute(
+            "UPDATE snapshots SET checkpoint = 0 WHERE client = ? AND kind = ? AND month >= ?",
+            (client, kind, month)
+        )
+
+    def months_since_checkpoint(self, client: str, kind: str, month: str) -> Optional[int]:
+        """Months on record between the latest checkpoint before month and month (None: no checkpoint)."""
+        checkpoint = self.checkpoint_month(client, kind, month, before=True)
+        if checkpoint is None:
+            return None
+        return self.db.execute(
+            "SELECT COUNT(*) FROM snapshots WHERE client = ? AND kind = ? AND month > ? AND month < ?",
+            (client, kind, checkpoint, month)
+        ).fetchone()[0]
+
+    def append_month(
+        self,
+        client: str,
+        kind: str,
+        month: str,
+        state: Dict,
+        entities: Dict,
+        since: Optional[int]
+    ) -> int:
+        """
+        Logs the changes state → entities for month or, when one is due,
+        a checkpoint (the full state) instead. Returns the months logged
+        since the latest checkpoint.
+        """
+        if since is not None and since + 1 < CHECKPOINT_EVERY:
+            self.db.executemany(
+                "INSERT INTO changes (client, kind, month, entity_id, op, field, key, value) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((client, kind, month, *row) for row in change_rows(state, entities))
+            )
+            return since + 1
+
+        columns = ("client", "month") + COLUMNS[kind]
+        self.db.executemany(
+            f"INSERT INTO {kind} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            ((client, month, *row) for row in ROW_BUILDERS[kind](entities))
+        )
+        self.db.execute(
+            "UPDATE snapshots SET checkpoint = 1 WHERE client = ? AND month = ? AND kind = ?",
+            (client, month, kind)
+        )
+        return 0
+
+    def convert_full_copies(self):
+        """
+        Converts a database written with full users / assets copies every
+        month (schema version 0) to the change log, month by month.
+        """
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for kind in KINDS:
+                self.db.execute(f"ALTER TABLE {kind} RENAME TO full_{kind}")
+            for (name,) in self.db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name IN ('full_users', 'full_assets')"
+            ).fetchall():
+                if not name.startswith("sqlite_autoindex"):
+                    self.db.execute(f"DROP INDEX {name}")
+            self.db.execute("ALTER TABLE snapshots ADD COLUMN checkpoint INTEGER NOT NULL DEFAULT 0")
+
+            # executescript would commit the open transaction
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.db.execute(statement)
+
+            for kind in KINDS:
+                id_column = COLUMNS[kind][0]
+                months = self.db.execute(
+                    "SELECT client, month FROM snapshots WHERE kind = ? ORDER BY client, month", (kind,)
+                ).fetchall()
+
+                state, since, current = {}, None, None
+                for client, month in months:
+                    if client != current:
+                        state, since, current = {}, None, client
+                    entities = {
+                        entity_id: json.loads(record)
+                        for entity_id, record in self.db.execute(
+                            f"SELECT {id_column}, record FROM full_{kind} "
+                            "WHERE client = ? AND month = ? ORDER BY rowid",
+                            (client, month)
+                        )
+                    }
+                    since = self.append_month(client, kind, month, state, entities, since)
+                    state = entities
+
+                self.db.execute(f"DROP TABLE full_{kind}")
+
+            self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def write_observations(self, client: str, overlay: Dict) -> bool:
+        """The fields of an enrichment overlay (common/overlays.py)."""
+        source, month = overlay["metadata"]["source"], overlay["metadata"]["month"]
+        stamp = OBSERVATIONS[source][3]
+        metadata = {stamp: overlay["metadata"].get(stamp)}
+
+        return self.replace_month(
+            client, month, source, metadata,
+            table="observations",
+            columns=("entity_id", "field", "value"),
+            rows=observation_rows(overlay),
+            scope={"source": source}
+        )
+
+    def write_alerts(self, client: str, month: str, alerts: List[Dict]) -> bool:
+        rows = [
+            (text(a.get("type")), text(a.get("severity")), text(a.get("message")), json.dumps(a))
+            for a in alerts
+        ]
+        return self.replace_month(
+            client, month, "alerts", {},
+            table="alerts",
+            columns=("type", "severity", "message", "alert"),
+            rows=rows
+        )
+
+    # -------------------------
+    # Reads
+    # -------------------------
+
+    def months(self, client: str, kind: str = "assets") -> List[str]:
+        return [
+            month for (month,) in self.db.execute(
+                "SELECT month FROM snapshots WHERE client = ? AND kind = ? ORDER BY month",
+                (client, kind)
+            )
+        ]
+
+    def previous_month(self, client: str, month: str) -> Optional[str]:
+        """Latest month before month with both a user and an asset snapshot."""
+        row = self.db.execute(
+            "SELECT MAX(u.month) FROM snapshots u JOIN snapshots a "
+            "ON a.client = u.client AND a.month = u.month AND a.kind = 'assets' "
+            "WHERE u.client = ? AND u.kind = 'users' AND u.month < ?",
+            (client, month)
+        ).fetchone()
+        return row[0]
+
+    def revision(self, client: str, month: str) -> str:
+        """Changes whenever the month's users or assets are rewritten."""
+        return ":".join(self.stored_digest(client, month, kind) or "" for kind in KINDS)
+
+    def checkpoint_month(self, client: str, kind: str, month: str, before: bool = False) -> Optional[str]:
+        """Latest checkpoint at (or strictly before) month."""
+        return self.db.execute(
+            "SELECT MAX(month) FROM snapshots WHERE client = ? AND kind = ? AND checkpoint = 1 "
+            f"AND month {'<' if before else '<='} ?",
+            (client, kind, month)
+        ).fetchone()[0]
+
+    def load_entities(self, client: str, month: str, kind: str) -> Dict:
+        """
+        {id: record} of a month ({} when the month is not on record):
+        its latest checkpoint with the changes since replayed over it.
+        """
+        if self.stored_digest(client, month, kind) is None:
+            return {}
+
+        id_column = COLUMNS[kind][0]
+        checkpoint = self.checkpoint_month(client, kind, month)
+
+        state = {
+            entity_id: json.loads(record)
+            for entity_id, record in self.db.execute(
+                f"SELECT {id_column}, record FROM {kind} WHERE client = ? AND month = ? ORDER BY rowid",
+                (client, checkpoint)
+            )
+        }
+
+        return replay(state, self.db.execute(
+            "SELECT entity_id, op, field, key, value FROM changes "
+            "WHERE client = ? AND kind = ? AND month > ? AND month <= ? ORDER BY month, rowid",
+            (client, kind, checkpoint, month)
+        ))
+
+    def load_snapshot(self, client: str, month: str, kind: str, enriched: bool = False) -> Dict:
+        row = self.db.execute(
+            "SELECT metadata FROM snapshots WHERE client = ? AND month = ? AND kind = ?",
+            (client, month, kind)
+        ).fetchone()
+        if row is None:
+            raise LookupError(f"No {kind} snapshot for {client} {month} in {self.path}")
+
+        metadata = json.loads(row[0])
+        entities = self.load_entities(client, month, kind)
+
+        if enriched:
+            for source, (source_kind, section, _, _) in OBSERVATIONS.items():
+                if source_kind == kind:
+                    self.apply_observations(client, month, source, section, entities, metadata)
+
+        return {"metadata": metadata, kind: entities}
+
+    def apply_observations(
+        self,
+        client: str,
+        month: str,
+        source: str,
+        section: str,
+        entities: Dict,
+        metadata: Dict
+    ):
+        row = self.db.execute(
+            "SELECT metadata FROM snapshots WHERE client = ? AND month = ? AND kind = ?",
+            (client, month, source)
+        ).fetchone()
+        if row is None:
+            return
+
+        metadata.update(json.loads(row[0]))
+
+        for entity_id, field, value in self.db.execute(
+            "SELECT entity_id, field, value FROM observations "
+            "WHERE client = ? AND month = ? AND source = ? ORDER BY rowid",
+            (client, month, source)
+        ):
+            record = entities.get(entity_id)
+            if record is not None:
+                record.setdefault(section, {})[field] = json.loads(value)
+
+    def alerts(self, client: str, month: Optional[str] = None, alert_type: Optional[str] = None) -> List[Dict]:
+        query = "SELECT month, alert FROM alerts WHERE client = ?"
+        args: List = [client]
+        if month:
+            query += " AND month = ?"
+            args.append(month)
+        if alert_type:
+            query += " AND type = ?"
+            args.append(alert_type)
+
+        return [
+            {"month": m, **json.loads(alert)}
+            for m, alert in self.db.execute(query + " ORDER BY month, rowid", args)
+        ]
+
+    # -------------------------
+    # Entity History
+    # -------------------------
+
+    def entity_timeline(self, kind: str, client: str, entity_id: str) -> List[Dict]:
+        """The entity in every month on record it is part of, by replaying only its own rows."""
+        id_column = COLUMNS[kind][0]
+
+        checkpoints = dict(self.db.execute(
+            f"SELECT month, record FROM {kind} WHERE client = ? AND {id_column} = ?",
+            (client, entity_id)
+        ))
+        changes: Dict[str, List[Tuple]] = {}
+        for month, *row in self.db.execute(
+            "SELECT month, entity_id, op, field, key, value FROM changes "
+            "WHERE entity_id IN (?, '') AND client = ? AND kind = ? AND op != 'order' "
+            "ORDER BY month, rowid",
+            (entity_id, client, kind)
+        ):
+            changes.setdefault(month, []).append(row)
+
+        timeline, state = [], {}
+        for month, checkpoint in self.db.execute(
+            "SELECT month, checkpoint FROM snapshots WHERE client = ? AND kind = ? ORDER BY month",
+            (client, kind)
+        ).fetchall():
+            if checkpoint:
+                state = {entity_id: json.loads(checkpoints[month])} if month in checkpoints else {}
+            else:
+                state = replay(state, changes.get(month, []))
+
+            if entity_id in state:
+                timeline.append({
+                    "client": client,
+                    "month": month,
+                    "id": entity_id,
+                    "record": json.loads(json.dumps(state[entity_id]))
+                })
+
+        return timeline
+
+    def entity_months(self, kind: str, column: str, value: str, client: Optional[str]) -> List[Dict]:
+        """Every month an entity had value in column (checkpoints and logged values)."""
+        id_column = COLUMNS[kind][0]
+        scope = " AND client = ?" if client else ""
+        args = [client] if client else []
+
+        candidates = set(self.db.execute(
+            f"SELECT DISTINCT client, {id_column} FROM {kind} WHERE {column} = ?{scope}",
+            [value, *args]
+        ))
+        # field as a literal so the partial index on it applies
+        candidates |= set(self.db.execute(
+            "SELECT DISTINCT client, entity_id FROM changes "
+            f"WHERE field = '{column}' AND value = ? AND key IS NULL AND kind = ?{scope}",
+            [json.dumps(value), kind, *args]
+        ))
+
+        found = [
+            entry
+            for candidate_client, entity_id in candidates
+            for entry in self.entity_timeline(kind, candidate_client, entity_id)
+            if entry["record"].get(column) == value
+        ]
+        return sorted(found, key=lambda entry: (entry["client"], entry["month"], entry["id"]))
+
+    def asset_history(self, client: str, asset_id: str) -> List[Dict]:
+        return self.entity_timeline("assets", client, asset_id)
+
+    def user_history(self, client: str, email: str) -> List[Dict]:
+        return self.entity_timeline("users", client, email)
+
+    def assets_by_serial(self, serial_number: str, client: Optional[str] = None) -> List[Dict]:
+        return self.entity_months("assets", "serial_number", serial_number, client)
+
+    def assets_of_user(self, email: str, client: Optional[str] = None) -> List[Dict]:
+        return self.entity_months("assets", "assigned_user", email, client)
+
+
+# =====================================================
+# One-shot Helpers (CLIs)
+# =====================================================
+
+def load_previous_entities(history: str, client: str, month: str, kind: str) -> Tuple[Optional[str], Dict]:
+    """(latest month on record before month, its entities); (None, {}) when there is none."""
+    with HistoryStore(history) as store:
+        prev_month = store.previous_month(client, month)
+        if prev_month is None:
+            return None, {}
+        return prev_month, store.load_entities(client, prev_month, kind)
+
+
+def load_month(history: str, client: str, month: str, kind: str, enriched: bool = True) -> Dict:
+    with HistoryStore(history) as store:
+        return store.load_snapshot(client, month, kind, enriched=enriched)
+
+
+def record_snapshot(history: str, client: str, snapshot: Dict) -> bool:
+    with HistoryStore(history) as store:
+        return store.write_snapshot(client, snapshot)
+
+
+def record_alerts(history: str, client: str, month: str, alerts: List[Dict]) -> bool:
+    with HistoryStore(history) as store:
+        return store.write_alerts(client, month, alerts)
+
+
+def record_enrichment(history: str, client: str, overlay: Dict) -> bool:
+    with HistoryStore(history) as store:
+        return store.write_observations(client, overlay)
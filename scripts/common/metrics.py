@@ -0,0 +1,173 @@
+"""
+Run Metrics
+-----------
+Lightweight per-step instrumentation: wall time, CPU time, peak RSS,
+pages processed and rows produced.
+
+Usage:
+- with track("build_device_index") as m: ... ; m["rows"] = n
+- @timed  (records len(result) as rows when the result is sized)
+- count(pages=n)  adds to every open step (so stage totals include inner steps)
+- merge(records)  adopts records drained in worker processes
+
+Peak RSS is per step on Linux (VmHWM is reset via /proc/self/clear_refs
+when a step starts); elsewhere it falls back to the process-lifetime peak.
+"""
+
+import functools
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_STACK: List[Dict[str, Any]] = []
+_RECORDS: List[Dict[str, Any]] = []
+
+
+# =====================================================
+# Memory
+# =====================================================
+
+def _read_hwm_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _reset_hwm() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _mb(kb: Optional[int]) -> Optional[float]:
+    return round(kb / 1024, 1) if kb is not None else None
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size right now (Linux only)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return _mb(int(line.split()[1]))
+    except OSError:
+        pass
+    return None
+
+
+# =====================================================
+# Recording
+# =====================================================
+
+@contextmanager
+def track(step: str, kind: str = "step", **fields):
+    """
+    Measures the enclosed block and appends a record on exit.
+    Yields a dict; set "rows" / "pages" (or any extra field) on it.
+    """
+    if _STACK:
+        parent = _STACK[-1]
+        parent["_peak_kb"] = max(parent["_peak_kb"] or 0, _read_hwm_kb() or 0)
+
+    scoped = _reset_hwm()
+
+    frame = {
+        "step": step,
+        "kind": kind,
+        "parent": _STACK[-1]["step"] if _STACK else None,
+        "pages": 0,
+        "rows": None,
+        **fields,
+        "_peak_kb": None,
+        "_wall": time.perf_counter(),
+        "_cpu": time.process_time(),
+    }
+    _STACK.append(frame)
+
+    status = "ok"
+    try:
+        yield frame
+    except BaseException:
+        status = "failed"
+        raise
+    finally:
+        _STACK.pop()
+
+        wall = time.perf_counter() - frame.pop("_wall")
+        cpu = time.process_time() - frame.pop("_cpu")
+        peak_kb = max(frame.pop("_peak_kb") or 0, _read_hwm_kb() or 0) or None
+
+        frame.setdefault("status", status)
+        frame.update({
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "peak_rss_mb": _mb(peak_kb),
+            "peak_rss_scope": "step" if scoped else "process",
+        })
+        _RECORDS.append(frame)
+
+
+def timed(func=None, *, name: str = None):
+    """Decorator form of track(); sized results are recorded as rows."""
+    def decorate(fn):
+        step = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track(step) as m:
+                result = fn(*args, **kwargs)
+                if m["rows"] is None and hasattr(result, "__len__"):
+                    m["rows"] = len(result)
+                return result
+
+        return wrapper
+
+    return decorate(func) if func else decorate
+
+
+def count(**counters: int):
+    """Adds counters (e.g. pages=1) to every open step."""
+    for frame in _STACK:
+        for key, value in counters.items():
+            frame[key] = (frame.get(key) or 0) + value
+
+
+def drain() -> List[Dict[str, Any]]:
+    """Returns and clears the records collected in this process."""
+    records = list(_RECORDS)
+    _RECORDS.clear()
+    return records
+
+
+def merge(records: List[Dict[str, Any]], counters=("pages",)):
+    """
+    Adopts records drained in a worker process: top-level worker steps are
+    re-parented under the open step, and their counters are added to it.
+    """
+    parent = _STACK[-1]["step"] if _STACK else None
+
+    for record in records:
+        if record.get("parent") is None:
+            record["parent"] = parent
+            count(**{key: record.get(key) or 0 for key in counters})
+        _RECORDS.append(record)
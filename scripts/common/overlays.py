@@ -0,0 +1,271 @@
+"""
+Enrichment Overlays
+-------------------
+What an enricher adds to a snapshot, kept apart from the snapshot: a
+keyed overlay (entity id → the fields the enricher sets in its nested
+object), instead of a full enriched copy of the snapshot per stage.
+
+Usage:
+    overlay = make_overlay("backup", assets, {asset_id: {"enabled": True, ...}})
+    save_overlay(overlay, "data/enriched/2025-11-assets-backup.parquet")
+
+    view = enriched_view(assets, edr_overlay, backup_overlay)   # lazy merge
+    view["assets"][asset_id]["backup_state"]["status"]
+    snapshot = materialize(view)                                # plain dicts
+
+Design:
+- An overlay is {"metadata": {source, month, <source>_enriched_at},
+  "entities": {id: {field: value}}}; SOURCES maps a source to the
+  snapshot kind, nested object and fields it sets
+- Every enricher reads only normalized fields (serial number, device
+  name, email), so overlays are built from the normalized snapshot and
+  do not depend on each other
+- enriched_view() merges on access: a record is copied and the overlays
+  applied (SOURCES order) the first time it is read, then cached;
+  records no overlay touches are the base records themselves. The base
+  snapshot is never modified; views are read-only
+- apply_overlay() merges in place, for callers that want the enriched
+  snapshot itself (CLIs, benchmarks)
+- Stored like snapshots (common/snapshot_store.py): one Parquet file per
+  overlay, a typed column per field, values the column cannot hold (None,
+  another type) in the per-row `extra` JSON column; key order follows the
+  schema. JSON without pyarrow
+"""
+
+import json
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+from common import serialization, snapshot_store
+from common.snapshot_store import EXTRA, RECORD_FIELDS, fits
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+METADATA_KEY = b"overlay"
+ID_COLUMN = "entity_id"
+
+# Enrichment source → (snapshot kind, nested object, fields it sets, metadata stamp).
+# Declaration order is the order overlays are applied in.
+SOURCES: Dict[str, Tuple[str, str, Tuple[str, ...], str]] = {
+    "edr": (
+        "assets", "security_state",
+        ("edr_installed", "edr_alerts", "edr_incidents", "risk_level"),
+        "edr_enriched_at"
+    ),
+    "backup": (
+        "assets", "backup_state",
+        ("enabled", "status", "risk_level"),
+        "backup_enriched_at"
+    ),
+    "phishing": (
+        "users", "risk_signals",
+        ("phishing_clicked", "phishing_failures", "phishing_campaigns", "phishing_risk"),
+        "phishing_enriched_at"
+    ),
+    "darkweb": (
+        "users", "risk_signals",
+        ("dark_web_exposed", "dark_web_source", "dark_web_severity"),
+        "darkweb_enriched_at"
+    ),
+}
+
+
+# =====================================================
+# Build / Apply
+# =====================================================
+
+def make_overlay(source: str, snapshot: Dict, entities: Dict[str, Dict]) -> Dict:
+    """The overlay of source on snapshot, stamped with the enrichment time."""
+    stamp = SOURCES[source][3]
+    return {
+        "metadata": {
+            "source": source,
+            "month": snapshot.get("metadata", {}).get("month"),
+            stamp: datetime.utcnow().isoformat() + "Z"
+        },
+        "entities": entities
+    }
+
+
+def overlay_stamp(overlay: Dict) -> Dict:
+    """{<source>_enriched_at: timestamp}, as merged into the snapshot metadata."""
+    stamp = SOURCES[overlay["metadata"]["source"]][3]
+    return {stamp: overlay["metadata"].get(stamp)}
+
+
+def apply_overlay(snapshot: Dict, overlay: Dict) -> Dict:
+    """Merges overlay into snapshot in place and returns it."""
+    kind, section, _, _ = SOURCES[overlay["metadata"]["source"]]
+    entities = snapshot[kind]
+
+    for entity_id, fields in overlay["entities"].items():
+        record = entities.get(entity_id)
+        if record is not None:
+            record.setdefault(section, {}).update(fields)
+
+    snapshot.setdefault("metadata", {}).update(overlay_stamp(overlay))
+    return snapshot
+
+
+# =====================================================
+# Lazy Merged View
+# =====================================================
+
+class EnrichedEntities(Mapping):
+    """{id: record} of a snapshot with overlays merged on first access."""
+
+    def __init__(self, entities: Dict, layers: Tuple[Tuple[str, Dict], ...]):
+        self.entities = entities
+        self.layers = layers            # (nested object, {id: fields}) in SOURCES order
+        self.merged: Dict[str, Dict] = {}
+
+    def __getitem__(self, entity_id: str) -> Dict:
+        record = self.merged.get(entity_id)
+        if record is None:
+            record = self.merged[entity_id] = self.merge(entity_id, self.entities[entity_id])
+        return record
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entities)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __contains__(self, entity_id: Any) -> bool:
+        return entity_id in self.entities
+
+    def merge(self, entity_id: str, record: Dict) -> Dict:
+        merged = None
+        for section, entries in self.layers:
+            fields = entries.get(entity_id)
+            if fields is None:
+                continue
+            if merged is None:
+                merged = dict(record)
+            merged[section] = {**merged.get(section, {}), **fields}
+        return record if merged is None else merged
+
+
+def enriched_view(snapshot: Dict, *overlays: Dict) -> Dict:
+    """
+    {"metadata", kind} of snapshot with overlays merged lazily. Overlays
+    of the other kind are ignored, so one list serves users and assets.
+    """
+    kind = snapshot_store.snapshot_kind(snapshot)
+    metadata = dict(snapshot.get("metadata", {}))
+    layers = []
+
+    applicable = [overlay for overlay in overlays if SOURCES[overlay["metadata"]["source"]][0] == kind]
+    for overlay in sorted(applicable, key=lambda o: list(SOURCES).index(o["metadata"]["source"])):
+        layers.append((SOURCES[overlay["metadata"]["source"]][1], overlay["entities"]))
+        metadata.update(overlay_stamp(overlay))
+
+    return {"metadata": metadata, kind: EnrichedEntities(snapshot[kind], tuple(layers))}
+
+
+def materialize(view: Dict) -> Dict:
+    """A view as a plain snapshot (e.g. to save it)."""
+    kind = snapshot_store.snapshot_kind(view)
+    return {"metadata": dict(view["metadata"]), kind: dict(view[kind].items())}
+
+
+# =====================================================
+# Records ↔ Columns
+# =====================================================
+
+def typed_fields(source: str) -> Dict[str, str]:
+    """Field → type name of the fields source sets, in schema order."""
+    kind, section, fields, _ = SOURCES[source]
+    spec = RECORD_FIELDS[kind][section]
+    return {name: spec[name] for name in spec if name in fields}
+
+
+def to_table(overlay: Dict) -> "pa.Table":
+    typed = typed_fields(overlay["metadata"]["source"])
+    columns = {name: [] for name in typed}
+    ids, extras = [], []
+
+    for entity_id, fields in overlay["entities"].items():
+        extra = {}
+        for name, type_name in typed.items():
+            value = fields.get(name)
+            if value is not None and fits(value, type_name):
+                columns[name].append(value)
+            else:
+                columns[name].append(None)
+                if name in fields:
+                    extra[name] = value
+        for name, value in fields.items():
+            if name not in typed:
+                extra[name] = value
+
+        ids.append(entity_id)
+        extras.append(json.dumps(extra) if extra else None)
+
+    arrays = [pa.array(ids, type=pa.string())]
+    arrays += [pa.array(columns[name], type=snapshot_store.arrow_type(typed[name])) for name in typed]
+    arrays.append(pa.array(extras, type=pa.string()))
+
+    schema = pa.schema(
+        [(ID_COLUMN, pa.string())]
+        + [(name, snapshot_store.arrow_type(type_name)) for name, type_name in typed.items()]
+        + [(EXTRA, pa.string())]
+    )
+    metadata = {METADATA_KEY: json.dumps(overlay["metadata"]).encode()}
+    return pa.Table.from_arrays(arrays, schema=schema.with_metadata(metadata))
+
+
+def from_table(table: "pa.Table") -> Dict:
+    metadata = json.loads(table.schema.metadata[METADATA_KEY])
+    typed = list(typed_fields(metadata["source"]))
+
+    ids = table.column(ID_COLUMN).to_pylist()
+    values = [table.column(name).to_pylist() for name in typed]
+    extras = table.column(EXTRA).to_pylist()
+
+    entities = {}
+    for entity_id, extra, *row in zip(ids, extras, *values):
+        fields = {name: value for name, value in zip(typed, row) if value is not None}
+        if extra:
+            fields.update(json.loads(extra))
+        entities[entity_id] = fields
+
+    return {"metadata": metadata, "entities": entities}
+
+
+# =====================================================
+# Load / Save
+# =====================================================
+
+def save_overlay(overlay: Dict, path: str) -> Path:
+    """Writes the overlay (atomically) and returns the file written."""
+    target = snapshot_store.snapshot_path(path)
+
+    if pq is None:
+        snapshot_store.write_json_view(overlay, target, pretty=None)
+        return target
+
+    snapshot_store.write_parquet(to_table(overlay), target)
+
+    if snapshot_store.JSON_VIEW:
+        snapshot_store.write_json_view(overlay, target)
+
+    return target
+
+
+def load_overlay(path: str) -> Dict:
+    found = snapshot_store.existing_snapshot(path)
+    if found is None:
+        raise FileNotFoundError(f"Overlay not found: {snapshot_store.snapshot_path(path)}")
+
+    if found.suffix == ".json":
+        return serialization.load_json(found)
+
+    return from_table(pq.read_table(found))
@@ -0,0 +1,412 @@
+"""
+PDF Table Extraction (cached, streaming)
+----------------------------------------
+Single entry point for every parser that reads tables out of vendor PDFs.
+
+Design:
+- Each PDF is opened and table-extracted once; the per-page tables are
+  stored in a persistent cache keyed by the file's content hash, the
+  table settings, the pdfplumber version and the layout template in use
+- Pages are streamed: a page's parsed layout (chars, lines, rects) is
+  released as soon as its tables are extracted, and tables are handed
+  to the parser one page at a time, so memory stays flat regardless of
+  document length
+- Cache entries are gzip-compressed JSON lines (one line per page, rows
+  of str | None), written atomically so parallel workers can share the
+  cache directory and read back page by page
+- Tables on a page are stored largest first, so tables[0] is exactly what
+  page.extract_table() returns
+- Large documents are split into page ranges extracted on a process pool;
+  each worker opens its own pdfplumber handle and shards are merged back
+  in page order, so parsers see the same result as a sequential pass
+- Pages on which detection provably finds no table (fewer than two
+  ruling edges either way: cover pages, narrative text) skip table
+  detection; the output is the same with or without the pre-filter.
+  Only find_tables() is saved (the page is parsed either way), so the
+  gain is small: see benchmarks/pdf_prefilter.py. pages_skipped /
+  pages_extracted are counted on the open metrics steps
+- When the caller names the report family, tables that are a regular
+  grid of a shape in the family's layout template are read off the grid
+  instead of pdfplumber's per-row char scan, with the same rows
+  (common/pdf_templates.py); pages_templated counts those pages
+
+Environment:
+- PDF_TABLE_CACHE=0        disable the cache
+- PDF_TABLE_CACHE_DIR=...  cache location (default data/cache/pdf_tables)
+- PDF_EXTRACT_WORKERS=n    page-extraction processes (default: CPU count, max 8;
+                           1 disables sharding)
+- PDF_PREFILTER=0          run table detection on every page
+- PDF_TEMPLATES=0          ignore layout templates (full detection everywhere)
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pdfplumber
+from pdfplumber.table import TableSettings
+
+from common import serialization
+from common.hashing import file_sha256
+from common.metrics import count
+from common.pdf_templates import (
+    grid_table,
+    learn_shape,
+    load_template,
+    match_grid,
+    merge_shapes,
+    save_template,
+    template_fingerprint,
+    templates_enabled
+)
+
+
+# Bump when the stored shape or extraction logic changes
+EXTRACTOR_VERSION = 4
+
+# Documents shorter than this are extracted in-process (pool start-up dominates)
+PARALLEL_MIN_PAGES = 40
+MAX_EXTRACT_WORKERS = 8
+SHARDS_PER_WORKER = 4
+
+# Ruling-based strategies need at least this many edges each way to form a cell
+MIN_EDGES = 2
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+CACHE_DIR = Path(os.environ.get("PDF_TABLE_CACHE_DIR", ROOT / "data" / "cache" / "pdf_tables"))
+
+Table = List[List[Optional[str]]]
+
+
+# =====================================================
+# Pre-filter
+# =====================================================
+
+def prefilter_enabled() -> bool:
+    return os.environ.get("PDF_PREFILTER", "1") != "0"
+
+
+def may_contain_table(page, table_settings: Optional[Dict] = None) -> bool:
+    """
+    False only when table detection provably returns no table: with a
+    ruling-based strategy both ways, a cell needs a top and a bottom edge
+    and a left and a right one, and snapping / joining only merges the
+    page's edges. Text / explicit strategies are never skipped.
+    """
+    tset = TableSettings.resolve(table_settings)
+    if tset.vertical_strategy not in ("lines", "lines_strict") or \
+            tset.horizontal_strategy not in ("lines", "lines_strict"):
+        return True
+
+    return len(page.horizontal_edges) >= MIN_EDGES and len(page.vertical_edges) >= MIN_EDGES
+
+
+# =====================================================
+# Extraction
+# =====================================================
+
+def sorted_tables(page, tset: TableSettings) -> List:
+    """pdfplumber Table objects, largest first (extract_table() ordering)."""
+    return sorted(
+        page.find_tables(tset),
+        key=lambda t: (-len(t.cells), t.bbox[1], t.bbox[0])
+    )
+
+
+def detect_tables(
+    page,
+    table_settings: Optional[Dict],
+    template: Optional[Dict] = None,
+    learned: Optional[List[Dict]] = None
+) -> Tuple[List[Table], int]:
+    """
+    Lattice detection. Tables that are a regular grid of a template shape
+    are read off the grid (same rows, see common/pdf_templates.py); the
+    data tables found are recorded when learning. Returns the tables and
+    how many were read off a template grid.
+    """
+    tset = TableSettings.resolve(table_settings)
+    text_settings = tset.text_settings or {}
+    tables, templated = [], 0
+
+    for table in sorted_tables(page, tset):
+        grid = match_grid(table, template) if template is not None else None
+        if grid:
+            tables.append(grid_table(page.chars, *grid, **text_settings))
+            templated += 1
+        else:
+            tables.append(table.extract(**text_settings))
+            shape = learn_shape(table, tables[-1]) if learned is not None else None
+            if shape:
+                learned.append(shape)
+
+    return tables, templated
+
+
+def scan_page(
+    page,
+    table_settings: Optional[Dict],
+    stats: Dict[str, int],
+    template: Optional[Dict] = None,
+    learned: Optional[List[Dict]] = None
+) -> List[Table]:
+    """Pre-filter, extract (template grids first, then pdfplumber) and release one page."""
+    if prefilter_enabled() and not may_contain_table(page, table_settings):
+        stats["pages_skipped"] += 1
+        tables = []
+    else:
+        tables, templated = detect_tables(
+            page, table_settings, template, learned if template is not None else None
+        )
+        if templated:
+            stats["pages_templated"] += 1
+        else:
+            stats["pages_extracted"] += 1
+            if template is not None:
+                stats["template_misses"] += 1
+
+    release_page(page)
+    return tables
+
+
+def new_stats() -> Dict[str, int]:
+    return {"pages_extracted": 0, "pages_skipped": 0, "pages_templated": 0, "template_misses": 0}
+
+
+def release_page(page):
+    """Drops the layout objects pdfplumber cached on the page."""
+    if hasattr(page, "close"):
+        page.close()
+    else:
+        page.flush_cache()
+
+
+def extract_workers() -> int:
+    configured = int(os.environ.get("PDF_EXTRACT_WORKERS", "0") or 0)
+    if configured > 0:
+        return configured
+    return min(os.cpu_count() or 1, MAX_EXTRACT_WORKERS)
+
+
+def page_shards(n_pages: int, workers: int) -> List[Tuple[int, int]]:
+    """Contiguous [start, stop) page ranges, a few per worker for load balance."""
+    size = max(1, math.ceil(n_pages / (workers * SHARDS_PER_WORKER)))
+    return [(start, min(start + size, n_pages)) for start in range(0, n_pages, size)]
+
+
+def extract_page_range(
+    path: str,
+    start: int,
+    stop: int,
+    table_settings: Optional[Dict] = None,
+    template: Optional[Dict] = None
+) -> Tuple[List[List[Table]], Dict[str, int], List[Dict]]:
+    """
+    Runs in a pool worker: own pdfplumber handle, pages [start, stop).
+    Returns (tables per page, page stats, learned template shapes).
+    """
+    stats = new_stats()
+    learned = []
+    with pdfplumber.open(path) as pdf:
+        shard = [
+            scan_page(page, table_settings, stats, template, learned)
+            for page in pdf.pages[start:stop]
+        ]
+    return shard, stats, learned
+
+
+def layout_template(family: Optional[str], table_settings: Optional[Dict]) -> Optional[Dict]:
+    """The family's template when extraction uses one (default settings, PDF_TEMPLATES on)."""
+    if family and table_settings is None and templates_enabled():
+        return load_template(family)
+    return None
+
+
+def extract_pages(
+    path: str,
+    table_settings: Optional[Dict] = None,
+    workers: Optional[int] = None,
+    family: Optional[str] = None
+) -> Iterator[List[Table]]:
+    """
+    Yields each page's tables in page order. With a report family (and
+    default table settings) the family's layout template is used and
+    extended with shapes learned on this document.
+    """
+    workers = workers or extract_workers()
+    template = layout_template(family, table_settings)
+    learned = []
+
+    with pdfplumber.open(path) as pdf:
+        n_pages = len(pdf.pages)
+        count(pages=n_pages)
+
+        if workers <= 1 or n_pages < PARALLEL_MIN_PAGES:
+            for page in pdf.pages:
+                stats = new_stats()
+                tables = scan_page(page, table_settings, stats, template, learned)
+                count(**stats)
+                yield tables
+            shards = None
+        else:
+            shards = page_shards(n_pages, workers)
+
+    if shards:
+        starts, stops = zip(*shards)
+
+        # map() yields shard results in submission order → pages stay in order
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            results = pool.map(
+                extract_page_range, repeat(path), starts, stops,
+                repeat(table_settings), repeat(template)
+            )
+            for shard, stats, shard_learned in results:
+                count(**stats)
+                learned += shard_learned
+                yield from shard
+
+    if template is not None and merge_shapes(template, learned):
+        save_template(template)
+
+
+# =====================================================
+# Cache
+# =====================================================
+
+def cache_enabled() -> bool:
+    return os.environ.get("PDF_TABLE_CACHE", "1") != "0"
+
+
+def cache_key(path: str, table_settings: Optional[Dict] = None, family: Optional[str] = None) -> str:
+    # The template in use changes what is extracted: a re-learned template
+    # or PDF_TEMPLATES=0 gets its own entries
+    template = layout_template(family, table_settings)
+    body = json.dumps({
+        "file": file_sha256(path),
+        "settings": table_settings or {},
+        "family": family,
+        "pdfplumber": pdfplumber.__version__,
+        "extractor": EXTRACTOR_VERSION,
+        "prefilter": prefilter_enabled(),
+        "templates": templates_enabled(),
+        "template": template_fingerprint(template) if template is not None else None,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def cache_path(key: str) -> Path:
+    return CACHE_DIR / key[:2] / f"{key}.jsonl.gz"
+
+
+def read_cache(key: str) -> Iterator[List[Table]]:
+    """Yields cached pages; the first line is a header naming the key."""
+    with gzip.open(cache_path(key), "rb") as f:
+        header = serialization.loads(f.readline())
+        if header.get("key") != key:
+            raise ValueError(f"Cache entry does not match key: {key}")
+        for line in f:
+            yield serialization.loads(line)
+
+
+def write_through(key: str, pages: Iterator[List[Table]]) -> Iterator[List[Table]]:
+    """
+    Passes pages through while writing them to the cache. The entry is
+    published (atomic rename) only once every page has been written.
+    """
+    path = cache_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    complete = False
+    try:
+        with gzip.open(os.fdopen(fd, "wb"), "wb") as f:
+            f.write(serialization.dumps({"key": key}, pretty=False) + b"\n")
+            for tables in pages:
+                f.write(serialization.dumps(tables, pretty=False) + b"\n")
+                yield tables
+        os.replace(tmp, path)
+        complete = True
+    finally:
+        if not complete and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# =====================================================
+# Public API
+# =====================================================
+
+def iter_pdf_pages(
+    path: str,
+    table_settings: Optional[Dict] = None,
+    use_cache: bool = True,
+    workers: Optional[int] = None,
+    family: Optional[str] = None
+) -> Iterator[List[Table]]:
+    """
+    Streams each page's tables (largest first), from the cache when the
+    same file was extracted before with the same settings.
+    family names the vendor report layout (see common/pdf_templates.py).
+    """
+    if not (use_cache and cache_enabled()):
+        yield from extract_pages(path, table_settings, workers, family)
+        return
+
+    key = cache_key(path, table_settings, family)
+
+    if cache_path(key).exists():
+        cached = 0
+        try:
+            for tables in read_cache(key):
+                cached += 1
+                yield tables
+        except (OSError, ValueError, EOFError):
+            if cached:
+                raise
+            # Unreadable entry: drop it and extract again below
+            cache_path(key).unlink(missing_ok=True)
+        else:
+            count(cached_pages=cached)
+            return
+
+    yield from write_through(key, extract_pages(path, table_settings, workers, family))
+
+
+def load_pdf_tables(
+    path: str,
+    table_settings: Optional[Dict] = None,
+    use_cache: bool = True,
+    workers: Optional[int] = None,
+    family: Optional[str] = None
+) -> List[List[Table]]:
+    """Per-page list of tables; materialised form of iter_pdf_pages()."""
+    return list(iter_pdf_pages(path, table_settings, use_cache, workers, family))
+
+
+def iter_tables(
+    path: str,
+    table_settings: Optional[Dict] = None,
+    family: Optional[str] = None
+) -> Iterator[Tuple[int, Table]]:
+    """
+    Drop-in for `for page in pdf.pages: table = page.extract_table()`.
+    Yields (page_no, largest table) for pages that have a table.
+    """
+    for page_no, tables in enumerate(iter_pdf_pages(path, table_settings, family=family)):
+        if tables:
+            yield page_no, tables[0]
+
+
+def iter_page_tables(
+    path: str,
+    table_settings: Optional[Dict] = None,
+    family: Optional[str] = None
+) -> Iterator[Tuple[int, List[Table]]]:
+    """Yields (page_no, all tables on the page) for every page."""
+    yield from enumerate(iter_pdf_pages(path, table_settings, family=family))
@@ -0,0 +1,217 @@
+"""
+Vendor Layout Templates
+-----------------------
+Learns the table layout of each vendor report family (EDR, Cove backup,
+phishing, dark web, user list) once and reuses it on later months.
+
+A template is a list of table shapes seen in that family:
+- columns : x-positions of the column rulings
+- bbox    : extent of the table where it was learned (informational)
+- header  : normalised header row
+
+Only data tables are learned: at least MIN_COLUMNS columns and MIN_ROWS
+rows, with a header of column names in the first HEADER_ROWS rows.
+Chart fragments (blank or numeric cells) are never stored.
+
+Lattice detection itself always runs (edges, intersections, cells: the
+cheap part), so the tables found are exactly page.find_tables()'s. What
+a template saves is Table.extract(), which scans every char of the page
+once per row and is most of the detection time. A table whose cells are
+a full regular grid with the columns of a known shape (shifted by up to
+MAX_SHIFT between months) is read off that grid instead: each char is
+placed in its cell by bisection on the column and row positions. Other
+tables (a split header, merged cells, chart fragments) are extracted by
+pdfplumber as before, and the data tables among them are learned.
+
+Row positions come from each page's own cells, not from the template:
+data rows move from page to page. See benchmarks/pdf_templates.py.
+
+Templates live in data/templates/<family>.json.
+"""
+
+import hashlib
+import os
+import tempfile
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pdfplumber.utils import extract_text
+
+from common import serialization
+
+
+TEMPLATE_VERSION = 2
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+TEMPLATE_DIR = Path(os.environ.get("PDF_TEMPLATE_DIR", ROOT / "data" / "templates"))
+
+COLUMN_TOLERANCE = 2.0
+MAX_SHIFT = 24.0
+MAX_SHAPES = 16
+
+MIN_COLUMNS = 2
+MIN_ROWS = 2
+HEADER_ROWS = 3
+MIN_HEADER_CELLS = 2
+
+
+# =====================================================
+# Store
+# =====================================================
+
+def templates_enabled() -> bool:
+    return os.environ.get("PDF_TEMPLATES", "1") != "0"
+
+
+def template_path(family: str) -> Path:
+    return TEMPLATE_DIR / f"{family}.json"
+
+
+def load_template(family: str) -> Dict:
+    path = template_path(family)
+    empty = {"family": family, "version": TEMPLATE_VERSION, "shapes": []}
+    if not path.exists():
+        return empty
+    try:
+        template = serialization.load_json(path)
+    except (OSError, ValueError):
+        return empty
+    return template if template.get("version") == TEMPLATE_VERSION else empty
+
+
+def save_template(template: Dict):
+    path = template_path(template["family"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    body = dict(template, updated_at=datetime.utcnow().isoformat() + "Z")
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(serialization.dumps(body))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def template_fingerprint(template: Dict) -> str:
+    """Hash of the template's shapes (not of when it was last saved)."""
+    body = serialization.dumps(
+        {"version": template.get("version"), "shapes": template["shapes"]},
+        sort_keys=True
+    )
+    return hashlib.sha256(body).hexdigest()
+
+
+def merge_shapes(template: Dict, shapes: List[Dict]) -> bool:
+    """Adds shapes not yet in the template. Returns True if it changed."""
+    changed = False
+    for shape in shapes:
+        if len(template["shapes"]) >= MAX_SHAPES:
+            break
+        if not any(same_columns(shape["columns"], s["columns"]) for s in template["shapes"]):
+            template["shapes"].append(shape)
+            changed = True
+    return changed
+
+
+# =====================================================
+# Geometry
+# =====================================================
+
+def cluster(values: List[float]) -> List[float]:
+    """Sorted positions with near-duplicates (≤ COLUMN_TOLERANCE) merged."""
+    merged = []
+    for value in sorted(values):
+        if merged and value - merged[-1] <= COLUMN_TOLERANCE:
+            continue
+        merged.append(round(value, 2))
+    return merged
+
+
+def same_columns(a: List[float], b: List[float]) -> bool:
+    """Same column widths, wherever the table sits (shape_grid allows MAX_SHIFT)."""
+    return (
+        len(a) == len(b) and abs(a[0] - b[0]) <= MAX_SHIFT and
+        all(abs((x - a[0]) - (y - b[0])) <= COLUMN_TOLERANCE for x, y in zip(a, b))
+    )
+
+
+# =====================================================
+# Learning
+# =====================================================
+
+def header_row(rows: List[List[Optional[str]]]) -> Optional[List[str]]:
+    """The first of the top HEADER_ROWS rows that reads like column names."""
+    for row in rows[:HEADER_ROWS]:
+        cells = [str(c).strip() for c in row if c and str(c).strip()]
+        if len(cells) >= MIN_HEADER_CELLS and all(any(ch.isalpha() for ch in c) for c in cells):
+            return [str(c).strip().lower() if c else "" for c in row]
+    return None
+
+
+def learn_shape(table, rows: List[List[Optional[str]]]) -> Optional[Dict]:
+    """
+    Shape of a pdfplumber Table found by full detection, or None unless it
+    looks like a data table: MIN_COLUMNS columns, MIN_ROWS rows and a
+    header of column names (chart fragments have blank or numeric cells).
+    """
+    columns = cluster([x for cell in table.cells for x in (cell[0], cell[2])])
+    header = header_row(rows)
+    if len(columns) - 1 < MIN_COLUMNS or len(rows) < MIN_ROWS or header is None:
+        return None
+
+    return {
+        "columns": columns,
+        "bbox": [round(v, 2) for v in table.bbox],
+        "header": header,
+    }
+
+
+# =====================================================
+# Matching / Extraction
+# =====================================================
+
+def table_grid(table) -> Optional[Tuple[List[float], List[float]]]:
+    """(column x, row y) of a Table whose cells are a full regular grid, else None."""
+    xs = sorted({x for cell in table.cells for x in (cell[0], cell[2])})
+    ys = sorted({y for cell in table.cells for y in (cell[1], cell[3])})
+    grid = {
+        (x0, top, x1, bottom)
+        for x0, x1 in zip(xs, xs[1:])
+        for top, bottom in zip(ys, ys[1:])
+    }
+    return (xs, ys) if len(table.cells) == len(grid) and set(table.cells) == grid else None
+
+
+def match_grid(table, template: Dict) -> Optional[Tuple[List[float], List[float]]]:
+    """The table's grid when it is regular and its columns are a template shape's."""
+    if not template["shapes"]:
+        return None
+
+    grid = table_grid(table)
+    if grid and any(same_columns(grid[0], shape["columns"]) for shape in template["shapes"]):
+        return grid
+    return None
+
+
+def grid_table(chars: List[Dict], columns: List[float], rows: List[float], **text_settings) -> List[List[str]]:
+    """
+    Rows of a regular grid, as Table.extract() reads them: a char belongs
+    to the cell holding its midpoint and chars keep page order, but each
+    char is placed by bisection instead of one page scan per row.
+    """
+    cells = [[[] for _ in columns[1:]] for _ in rows[1:]]
+    x0, x1, top, bottom = columns[0], columns[-1], rows[0], rows[-1]
+
+    for char in chars:
+        v_mid = (char["top"] + char["bottom"]) / 2
+        h_mid = (char["x0"] + char["x1"]) / 2
+        if top <= v_mid < bottom and x0 <= h_mid < x1:
+            cells[bisect_right(rows, v_mid) - 1][bisect_right(columns, h_mid) - 1].append(char)
+
+    return [[extract_text(cell, **text_settings) if cell else "" for cell in row] for row in cells]
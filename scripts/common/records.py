@@ -0,0 +1,301 @@
+"""
+Record Types
+------------
+Slotted record classes for users and assets, in place of dicts of dicts
+that repeat the same keys in every record. Used where whole snapshots
+are scanned (insight engine).
+
+Usage:
+    assets = from_snapshot(asset_snapshot, edr_overlay, backup_overlay)
+    for asset_id, asset in assets["assets"].items():
+        if asset.security_state.risk_level == RiskLevel.HIGH: ...
+
+    snapshot = to_snapshot(assets)          # == the dict snapshot again
+    record = Asset.from_dict(raw).to_dict()
+
+Design:
+- One slotted dataclass per record and nested object (Asset with
+  SecurityState / BackupState, User with Services / RiskSignals); the
+  fields are those of the snapshot schema (common/snapshot_store.py)
+- A field the record does not have is MISSING (falsy, never equal to a
+  value), so `asset.backup_state.enabled is False` or
+  `signals.phishing_clicked` read like the dict.get() checks they
+  replace; a missing nested object is MISSING too
+- Status, type, risk-level and month values are interned on load (the
+  enum-like constants below are the same objects), so 50k records share
+  one copy of each
+- Lossless: any value is kept as is (no type coercion), keys the schema
+  does not know go to `extra`, so Record.from_dict(x).to_dict() == x;
+  key order follows the schema, as in the snapshot store
+- from_snapshot() applies enrichment overlays (common/overlays.py)
+  straight onto the records, without merged dict copies
+"""
+
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, ClassVar, Dict, FrozenSet, Optional, Tuple
+
+from common import snapshot_store
+from common.overlays import SOURCES
+
+
+# =====================================================
+# Values
+# =====================================================
+
+class Missing:
+    """A field the record does not have (absent key, not None)."""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __reduce__(self):
+        return "MISSING"
+
+
+MISSING = Missing()
+
+
+class Status:
+    ACTIVE = "active"
+    INACTIVE = "inactive"
+    RETIRED = "retired"
+
+
+class RiskLevel:
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+    CRITICAL = "critical"
+    UNKNOWN = "unknown"
+    NONE = "none"
+
+
+class BackupStatus:
+    HEALTHY = "healthy"
+    WARNING = "warning"
+    IN_PROGRESS = "in_progress"
+    FAILED = "failed"
+    PENDING_INSTALLATION = "pending_installation"
+    ASSUMED_ENABLED = "assumed_enabled"
+    UNKNOWN = "unknown"
+
+
+def intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def value(field: Any, default: Any = None) -> Any:
+    """field, or default when it is MISSING (as dict.get(name, default))."""
+    return default if field is MISSING else field
+
+
+# =====================================================
+# Records
+# =====================================================
+
+class Record:
+    """Base of the record classes: dict conversion driven by the class fields."""
+
+    __slots__ = ()
+
+    FIELDS: ClassVar[Tuple[str, ...]] = ()
+    NESTED: ClassVar[Dict[str, type]] = {}
+    INTERNED: ClassVar[FrozenSet[str]] = frozenset()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Record":
+        values = [data.get(name, MISSING) for name in cls.FIELDS]
+
+        for i, name in enumerate(cls.FIELDS):
+            value = values[i]
+            if name in cls.NESTED:
+                if type(value) is dict:
+                    values[i] = cls.NESTED[name].from_dict(value)
+            elif name in cls.INTERNED:
+                values[i] = intern(value)
+
+        extra = None
+        if len(data) > sum(value is not MISSING for value in values):
+            extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+
+        return cls(*values, extra=extra or None)
+
+    def to_dict(self) -> Dict:
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is MISSING:
+                continue
+            data[name] = value.to_dict() if isinstance(value, Record) else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def set(self, name: str, value: Any):
+        """Sets a field as record[name] = value would."""
+        if name in self.FIELDS:
+            setattr(self, name, intern(value) if name in self.INTERNED else value)
+        else:
+            self.extra = self.extra or {}
+            self.extra[name] = value
+
+
+def record_class(cls: type) -> type:
+    """Slotted dataclass with FIELDS taken from its declared fields (extra last)."""
+    cls = dataclass(slots=True, eq=True)(cls)
+    cls.FIELDS = tuple(f.name for f in fields(cls) if f.name != "extra")
+    return cls
+
+
+@record_class
+class SecurityState(Record):
+    edr_installed: Any = MISSING
+    backup_enabled: Any = MISSING
+    patched: Any = MISSING
+    edr_alerts: Any = MISSING
+    edr_incidents: Any = MISSING
+    risk_level: Any = MISSING
+    extra: Optional[Dict] = None
+
+    INTERNED = frozenset({"risk_level"})
+
+
+@record_class
+class BackupState(Record):
+    enabled: Any = MISSING
+    status: Any = MISSING
+    risk_level: Any = MISSING
+    extra: Optional[Dict] = None
+
+    INTERNED = frozenset({"status", "risk_level"})
+
+
+@record_class
+class Asset(Record):
+    device_name: Any = MISSING
+    serial_number: Any = MISSING
+    assigned_user: Any = MISSING
+    type: Any = MISSING
+    model: Any = MISSING
+    os: Any = MISSING
+    status: Any = MISSING
+    first_seen: Any = MISSING
+    last_seen: Any = MISSING
+    security_state: Any = MISSING
+    backup_state: Any = MISSING
+    extra: Optional[Dict] = None
+
+    NESTED = {"security_state": SecurityState, "backup_state": BackupState}
+    INTERNED = frozenset({"type", "model", "os", "status", "first_seen", "last_seen"})
+
+
+@record_class
+class Services(Record):
+    m365: Any = MISSING
+    edr: Any = MISSING
+    backup: Any = MISSING
+    phishing_training: Any = MISSING
+    dark_web_monitoring: Any = MISSING
+    extra: Optional[Dict] = None
+
+
+@record_class
+class RiskSignals(Record):
+    phishing_clicked: Any = MISSING
+    dark_web_exposed: Any = MISSING
+    edr_incidents: Any = MISSING
+    phishing_campaigns: Any = MISSING
+    phishing_failures: Any = MISSING
+    phishing_risk: Any = MISSING
+    dark_web_source: Any = MISSING
+    dark_web_severity: Any = MISSING
+    extra: Optional[Dict] = None
+
+    INTERNED = frozenset({"phishing_risk", "dark_web_source", "dark_web_severity"})
+
+
+@record_class
+class User(Record):
+    name: Any = MISSING
+    status: Any = MISSING
+    first_seen: Any = MISSING
+    last_seen: Any = MISSING
+    services: Any = MISSING
+    risk_signals: Any = MISSING
+    extra: Optional[Dict] = None
+
+    NESTED = {"services": Services, "risk_signals": RiskSignals}
+    INTERNED = frozenset({"status", "first_seen", "last_seen"})
+
+
+RECORDS: Dict[str, type] = {"assets": Asset, "users": User}
+
+
+# =====================================================
+# Snapshots
+# =====================================================
+
+def is_records(snapshot: Dict) -> bool:
+    kind = snapshot_store.snapshot_kind(snapshot)
+    first = next(iter(snapshot[kind].values()), None)
+    return first is None or isinstance(first, Record)
+
+
+def apply_overlay(entities: Dict[str, Record], overlay: Dict):
+    """Sets an enrichment overlay's fields on the records (in place)."""
+    kind, section, _, _ = SOURCES[overlay["metadata"]["source"]]
+    nested = RECORDS[kind].NESTED[section]
+
+    for entity_id, values in overlay["entities"].items():
+        record = entities.get(entity_id)
+        if record is None:
+            continue
+        state = getattr(record, section)
+        if state is MISSING:
+            state = nested()
+            setattr(record, section, state)
+        for name, value in values.items():
+            state.set(name, value)
+
+
+def from_snapshot(snapshot: Dict, *overlays: Dict) -> Dict:
+    """
+    {"metadata", kind: {id: Asset | User}} of a dict snapshot (or an
+    enriched view), with the overlays of its kind applied.
+    """
+    kind = snapshot_store.snapshot_kind(snapshot)
+    record_type = RECORDS[kind]
+    metadata = dict(snapshot.get("metadata", {}))
+
+    entities = {
+        entity_id: record if isinstance(record, Record) else record_type.from_dict(record)
+        for entity_id, record in snapshot[kind].items()
+    }
+
+    applicable = [overlay for overlay in overlays if SOURCES[overlay["metadata"]["source"]][0] == kind]
+    for overlay in sorted(applicable, key=lambda o: list(SOURCES).index(o["metadata"]["source"])):
+        apply_overlay(entities, overlay)
+        stamp = SOURCES[overlay["metadata"]["source"]][3]
+        metadata[stamp] = overlay["metadata"].get(stamp)
+
+    return {"metadata": metadata, kind: entities}
+
+
+def as_records(snapshot: Dict) -> Dict:
+    """snapshot itself when it already holds records, else from_snapshot(snapshot)."""
+    return snapshot if is_records(snapshot) else from_snapshot(snapshot)
+
+
+def to_snapshot(snapshot: Dict) -> Dict:
+    """The dict snapshot of a record snapshot."""
+    kind = snapshot_store.snapshot_kind(snapshot)
+    return {
+        "metadata": dict(snapshot["metadata"]),
+        kind: {entity_id: record.to_dict() for entity_id, record in snapshot[kind].items()}
+    }
@@ -0,0 +1,293 @@
+"""
+Report Classifier
+-----------------
+Identifies what each raw file of a month is (user list, asset list, EDR,
+backup, phishing, dark web, ...) from its content, and builds a typed
+index of the month's inputs.
+
+Usage:
+    index = index_reports(raw_dir)
+    index.users, index.edr          # Path or None
+    index.found()                   # {"users": Path, "edr": Path, ...}
+
+Design:
+- One read per file: the first page's text (PDF), the first rows of
+  the first sheet (XLSX, openpyxl read_only) or of a CSV, or a Parquet
+  file's column names — never a full parse
+- Each kind has title phrases (decisive on their own, since vendor
+  exports open with a cover page) and column phrases; the kind with
+  the highest score on that page wins
+- Files whose content is inconclusive (scanned, empty, unreadable) fall
+  back to filename keywords
+- Results are cached by content hash in data/cache/report_types/, so a
+  file is fingerprinted once however often it is indexed or renamed
+- The directory is listed once per index
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass, field, fields
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import openpyxl
+import pdfplumber
+
+from common import serialization
+from common.hashing import file_sha256
+from common.tabular import iter_csv_rows, parquet_columns
+
+
+CLASSIFIER_VERSION = 2
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+CACHE_DIR = Path(os.environ.get("REPORT_TYPE_CACHE_DIR", ROOT / "data" / "cache" / "report_types"))
+
+REPORT_SUFFIXES = {".pdf", ".xlsx", ".csv", ".parquet"}
+
+# Rows of an XLSX / CSV scanned for the header row (titles usually sit above it)
+HEADER_SCAN_ROWS = 20
+
+
+# =====================================================
+# Signatures
+# =====================================================
+
+# Report titles per kind. Vendor exports usually open with a cover page
+# that carries little more than the title, so one title is decisive.
+TITLE_SIGNATURES: Dict[str, List[str]] = {
+    "edr": ["executive threat report", "endpoint detection", "edr report"],
+    "backup": ["backup report", "cove data protection"],
+    "phishing": ["phishing campaign", "phishing report"],
+    "darkweb": ["dark web monitoring", "darkweb monitoring", "dark web report"],
+    "patch": ["patch management"],
+    "saas": ["saas backup", "saas protection"],
+    "rocketcyber": ["cybersecurity monitoring report", "rocketcyber"],
+    "assets": ["asset list", "asset inventory"],
+    "users": ["user list"],
+}
+
+# Column / body phrases per kind, for first pages that start with a table
+CONTENT_SIGNATURES: Dict[str, List[str]] = {
+    "edr": ["threats", "incidents", "alerts", "sentinelone"],
+    "backup": ["total status", "selected size", "failure reason", "pending installation"],
+    "phishing": ["emails sent", "clicked", "reported"],
+    "darkweb": ["breach source", "compromise", "date found"],
+    "patch": ["missing patches", "installed patches"],
+    "saas": ["saas"],
+    "rocketcyber": ["security operations"],
+    "assets": ["device name", "serial number", "operating system", "last user", "model"],
+    "users": ["sign-in allowed", "assigned products", "user principal name", "display name", "email"],
+}
+
+TITLE_WEIGHT = 2
+
+# Filename keywords per kind, used only when the content is inconclusive.
+# Each alternative is a keyword list that must all appear in the name.
+FILENAME_KEYWORDS: Dict[str, List[List[str]]] = {
+    "edr": [["edr"]],
+    "backup": [["backup"]],
+    "phishing": [["phishing"]],
+    "darkweb": [["dark", "web"], ["darkweb"]],
+    "patch": [["patch"]],
+    "saas": [["saas"]],
+    "rocketcyber": [["rocket"]],
+    "assets": [["asset", "list"], ["asset"]],
+    "users": [["user", "list"], ["user"]],
+}
+
+# A content match needs this score: one title, or two column phrases
+MIN_SCORE = 2
+
+
+def score_text(text: str) -> Tuple[Optional[str], int]:
+    """
+    Best-matching kind for a page of text and its score (titles weigh
+    TITLE_WEIGHT, column phrases 1). Ties keep the earlier kind.
+    """
+    text = " ".join(text.lower().split())
+
+    best, best_score = None, 0
+    for kind in CONTENT_SIGNATURES:
+        score = (
+            TITLE_WEIGHT * sum(1 for phrase in TITLE_SIGNATURES[kind] if phrase in text)
+            + sum(1 for phrase in CONTENT_SIGNATURES[kind] if phrase in text)
+        )
+        if score > best_score:
+            best, best_score = kind, score
+    return best, best_score
+
+
+def kind_from_filename(filename: str) -> Optional[str]:
+    name = filename.lower()
+    for kind, alternatives in FILENAME_KEYWORDS.items():
+        if any(all(k in name for k in keywords) for keywords in alternatives):
+            return kind
+    return None
+
+
+# =====================================================
+# First-page Readers
+# =====================================================
+
+def first_page_text(path: Path) -> str:
+    with pdfplumber.open(path) as pdf:
+        if not pdf.pages:
+            return ""
+        return pdf.pages[0].extract_text() or ""
+
+
+def header_rows_text(path: Path) -> str:
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        lines = []
+        for row in sheet.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True):
+            lines.append(" ".join(str(v) for v in row if v is not None))
+        return "\n".join(lines)
+    finally:
+        workbook.close()
+
+
+def csv_rows_text(path: Path) -> str:
+    rows = islice(iter_csv_rows(str(path)), HEADER_SCAN_ROWS)
+    return "\n".join(" ".join(v for v in row if v) for row in rows)
+
+
+def parquet_header_text(path: Path) -> str:
+    return " ".join(str(name) for name in parquet_columns(str(path)))
+
+
+def read_signature_text(path: Path) -> str:
+    suffix = path.suffix.lower()
+    try:
+        if suffix == ".pdf":
+            return first_page_text(path)
+        if suffix == ".csv":
+            return csv_rows_text(path)
+        if suffix == ".parquet":
+            return parquet_header_text(path)
+        return header_rows_text(path)
+    except Exception as exc:  # unreadable / encrypted: classify by name instead
+        print(f"⚠️ Could not read {path.name} for classification: {exc}")
+        return ""
+
+
+# =====================================================
+# Cache
+# =====================================================
+
+def cache_path(digest: str) -> Path:
+    return CACHE_DIR / digest[:2] / f"{digest}.json"
+
+
+def read_cached(digest: str) -> Optional[Dict]:
+    path = cache_path(digest)
+    if not path.exists():
+        return None
+    try:
+        entry = serialization.load_json(path)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get("version") == CLASSIFIER_VERSION else None
+
+
+def write_cached(digest: str, entry: Dict):
+    path = cache_path(digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(serialization.dumps(entry))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# =====================================================
+# Classification
+# =====================================================
+
+def fingerprint(path: Path) -> Dict:
+    """
+    Content fingerprint of one file:
+    {kind, source: content | filename | none, score, version}
+    """
+    kind, score = score_text(read_signature_text(path))
+    source = "content"
+
+    if score < MIN_SCORE:
+        kind = kind_from_filename(path.name)
+        source = "filename" if kind else "none"
+
+    return {"kind": kind, "source": source, "score": score, "version": CLASSIFIER_VERSION}
+
+
+def classify_report(path: Path) -> Optional[str]:
+    """Report kind of a file, fingerprinted once per distinct content."""
+    digest = file_sha256(str(path))
+    entry = read_cached(digest) if digest else None
+
+    if entry is None:
+        entry = fingerprint(path)
+        if digest and entry["source"] == "content":
+            # Filename fallbacks are not cached: a rename may fix them
+            write_cached(digest, entry)
+
+    return entry["kind"]
+
+
+# =====================================================
+# Month Index
+# =====================================================
+
+@dataclass
+class ReportIndex:
+    """The raw inputs of one month, by report kind."""
+    users: Optional[Path] = None
+    assets: Optional[Path] = None
+    edr: Optional[Path] = None
+    backup: Optional[Path] = None
+    phishing: Optional[Path] = None
+    darkweb: Optional[Path] = None
+    patch: Optional[Path] = None
+    saas: Optional[Path] = None
+    rocketcyber: Optional[Path] = None
+    unknown: List[Path] = field(default_factory=list)
+
+    def get(self, kind: str) -> Optional[Path]:
+        return getattr(self, kind, None) if kind in CONTENT_SIGNATURES else None
+
+    def found(self) -> Dict[str, Path]:
+        """Classified reports in index order, {kind: path}."""
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name != "unknown" and getattr(self, f.name)
+        }
+
+
+def index_reports(raw_dir: Path) -> ReportIndex:
+    """Classifies every report in raw_dir (one directory listing)."""
+    index = ReportIndex()
+    if not raw_dir.exists():
+        return index
+
+    for path in sorted(raw_dir.iterdir()):
+        if not path.is_file() or path.name.startswith(".") or path.suffix.lower() not in REPORT_SUFFIXES:
+            continue
+
+        kind = classify_report(path)
+        if kind is None:
+            index.unknown.append(path)
+        elif index.get(kind) is None:
+            setattr(index, kind, path)
+        else:
+            print(f"⚠️ {path.name}: another {kind} report already indexed "
+                  f"({index.get(kind).name}) — ignored")
+
+    return index
@@ -0,0 +1,114 @@
+"""
+JSON Serialization
+------------------
+Shared JSON layer for every file the pipeline loads or saves as JSON
+(stage checkpoints, diffs, insights, narratives, dashboards, manifests,
+caches, JSON snapshot views).
+
+Usage:
+    save_json(insights, "data/insights/2025-11-insights.json")
+    save_json(manifest, path, pretty=True)        # indented, for reading
+    insights = load_json("data/insights/2025-11-insights.json")
+    body = dumps(data)                            # bytes
+    data = loads(body)
+
+Design:
+- orjson when installed, stdlib json otherwise; both write the same
+  document: compact (no whitespace) by default, 2-space indented with
+  pretty=True or JSON_PRETTY=1
+- UTF-8 as is (no \\u escapes); non-str dict keys become strings, as
+  json.dump does
+- Anything orjson cannot encode (integers beyond 64 bits, types only a
+  `default` handles in stdlib) or decode (NaN / Infinity, as json.dump
+  writes them) falls back to stdlib json, so every file written before
+  keeps loading. orjson writes NaN / Infinity as null
+- Readers accept compact and indented files alike
+
+Environment:
+- JSON_PRETTY=1    indent every JSON file written (default compact)
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+PRETTY = os.environ.get("JSON_PRETTY", "0") == "1"
+
+
+# =====================================================
+# Encode / Decode
+# =====================================================
+
+def stdlib_dumps(data: Any, pretty: bool, sort_keys: bool, default: Optional[Callable]) -> bytes:
+    text = json.dumps(
+        data,
+        indent=2 if pretty else None,
+        separators=None if pretty else (",", ":"),
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        default=default
+    )
+    return text.encode("utf-8")
+
+
+def dumps(
+    data: Any,
+    pretty: Optional[bool] = None,
+    sort_keys: bool = False,
+    default: Optional[Callable] = None
+) -> bytes:
+    """data as UTF-8 JSON; pretty defaults to JSON_PRETTY."""
+    pretty = PRETTY if pretty is None else pretty
+
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(data, default=default, option=option)
+        except TypeError:
+            pass
+
+    return stdlib_dumps(data, pretty, sort_keys, default)
+
+
+def loads(body) -> Any:
+    """JSON text (bytes or str) as Python objects."""
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(body)
+
+
+# =====================================================
+# Files
+# =====================================================
+
+def save_json(
+    data: Any,
+    path: str,
+    pretty: Optional[bool] = None,
+    default: Optional[Callable] = None
+) -> Path:
+    """Writes data to path (parent directories created) and returns the path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(dumps(data, pretty=pretty, default=default))
+    return path
+
+
+def load_json(path: str) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,370 @@
+"""
+Snapshot Store
+--------------
+Storage layer for asset and user snapshots ({"metadata", "assets" | "users"}).
+Every loader / saver of an entity snapshot goes through it: parsers,
+enrichers, the diff engine, the insight engine and the DAG checkpoints.
+
+Usage:
+    save_snapshot(snapshot, "data/normalized/2025-11-assets.parquet")
+    snapshot = load_snapshot("data/normalized/2025-11-assets.parquet")
+    assets = load_entities(path, "assets")      # {} when missing
+
+Design:
+- One Parquet file per snapshot, one row per entity, with a typed schema:
+  scalar fields as columns, security_state / backup_state / services /
+  risk_signals as struct columns
+- Snapshot metadata (month, source, enrichment timestamps) is stored in
+  the Parquet schema metadata
+- Lossless: a nested field the enrichers have not set is a null; a key
+  the schema does not know, a value of another type, or a None inside a
+  nested object goes to the per-row `extra` JSON column, so load(save(x))
+  == x for any snapshot (key order follows the schema)
+- Callers may pass the legacy .json path: the .parquet next to it wins,
+  and an existing .json is still read, so checkpoints written before the
+  store keep working as previous-month inputs
+- JSON is only a debugging view: SNAPSHOT_JSON=1 also writes the indented
+  .json next to every .parquet
+- Without pyarrow, snapshots are written and read as JSON (compact
+  unless JSON_PRETTY=1, see common/serialization.py)
+
+Environment:
+- SNAPSHOT_JSON=1               also write the .json debugging view
+- SNAPSHOT_COMPRESSION=codec    Parquet codec (default zstd)
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from common import serialization
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+SNAPSHOT_SUFFIX = ".parquet" if pq is not None else ".json"
+JSON_VIEW = os.environ.get("SNAPSHOT_JSON", "0") == "1"
+COMPRESSION = os.environ.get("SNAPSHOT_COMPRESSION", "zstd")
+
+METADATA_KEY = b"snapshot"
+ID_COLUMN = {"assets": "asset_id", "users": "email"}
+EXTRA = "extra"
+
+
+# =====================================================
+# Schema
+# =====================================================
+
+# Field → type name; a dict is a nested object (struct column).
+# Order matches the order the parsers / enrichers set the keys in.
+RECORD_FIELDS: Dict[str, Dict[str, Any]] = {
+    "assets": {
+        "device_name": "string",
+        "serial_number": "string",
+        "assigned_user": "string",
+        "type": "string",
+        "model": "string",
+        "os": "string",
+        "status": "string",
+        "first_seen": "string",
+        "last_seen": "string",
+        "security_state": {
+            "edr_installed": "bool",
+            "backup_enabled": "bool",
+            "patched": "bool",
+            "edr_alerts": "int",
+            "edr_incidents": "int",
+            "risk_level": "string",
+        },
+        "backup_state": {
+            "enabled": "bool",
+            "status": "string",
+            "risk_level": "string",
+        },
+    },
+    "users": {
+        "name": "string",
+        "status": "string",
+        "first_seen": "string",
+        "last_seen": "string",
+        "services": {
+            "m365": "bool",
+            "edr": "bool",
+            "backup": "bool",
+            "phishing_training": "bool",
+            "dark_web_monitoring": "bool",
+        },
+        "risk_signals": {
+            "phishing_clicked": "bool",
+            "dark_web_exposed": "bool",
+            "edr_incidents": "int",
+            "phishing_campaigns": "int",
+            "phishing_failures": "int",
+            "phishing_risk": "string",
+            "dark_web_source": "string",
+            "dark_web_severity": "string",
+        },
+    },
+}
+
+
+PY_TYPES = {"string": str, "bool": bool, "int": int}
+INT64 = (-2**63, 2**63)
+
+
+def fits(value: Any, type_name: str) -> bool:
+    """value can be stored in a column of type_name and read back as is."""
+    # Exact types: a bool is an int subclass, but would come back as 0 / 1
+    if type(value) is not PY_TYPES[type_name]:
+        return False
+    return type_name != "int" or INT64[0] <= value < INT64[1]
+
+
+def arrow_type(spec):
+    if isinstance(spec, dict):
+        return pa.struct([(name, arrow_type(child)) for name, child in spec.items()])
+    return {"string": pa.string(), "bool": pa.bool_(), "int": pa.int64()}[spec]
+
+
+def snapshot_schema(kind: str) -> "pa.Schema":
+    fields = [(ID_COLUMN[kind], pa.string())]
+    fields += [(name, arrow_type(spec)) for name, spec in RECORD_FIELDS[kind].items()]
+    fields.append((EXTRA, pa.string()))
+    return pa.schema(fields)
+
+
+def snapshot_kind(snapshot: Dict) -> str:
+    for kind in RECORD_FIELDS:
+        if kind in snapshot:
+            return kind
+    raise ValueError(f"Not an entity snapshot (keys: {list(snapshot)})")
+
+
+# =====================================================
+# Records ↔ Columns
+# =====================================================
+
+def split_record(record: Dict, kind: str) -> Tuple[Dict, Optional[Dict]]:
+    """
+    (typed values, extra) for one entity. Top-level scalars are always
+    columns (None included); anything the schema cannot hold goes to
+    extra, with "__missing__" listing absent top-level scalar keys and
+    "__nested__" the nested keys kept out of the struct columns.
+    """
+    fields = RECORD_FIELDS[kind]
+    typed, extra = {}, {}
+    known = 0
+
+    for name, spec in fields.items():
+        if name not in record:
+            if not isinstance(spec, dict):
+                extra.setdefault("__missing__", []).append(name)
+            continue
+
+        known += 1
+        value = record[name]
+
+        if not isinstance(spec, dict):
+            if value is None or fits(value, spec):
+                typed[name] = value
+            else:
+                extra[name] = value
+            continue
+
+        if type(value) is not dict:
+            extra[name] = value
+            continue
+
+        nested, nested_extra = {}, None
+        for key, child in value.items():
+            child_type = spec.get(key)
+            if child_type is not None and child is not None and fits(child, child_type):
+                nested[key] = child
+            else:
+                nested_extra = nested_extra or {}
+                nested_extra[key] = child
+        typed[name] = nested
+        if nested_extra:
+            extra.setdefault("__nested__", {})[name] = nested_extra
+
+    if len(record) > known:
+        for name, value in record.items():
+            if name not in fields:
+                extra[name] = value
+
+    return typed, extra or None
+
+
+def join_record(typed: Dict, extra: Optional[Dict], kind: str) -> Dict:
+    extra = dict(extra or {})
+    missing = set(extra.pop("__missing__", []))
+    nested_extra = extra.pop("__nested__", {})
+
+    record = {}
+    for name, spec in RECORD_FIELDS[kind].items():
+        if name in extra:
+            # Stored as is: wrong type, or not an object where one was expected
+            record[name] = extra.pop(name)
+        elif isinstance(spec, dict):
+            value = typed[name]
+            if value is not None:
+                nested = {key: child for key, child in value.items() if child is not None}
+                nested.update(nested_extra.get(name, {}))
+                record[name] = nested
+        elif name not in missing:
+            record[name] = typed[name]
+
+    record.update(extra)
+    return record
+
+
+def to_table(snapshot: Dict) -> "pa.Table":
+    kind = snapshot_kind(snapshot)
+    entities = snapshot[kind]
+    fields = RECORD_FIELDS[kind]
+
+    columns: Dict[str, List] = {name: [] for name in fields}
+    ids, extras = [], []
+
+    for entity_id, record in entities.items():
+        typed, extra = split_record(record, kind)
+        ids.append(entity_id)
+        for name in fields:
+            columns[name].append(typed.get(name))
+        extras.append(json.dumps(extra) if extra else None)
+
+    schema = snapshot_schema(kind)
+    arrays = [pa.array(ids, type=pa.string())]
+    arrays += [pa.array(columns[name], type=schema.field(name).type) for name in fields]
+    arrays.append(pa.array(extras, type=pa.string()))
+
+    metadata = {
+        METADATA_KEY: json.dumps({"kind": kind, "metadata": snapshot.get("metadata", {})}).encode()
+    }
+    return pa.Table.from_arrays(arrays, schema=schema.with_metadata(metadata))
+
+
+def struct_values(column: "pa.ChunkedArray") -> List[Optional[Dict]]:
+    """A struct column as nested dicts without null children (None for a null struct)."""
+    array = column.combine_chunks()
+    keys = [array.type.field(i).name for i in range(array.type.num_fields)]
+    children = [array.field(i).to_pylist() for i in range(len(keys))]
+    valid = array.is_valid().to_pylist()
+
+    return [
+        {key: value for key, value in zip(keys, values) if value is not None} if ok else None
+        for ok, *values in zip(valid, *children)
+    ]
+
+
+def from_table(table: "pa.Table") -> Dict:
+    header = json.loads(table.schema.metadata[METADATA_KEY])
+    kind = header["kind"]
+    fields = list(RECORD_FIELDS[kind])
+    structs = [name for name, spec in RECORD_FIELDS[kind].items() if isinstance(spec, dict)]
+
+    ids = table.column(ID_COLUMN[kind]).to_pylist()
+    values = [
+        struct_values(table.column(name)) if name in structs else table.column(name).to_pylist()
+        for name in fields
+    ]
+    extras = table.column(EXTRA).to_pylist()
+
+    entities = {}
+    for entity_id, extra, *row in zip(ids, extras, *values):
+        record = dict(zip(fields, row))
+        if extra:
+            record = join_record(record, json.loads(extra), kind)
+        else:
+            # Objects the enrichers have not created yet are absent, not null
+            for name in structs:
+                if record[name] is None:
+                    del record[name]
+        entities[entity_id] = record
+
+    return {"metadata": header["metadata"], kind: entities}
+
+
+# =====================================================
+# Paths
+# =====================================================
+
+def snapshot_path(path: str) -> Path:
+    """The store file for a snapshot path given with any suffix."""
+    return Path(path).with_suffix(SNAPSHOT_SUFFIX)
+
+
+def existing_snapshot(path: str) -> Optional[Path]:
+    """Store file if present, else a legacy / debugging .json, else None."""
+    for candidate in (snapshot_path(path), Path(path).with_suffix(".json")):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def snapshot_file(path: str) -> Path:
+    """The file a snapshot is read from, or where it would be written."""
+    return existing_snapshot(path) or snapshot_path(path)
+
+
+# =====================================================
+# Load / Save
+# =====================================================
+
+def write_json_view(snapshot: Dict, path: str, pretty: Optional[bool] = True):
+    """The .json next to path; indented, as a debugging view (pretty=None: JSON_PRETTY)."""
+    serialization.save_json(snapshot, Path(path).with_suffix(".json"), pretty=pretty)
+
+
+def write_parquet(table: "pa.Table", target: Path):
+    """Writes table to target atomically (temp file + rename)."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp, compression=COMPRESSION)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save_snapshot(snapshot: Dict, path: str) -> Path:
+    """Writes the snapshot (atomically) and returns the file written."""
+    target = snapshot_path(path)
+
+    if pq is None:
+        write_json_view(snapshot, target, pretty=None)
+        return target
+
+    write_parquet(to_table(snapshot), target)
+
+    if JSON_VIEW:
+        write_json_view(snapshot, target)
+
+    return target
+
+
+def load_snapshot(path: str) -> Dict:
+    found = existing_snapshot(path)
+    if found is None:
+        raise FileNotFoundError(f"Snapshot not found: {snapshot_path(path)}")
+
+    if found.suffix == ".json":
+        return serialization.load_json(found)
+
+    return from_table(pq.read_table(found))
+
+
+def load_entities(path: str, key: str) -> Dict:
+    """The entities of a snapshot ({} when there is none, e.g. first month)."""
+    if not path or existing_snapshot(path) is None:
+        return {}
+    return load_snapshot(path).get(key, {})
@@ -0,0 +1,102 @@
+"""
+Table Router
+------------
+Single pass over every table of every page of a report, dispatching each
+table to the handler(s) registered for its header signature.
+
+Usage:
+    router = TableRouter("backup")
+    router.add("devices", on_devices, headers=["device", "total status"])
+    router.add("pending", on_pending, contains="pending")
+    router.run(path)
+
+Design:
+- Tables come from common/pdf_tables (all tables per page, cached)
+- A route matches when the header row has all of `headers`, at least one
+  of `any_of`, and `contains` as a substring of the joined header
+- Matching is resolved once per distinct header signature and memoised,
+  so repeated page headers are a dict lookup
+- Every matching route runs (routes are not exclusive)
+- tables_routed / tables_unrouted are counted on the open metrics steps
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from common.metrics import count
+from common.pdf_tables import iter_page_tables
+
+
+Handler = Callable[[List[str], List[List[Optional[str]]]], None]
+
+
+def normalize_header(cell) -> str:
+    return str(cell).strip().lower() if cell else ""
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    handler: Handler
+    headers: Tuple[str, ...] = ()
+    any_of: Tuple[str, ...] = ()
+    contains: Optional[str] = None
+
+    def matches(self, headers: Tuple[str, ...]) -> bool:
+        present = set(headers)
+        if not all(h in present for h in self.headers):
+            return False
+        if self.any_of and not any(h in present for h in self.any_of):
+            return False
+        if self.contains and self.contains not in " ".join(headers):
+            return False
+        return True
+
+
+@dataclass
+class TableRouter:
+    family: Optional[str] = None
+    routes: List[Route] = field(default_factory=list)
+    _lookup: Dict[Tuple[str, ...], List[Route]] = field(default_factory=dict, repr=False)
+
+    def add(
+        self,
+        name: str,
+        handler: Handler,
+        headers: List[str] = (),
+        any_of: List[str] = (),
+        contains: str = None
+    ) -> "TableRouter":
+        self.routes.append(Route(name, handler, tuple(headers), tuple(any_of), contains))
+        self._lookup.clear()
+        return self
+
+    def classify(self, headers: Tuple[str, ...]) -> List[Route]:
+        routes = self._lookup.get(headers)
+        if routes is None:
+            routes = [route for route in self.routes if route.matches(headers)]
+            self._lookup[headers] = routes
+        return routes
+
+    def dispatch(self, table: List[List[Optional[str]]]) -> int:
+        """Routes one table; returns the number of handlers it went to."""
+        if not table or len(table) < 2:
+            return 0
+
+        headers = tuple(normalize_header(h) for h in table[0])
+        routes = self.classify(headers)
+        for route in routes:
+            route.handler(list(headers), table[1:])
+        return len(routes)
+
+    def run(self, path: str, table_settings: Optional[Dict] = None):
+        routed = unrouted = 0
+
+        for _, tables in iter_page_tables(path, table_settings, family=self.family):
+            for table in tables:
+                if self.dispatch(table):
+                    routed += 1
+                else:
+                    unrouted += 1
+
+        count(tables_routed=routed, tables_unrouted=unrouted)
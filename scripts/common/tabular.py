@@ -0,0 +1,389 @@
+"""
+Tabular Readers (CSV / Parquet)
+-------------------------------
+Column-pruned, chunked readers for inventory exports that arrive as CSV
+or Parquet instead of XLSX / PDF (RMM and Entra can export both).
+
+Usage:
+    rows = iter_csv_rows(path)                        # header scan only
+    frame = read_csv_columns(path, skip_rows, width, {"Serial Number": 3})
+    columns = parquet_columns(path)
+    frame = read_parquet_columns(path, ["Serial Number", "Model"])
+
+Design:
+- The parsers decide which columns they need (same synonym tables as the
+  XLSX path); only those columns are decoded, the rest are skipped
+- CSV is read by pyarrow's streaming reader in blocks of CSV_CHUNK_BYTES;
+  without pyarrow, or when rows are ragged (pyarrow can only drop those),
+  by pandas read_csv in chunks of CSV_CHUNK_ROWS
+- Every CSV cell is read as text: missing cells and pandas' default NA
+  strings become NaN, as read_excel hands them over
+- Parquet keeps its column types; row groups are read one batch at a
+  time and each value goes through convert_cell, like an XLSX cell
+- CSV and Parquet columns are then typed as read_excel types a column of
+  those cells (excel_typed), so one inventory gives the same values in
+  every format: a serial column with gaps is float (12345.0), numeric
+  text becomes a number and so on
+- Frames come back as object columns with NaN for missing values, so the
+  XLSX normalization code runs on them unchanged
+- XLSX columns read by openpyxl are typed by read_excel's rules
+  (excel_column), so a serial column with gaps is float (12345.0),
+  numeric text becomes a number and so on; iterrows' per-row upcasts
+  (all-numeric sheets, rows of only blanks and dates) are applied on
+  top, so values are exactly what read_excel + iterrows handed over.
+  A column found to hold text is sanitized chunk by chunk
+  (XLSX_CHUNK_ROWS) and keeps openpyxl's cells; only the others are
+  held raw until the sheet is read
+
+Environment:
+- CSV_CHUNK_BYTES=n   pyarrow block size (default 16 MiB)
+- CSV_CHUNK_ROWS=n    pandas chunk size (default 100,000)
+- XLSX_CHUNK_ROWS=n   rows per XLSX typing chunk (default 10,000)
+"""
+
+import csv
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pa_csv = pq = None
+
+
+CSV_CHUNK_BYTES = int(os.environ.get("CSV_CHUNK_BYTES", 16 << 20))
+CSV_CHUNK_ROWS = int(os.environ.get("CSV_CHUNK_ROWS", 100_000))
+XLSX_CHUNK_ROWS = int(os.environ.get("XLSX_CHUNK_ROWS", 10_000))
+
+# Cell texts read_excel treats as missing (pandas' default na_values).
+# Missing cells are NaN, as they are when rows come from a DataFrame.
+NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null"
+}
+
+NAN = float("nan")
+
+
+# Excel error values; openpyxl (values_only) hands them over as text,
+# read_excel reads them as NaN
+EXCEL_ERRORS = {"#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"}
+
+# Text read_excel turns into bools (pandas' default true / false values)
+BOOL_STRINGS = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+
+
+def excel_cell(value):
+    """A cell as read_excel's openpyxl reader hands it to the parser (before typing)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return NAN if value in EXCEL_ERRORS else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def is_na_cell(value) -> bool:
+    """Whether read_excel reads an excel_cell value as missing."""
+    return isinstance(value, str) and value in NA_STRINGS or isinstance(value, float) and value != value
+
+
+def sanitize_cells(values: List, memo: Dict) -> List:
+    """
+    Cells of an object column as read_excel hands them over: missing
+    ones NaN. pandas' parser memoizes the cells, so equal numbers (True
+    and 1, False and 0) come out as the first one seen; memo carries
+    those across the chunks of one column.
+    """
+    return [
+        NAN if is_na_cell(v) else memo.setdefault(v, v) if isinstance(v, (int, float)) else v
+        for v in values
+    ]
+
+
+def has_text(values: List) -> bool:
+    """
+    Whether a cell holds text read_excel cannot turn into a number or a
+    bool. Such a column stays object whatever the other cells hold, so its
+    cells can be sanitized as they stream by.
+    """
+    words = [v for v in values if isinstance(v, str) and v not in NA_STRINGS and v not in BOOL_STRINGS]
+    return bool(words) and pd.to_numeric(pd.Series(words, dtype=object), errors="coerce").isna().any()
+
+
+def excel_column(values: List) -> pd.Series:
+    """
+    A column of excel_cell values typed as read_excel types it: numbers
+    first (int, float, uint64; bool when every cell is one), then TRUE /
+    FALSE text as bools unless the first cell is a number, then dates and
+    durations as datetime64 / timedelta64, else object.
+    """
+    cells = pd.Series(values, dtype=object)
+    missing = cells.map(is_na_cell)
+    try:
+        numbers = pd.to_numeric(cells.mask(missing, NAN))
+        # Signed and uint64 numbers together: the cells as they are
+        return cells if numbers.dtype == object else numbers
+    except (TypeError, ValueError):
+        cells = pd.Series(sanitize_cells(values, {}), dtype=object)
+
+    if not isinstance(cells.iloc[0], int):
+        booleans = cells.map(lambda v: BOOL_STRINGS.get(v, v) if isinstance(v, str) else v)
+        if (booleans.map(lambda v: isinstance(v, bool)) | missing).all():
+            return booleans if missing.any() else booleans.astype(bool)
+    return cells.infer_objects()
+
+
+def numeric_class(value) -> Optional[Tuple]:
+    """
+    What an excel_cell value adds to the dtype of an all-numeric column:
+    missing, bool, int (sign, uint64 range), float, TRUE / FALSE text, or
+    numeric text by the number it reads as. None when the value makes its
+    column object, and so every iterrows() row too.
+    """
+    if is_na_cell(value):
+        return ("na",)
+    if isinstance(value, bool):
+        return ("bool",)
+    if isinstance(value, int):
+        return ("int", value < 0, value >= 1 << 63)
+    if isinstance(value, float):
+        return ("float",)
+    if not isinstance(value, str):
+        return None
+    if value.strip().lower() in ("true", "false"):
+        return ("bool text", value in BOOL_STRINGS)
+    try:
+        number = pd.to_numeric(pd.Series([value], dtype=object)).iloc[0]
+    except (TypeError, ValueError):
+        return None
+    return ("text",) + numeric_class(number.item())
+
+
+def common_dtype(dtypes: List):
+    """The dtype DataFrame.values (and so iterrows()) gives columns of these dtypes."""
+    return pd.DataFrame({i: pd.Series(dtype=dtype) for i, dtype in enumerate(dtypes)}).values.dtype
+
+
+def date_kind(value) -> Optional[str]:
+    """
+    How an excel_cell value counts towards a datetime64 / timedelta64
+    column or row: "na" when read_excel reads it as missing, "datetime" /
+    "timedelta" for dates and durations, None for anything else.
+    """
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, timedelta):
+        return "timedelta"
+    if isinstance(value, str) and value in NA_STRINGS:
+        return "na"
+    if isinstance(value, float) and value != value:
+        return "na"
+    return None
+
+
+def nat_row(kinds: Set[Optional[str]], date_columns: Set[int]) -> bool:
+    """
+    Whether iterrows() hands a row over as datetimes (or durations), from
+    the date_kind()s of its cells: every cell is missing, a date or a
+    duration (not both of the latter) and at least one is not NaN; a blank
+    under one of date_columns, the sheet's datetime64 / timedelta64
+    columns, is already NaT. Its missing cells then come out as NaT, not NaN.
+    """
+    if None in kinds or kinds >= {"datetime", "timedelta"}:
+        return False
+    return bool(kinds - {"na"} or date_columns)
+
+
+def nat_values(values: List) -> List:
+    """The values of a nat_row() as iterrows() hands them over."""
+    return [
+        pd.NaT if pd.isna(v) else pd.Timedelta(v) if isinstance(v, timedelta) else pd.Timestamp(v)
+        for v in values
+    ]
+
+
+def iterrows_values(frame: pd.DataFrame) -> pd.DataFrame:
+    """Object columns holding what DataFrame.iterrows() hands over for each cell."""
+    return frame.astype(object)
+
+
+def convert_cell(value):
+    """A cell value as read_excel would hand it over."""
+    if value is None:
+        return NAN
+    if isinstance(value, str):
+        return NAN if value in NA_STRINGS else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def is_missing(value) -> bool:
+    return isinstance(value, float) and value != value
+
+
+def excel_typed(frame: pd.DataFrame) -> pd.DataFrame:
+    """Each column typed by excel_column, held as object values with NaN."""
+    if frame.empty:
+        return frame
+    return iterrows_values(pd.DataFrame({name: excel_column(frame[name].tolist()) for name in frame.columns}))
+
+
+def as_object_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Object columns, NaN for every missing value (None / NA / NaN)."""
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), NAN)
+
+
+# =====================================================
+# CSV
+# =====================================================
+
+def iter_csv_rows(path: str) -> Iterator[List[str]]:
+    """
+    Raw rows as lists of strings (csv module), for header detection.
+    Blank lines come through as [] so row numbers match skip_rows.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from csv.reader(f)
+
+
+def csv_lines(path: str, records: int) -> int:
+    """
+    Physical lines taken by the first `records` rows of iter_csv_rows: a
+    quoted cell (a multi-line report title) spans several lines.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        for _ in islice(reader, records):
+            pass
+        return reader.line_num
+
+
+def read_csv_pandas(path: str, skip_rows: int, width: int, positions: Dict[str, int]) -> pd.DataFrame:
+    """
+    pandas C engine in chunks of CSV_CHUNK_ROWS. With the column names
+    given, short rows are padded with NaN and long rows cut to the
+    header's width, as cells of a worksheet row are.
+    """
+    chunks = pd.read_csv(
+        path,
+        header=None,
+        skiprows=skip_rows,
+        names=range(width),
+        usecols=list(positions.values()),
+        index_col=False,
+        dtype=str,
+        na_values=sorted(NA_STRINGS),
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        chunksize=CSV_CHUNK_ROWS
+    )
+    frame = pd.concat(list(chunks), ignore_index=True)
+    return frame.rename(columns={i: name for name, i in positions.items()})
+
+
+def read_csv_arrow(path: str, skip_rows: int, width: int, positions: Dict[str, int]):
+    """
+    pyarrow streaming reader in blocks of CSV_CHUNK_BYTES.
+    Returns (frame, number of rows whose width differs from the header).
+    pyarrow skips physical lines, not CSV rows as pandas does, so skip_rows
+    is turned into the lines those rows take.
+    """
+    fields = [f"f{i}" for i in range(width)]
+    picked = {f"f{i}": name for name, i in positions.items()}
+    ragged = []
+
+    def skip_ragged(row) -> str:
+        ragged.append(row)
+        return "skip"
+
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(
+            skip_rows=csv_lines(path, skip_rows),
+            column_names=fields,
+            block_size=CSV_CHUNK_BYTES
+        ),
+        parse_options=pa_csv.ParseOptions(
+            newlines_in_values=True,
+            invalid_row_handler=skip_ragged
+        ),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in picked},
+            include_columns=list(picked),
+            null_values=sorted(NA_STRINGS),
+            strings_can_be_null=True
+        )
+    )
+
+    batches = [batch.to_pandas() for batch in reader]
+    if not batches:
+        return pd.DataFrame({name: [] for name in positions}, dtype=object), len(ragged)
+
+    return pd.concat(batches, ignore_index=True).rename(columns=picked), len(ragged)
+
+
+def read_csv_columns(
+    path: str,
+    skip_rows: int,
+    width: int,
+    positions: Dict[str, int]
+) -> pd.DataFrame:
+    """
+    Columns {name: position} of the rows after the first skip_rows rows
+    (title rows and the header), typed from their text as read_excel
+    types cells. width is the header's column count.
+    """
+    if not positions:
+        return pd.DataFrame()
+
+    if pa_csv is None:
+        frame = read_csv_pandas(path, skip_rows, width, positions)
+    else:
+        frame, ragged = read_csv_arrow(path, skip_rows, width, positions)
+        if ragged:
+            # pyarrow can only drop rows of the wrong width; pandas pads them
+            print(f"⚠️ {ragged} CSV row(s) differ from the header's width — re-reading with pandas")
+            frame = read_csv_pandas(path, skip_rows, width, positions)
+
+    return excel_typed(as_object_frame(frame[list(positions)]))
+
+
+# =====================================================
+# Parquet
+# =====================================================
+
+def parquet_columns(path: str) -> List[str]:
+    if pq is None:
+        return list(pd.read_parquet(path).columns)
+    return list(pq.ParquetFile(path).schema_arrow.names)
+
+
+def read_parquet_columns(path: str, columns: List[str]) -> pd.DataFrame:
+    """
+    The named columns, one record batch at a time, their values typed
+    as read_excel types the same cells.
+    """
+    if not columns:
+        return pd.DataFrame()
+
+    if pq is None:
+        frame = pd.read_parquet(path, columns=columns)
+    else:
+        parquet = pq.ParquetFile(path)
+        batches = [batch.to_pandas() for batch in parquet.iter_batches(columns=columns)]
+        if not batches:
+            return pd.DataFrame({name: [] for name in columns}, dtype=object)
+        frame = pd.concat(batches, ignore_index=True)
+
+    return excel_typed(as_object_frame(frame).map(convert_cell))
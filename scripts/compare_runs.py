@@ -0,0 +1,74 @@
+"""
+Run Comparison
+--------------
+Compares two run manifests (runs/<client>/<month>/manifest.json) and
+prints per-step wall time, CPU time and peak RSS deltas.
+
+Exit code 1 with --fail-on-regression when any step regressed.
+"""
+
+import sys
+
+from pipeline.run_manifest import compare_run_manifests, load_run_manifest
+
+
+# =====================================================
+# Formatting
+# =====================================================
+
+def fmt_value(value, unit: str) -> str:
+    return "-" if value is None else f"{value:.2f}{unit}"
+
+
+def fmt_delta(delta) -> str:
+    return "" if delta is None else f"{delta:+.1f}%"
+
+
+def print_comparison(rows, base_label: str, head_label: str):
+    print(f"base: {base_label}")
+    print(f"head: {head_label}\n")
+
+    header = f"{'step':<40} {'wall':>20} {'cpu':>20} {'peak rss':>24}"
+    print(header)
+    print("-" * len(header))
+
+    for row in rows:
+        cells = []
+        for metric, unit, width in (("wall_s", "s", 20), ("cpu_s", "s", 20), ("peak_rss_mb", "MB", 24)):
+            m = row[metric]
+            text = f"{fmt_value(m['head'], unit)} {fmt_delta(m['delta_pct'])}".strip()
+            cells.append(f"{text:>{width}}")
+        flag = " ⚠️ " + ",".join(row["regressions"]) if row["regressions"] else ""
+        print(f"{row['step'][:40]:<40} {''.join(cells)}{flag}")
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare two pipeline run manifests")
+    parser.add_argument("base", help="Baseline manifest.json")
+    parser.add_argument("head", help="Manifest to check for regressions")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true")
+
+    args = parser.parse_args()
+
+    rows = compare_run_manifests(
+        load_run_manifest(args.base),
+        load_run_manifest(args.head),
+        threshold_pct=args.threshold
+    )
+
+    print_comparison(rows, args.base, args.head)
+
+    regressed = [row["step"] for row in rows if row["regressions"]]
+    if regressed:
+        print(f"\n⚠️ {len(regressed)} step(s) regressed by more than {args.threshold}%")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("\n✅ No regressions")
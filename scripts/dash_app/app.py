@@ -1,12 +1,11 @@
 # scripts/dash_app/app.py
 
-import json
-from pathlib import Path
-
 import dash
 import dash_bootstrap_components as dbc
 
-from layout import build_layout
+from common import serialization
+from dash_app.layout import build_layout
+from pipeline.layout import DATA
 
 
 
@@ -15,13 +14,12 @@ from layout import build_layout
 # Load dashboard snapshot (AUTHORITATIVE)
 # =====================================================
 
-DASHBOARD_JSON = Path("data/dashboard/2025-11-dashboard.json")
+DASHBOARD_JSON = DATA / "dashboard" / "2025-11-dashboard.json"
 
 if not DASHBOARD_JSON.exists():
     raise FileNotFoundError(f"Dashboard data not found: {DASHBOARD_JSON}")
 
-with open(DASHBOARD_JSON, "r", encoding="utf-8") as f:
-    data = json.load(f)
+data = serialization.load_json(DASHBOARD_JSON)
 
 # 🔴 HARD ASSERTS (to catch silent bugs)
 assert "client" in data
@@ -10,11 +10,12 @@ Design principles:
 - Fully explainable
 """
 
-import json
 import os
 from datetime import datetime
 from typing import Dict
 
+from common import serialization
+
 
 # =====================================================
 # Utilities
@@ -23,14 +24,11 @@ from typing import Dict
 def load_json(path: str) -> Dict:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Missing required file: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return serialization.load_json(path)
 
 
 def save_json(data: Dict, path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    serialization.save_json(data, path)
 
 
 # =====================================================
@@ -110,15 +108,10 @@ def extract_security(insights: Dict) -> Dict:
 # Main Aggregator
 # =====================================================
 
-def build_dashboard(
-    client: str,
-    month: str,
-    insights_path: str,
-    output_path: str
-):
-    insights = load_json(insights_path)
+def assemble_dashboard(client: str, month: str, insights: Dict, reports_dir: str = None) -> Dict:
+    reports_dir = reports_dir or f"reports/{month}"
 
-    dashboard = {
+    return {
         # Dash-safe identity
         "client": client,
         "month": month,
@@ -141,11 +134,21 @@ def build_dashboard(
 
         # Artifacts
         "artifacts": {
-            "executive_report_pdf": f"reports/{month}/executive_report.pdf",
-            "executive_report_md": f"reports/{month}/executive_report_polished.md"
+            "executive_report_pdf": f"{reports_dir}/executive_report.pdf",
+            "executive_report_md": f"{reports_dir}/executive_report_polished.md"
         }
     }
 
+
+def build_dashboard(
+    client: str,
+    month: str,
+    insights_path: str,
+    output_path: str
+):
+    insights = load_json(insights_path)
+    dashboard = assemble_dashboard(client, month, insights)
+
     save_json(dashboard, output_path)
 
     print("✅ Dashboard snapshot generated")
@@ -1,6 +1,6 @@
 import dash_bootstrap_components as dbc
 from dash import html
-from components.kpi_cards import kpi_card
+from dash_app.components.kpi_cards import kpi_card
 
 
 # -------------------------------------------------
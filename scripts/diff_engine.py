@@ -6,21 +6,39 @@ Compares month-to-month user & asset snapshots and produces a change log.
 Phase: 1 (DB-less)
 """
 
-import json
-import os
 from datetime import datetime
 from typing import Dict
 
+from common import history_store, serialization, snapshot_store
+from pipeline.layout import LEGACY_CLIENT
+
 
 # =========================
 # Loaders
 # =========================
 
 def load_snapshot(path: str, key: str) -> Dict:
-    if not os.path.exists(path):
-        return {}
-    with open(path, "r") as f:
-        return json.load(f).get(key, {})
+    return snapshot_store.load_entities(path, key)
+
+
+def load_history_months(history: str, client: str, from_month: str, to_month: str) -> Dict:
+    """
+    Both months' users / assets from the history store. Without
+    from_month, the latest month on record before to_month is used.
+    """
+    with history_store.HistoryStore(history) as store:
+        from_month = from_month or store.previous_month(client, to_month)
+        if not from_month:
+            raise LookupError(f"No month before {to_month} on record for {client}")
+
+        return {
+            "prev_users": store.load_entities(client, from_month, "users"),
+            "curr_users": store.load_entities(client, to_month, "users"),
+            "prev_assets": store.load_entities(client, from_month, "assets"),
+            "curr_assets": store.load_entities(client, to_month, "assets"),
+            "from_month": from_month,
+            "to_month": to_month
+        }
 
 
 # =========================
@@ -128,28 +146,24 @@ def generate_metrics(prev_users, curr_users, prev_assets, curr_assets):
 # Main
 # =========================
 
-def generate_diff(
-    prev_users_path: str,
-    curr_users_path: str,
-    prev_assets_path: str,
-    curr_assets_path: str,
-    output_path: str,
+def build_diff(
+    prev_users: Dict,
+    curr_users: Dict,
+    prev_assets: Dict,
+    curr_assets: Dict,
     from_month: str,
     to_month: str
-):
-    prev_users = load_snapshot(prev_users_path, "users")
-    curr_users = load_snapshot(curr_users_path, "users")
-
-    prev_assets = load_snapshot(prev_assets_path, "assets")
-    curr_assets = load_snapshot(curr_assets_path, "assets")
-
+) -> Dict:
+    """
+    Builds the month-to-month change log from in-memory user / asset maps.
+    """
     user_diff = diff_users(prev_users, curr_users)
     asset_diff = diff_assets(prev_assets, curr_assets)
 
     alerts = generate_alerts(user_diff, asset_diff, curr_assets)
     metrics = generate_metrics(prev_users, curr_users, prev_assets, curr_assets)
 
-    diff_report = {
+    return {
         "metadata": {
             "from_month": from_month,
             "to_month": to_month,
@@ -161,10 +175,46 @@ def generate_diff(
         "alerts": alerts
     }
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, "w") as f:
-        json.dump(diff_report, f, indent=2)
+def save_diff(diff_report: Dict, output_path: str):
+    serialization.save_json(diff_report, output_path)
+
+
+def generate_diff(
+    prev_users_path: str,
+    curr_users_path: str,
+    prev_assets_path: str,
+    curr_assets_path: str,
+    output_path: str,
+    from_month: str,
+    to_month: str,
+    history: str = "",
+    client: str = LEGACY_CLIENT
+):
+    """
+    With a history store, both months are read from it when no snapshot
+    files are given, and the alerts are recorded in it.
+    """
+    if history and not curr_users_path:
+        snapshots = load_history_months(history, client, from_month, to_month)
+    else:
+        snapshots = {
+            "prev_users": load_snapshot(prev_users_path, "users"),
+            "curr_users": load_snapshot(curr_users_path, "users"),
+            "prev_assets": load_snapshot(prev_assets_path, "assets"),
+            "curr_assets": load_snapshot(curr_assets_path, "assets"),
+            "from_month": from_month,
+            "to_month": to_month
+        }
+
+    diff_report = build_diff(**snapshots)
+
+    save_diff(diff_report, output_path)
+
+    if history:
+        history_store.record_alerts(history, client, to_month, diff_report["alerts"])
+
+    metrics = diff_report["metrics"]
 
     print("✅ Diff generated successfully")
     print(f"📄 Output: {output_path}")
@@ -180,16 +230,22 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Monthly Diff Engine")
-    parser.add_argument("--prev-users", required=True)
-    parser.add_argument("--curr-users", required=True)
-    parser.add_argument("--prev-assets", required=True)
-    parser.add_argument("--curr-assets", required=True)
-    parser.add_argument("--from-month", required=True)
+    parser.add_argument("--prev-users", default="")
+    parser.add_argument("--curr-users", default="")
+    parser.add_argument("--prev-assets", default="")
+    parser.add_argument("--curr-assets", default="")
+    parser.add_argument("--from-month", default="", help="Default with --history: latest month on record")
     parser.add_argument("--to-month", required=True)
     parser.add_argument("--output", required=True)
+    parser.add_argument("--history", default="", help="History store (SQLite) to read months from / record alerts in")
+    parser.add_argument("--client", default=LEGACY_CLIENT, help="Client the months are recorded under")
 
     args = parser.parse_args()
 
+    snapshots = [args.prev_users, args.curr_users, args.prev_assets, args.curr_assets]
+    if not args.history and not (all(snapshots) and args.from_month):
+        parser.error("the four snapshot paths and --from-month are required without --history")
+
     generate_diff(
         prev_users_path=args.prev_users,
         curr_users_path=args.curr_users,
@@ -197,5 +253,7 @@ if __name__ == "__main__":
         curr_assets_path=args.curr_assets,
         output_path=args.output,
         from_month=args.from_month,
-        to_month=args.to_month
+        to_month=args.to_month,
+        history=args.history,
+        client=args.client
     )
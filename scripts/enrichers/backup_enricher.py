@@ -9,14 +9,17 @@ Design principles:
 - Backup identity = DEVICE NAME (observational)
 - Bridge device_name → serial safely
 - Conservative defaults (assume enabled unless proven otherwise)
+- Emits an overlay (asset_id → backup_state fields), not a copy of
+  the snapshot (common/overlays.py)
 """
 
-import json
-import os
-from datetime import datetime
 from typing import Dict, List
 
-import pdfplumber
+
+from common import history_store, overlays, snapshot_store
+from common.metrics import timed
+from common.table_router import TableRouter
+from pipeline.layout import LEGACY_CLIENT
 
 
 # =====================================================
@@ -36,22 +39,14 @@ def normalize_device(name: str) -> str:
 
 
 def load_assets(path: str) -> Dict:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Assets file not found: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def save_assets(data: Dict, path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    return snapshot_store.load_snapshot(path)
 
 
 # =====================================================
 # Step 1: Build device-name → serial mapping
 # =====================================================
 
+@timed
 def build_device_index(assets: Dict) -> Dict[str, List[str]]:
     """
     Returns:
@@ -74,6 +69,7 @@ def build_device_index(assets: Dict) -> Dict[str, List[str]]:
 # Step 2: Parse Backup PDF (device-name based)
 # =====================================================
 
+@timed
 def parse_backup_pdf(path: str) -> Dict[str, dict]:
     """
     Returns:
@@ -89,58 +85,57 @@ def parse_backup_pdf(path: str) -> Dict[str, dict]:
     failures = set()
     pending = set()
 
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            table = page.extract_table()
-            if not table or len(table) < 2:
+    # -------------------------
+    # Main Devices Table
+    # -------------------------
+    def on_devices(headers, rows):
+        for row in rows:
+            data = dict(zip(headers, row))
+            name = normalize_device(data.get("device"))
+            status_raw = str(data.get("total status", "")).lower()
+
+            if not name:
                 continue
 
-            headers = [str(h).lower().strip() if h else "" for h in table[0]]
-
-            # -------------------------
-            # Main Devices Table
-            # -------------------------
-            if "device" in headers and "total status" in headers:
-                for row in table[1:]:
-                    data = dict(zip(headers, row))
-                    name = normalize_device(data.get("device"))
-                    status_raw = str(data.get("total status", "")).lower()
-
-                    if not name:
-                        continue
-
-                    if "completed" in status_raw and "error" not in status_raw:
-                        status = "healthy"
-                    elif "completed" in status_raw and "error" in status_raw:
-                        status = "warning"
-                    elif "process" in status_raw:
-                        status = "in_progress"
-                    else:
-                        status = "unknown"
-
-                    devices[name] = {
-                        "enabled": True,
-                        "status": status
-                    }
-
-            # -------------------------
-            # Backup Failures
-            # -------------------------
-            if "failure reason" in headers and "device" in headers:
-                for row in table[1:]:
-                    data = dict(zip(headers, row))
-                    name = normalize_device(data.get("device"))
-                    if name:
-                        failures.add(name)
-
-            # -------------------------
-            # Pending Installation
-            # -------------------------
-            if "pending" in " ".join(headers):
-                for row in table[1:]:
-                    name = normalize_device(row[0])
-                    if name:
-                        pending.add(name)
+            if "completed" in status_raw and "error" not in status_raw:
+                status = "healthy"
+            elif "completed" in status_raw and "error" in status_raw:
+                status = "warning"
+            elif "process" in status_raw:
+                status = "in_progress"
+            else:
+                status = "unknown"
+
+            devices[name] = {
+                "enabled": True,
+                "status": status
+            }
+
+    # -------------------------
+    # Backup Failures
+    # -------------------------
+    def on_failures(headers, rows):
+        for row in rows:
+            data = dict(zip(headers, row))
+            name = normalize_device(data.get("device"))
+            if name:
+                failures.add(name)
+
+    # -------------------------
+    # Pending Installation
+    # -------------------------
+    def on_pending(headers, rows):
+        for row in rows:
+            name = normalize_device(row[0])
+            if name:
+                pending.add(name)
+
+    # Every table on every page, routed by header in one pass
+    router = TableRouter("backup")
+    router.add("devices", on_devices, headers=["device", "total status"])
+    router.add("failures", on_failures, headers=["failure reason", "device"])
+    router.add("pending", on_pending, contains="pending")
+    router.run(path)
 
     # Apply failures
     for name in failures:
@@ -163,60 +158,107 @@ def parse_backup_pdf(path: str) -> Dict[str, dict]:
 # Step 3: Enrich assets via bridge
 # =====================================================
 
-def enrich_assets_with_backup(assets: Dict, device_index: Dict, backup_devices: Dict):
+@timed
+def backup_fields(device_index: Dict, backup_devices: Dict) -> Dict[str, dict]:
     """
-    Applies backup state to serial-based assets
+    The backup_state fields applied to serial-based assets:
+    {
+      asset_id: {enabled, status, risk_level}
+    }
     """
+    entities = {}
 
     for device_name, asset_ids in device_index.items():
 
         backup = backup_devices.get(device_name)
 
-        for asset_id in asset_ids:
-            asset = assets["assets"][asset_id]
-
-            if "backup_state" not in asset:
-                asset["backup_state"] = {}
+        if backup:
+            if backup["status"] == "healthy":
+                risk_level = "low"
+            elif backup["status"] in ("in_progress", "warning"):
+                risk_level = "medium"
+            elif backup["status"] == "failed":
+                risk_level = "high"
+            else:
+                risk_level = "unknown"
+
+            fields = {
+                "enabled": backup["enabled"],
+                "status": backup["status"],
+                "risk_level": risk_level
+            }
+
+        else:
+            # Conservative default: device exists in inventory but
+            # was not explicitly listed as failing or pending
+            fields = {
+                "enabled": True,
+                "status": "assumed_enabled",
+                "risk_level": "medium"
+            }
 
-            if backup:
-                asset["backup_state"]["enabled"] = backup["enabled"]
-                asset["backup_state"]["status"] = backup["status"]
+        for asset_id in asset_ids:
+            entities[asset_id] = dict(fields)
 
-                if backup["status"] == "healthy":
-                    asset["backup_state"]["risk_level"] = "low"
-                elif backup["status"] in ("in_progress", "warning"):
-                    asset["backup_state"]["risk_level"] = "medium"
-                elif backup["status"] == "failed":
-                    asset["backup_state"]["risk_level"] = "high"
-                else:
-                    asset["backup_state"]["risk_level"] = "unknown"
-
-            else:
-                # Conservative default: device exists in inventory but
-                # was not explicitly listed as failing or pending
-                asset["backup_state"]["enabled"] = True
-                asset["backup_state"]["status"] = "assumed_enabled"
-                asset["backup_state"]["risk_level"] = "medium"
+    return entities
 
 
 # =====================================================
 # Main Orchestrator
 # =====================================================
 
-def run_backup_enrichment(asset_snapshot_path, backup_report_path, output_path):
-    assets = load_assets(asset_snapshot_path)
-
+def build_backup_overlay(assets: Dict, backup_devices: Dict) -> Dict:
+    """
+    Backup overlay of an asset snapshot from already-parsed backup data
+    (the snapshot itself is not modified)
+    """
     device_index = build_device_index(assets)
-    backup_devices = parse_backup_pdf(backup_report_path)
 
-    enrich_assets_with_backup(assets, device_index, backup_devices)
+    return overlays.make_overlay("backup", assets, backup_fields(device_index, backup_devices))
+
+
+def apply_backup_data(assets: Dict, backup_devices: Dict) -> Dict:
+    """
+    Enriches an in-memory asset snapshot from already-parsed backup data
+    """
+    return overlays.apply_overlay(assets, build_backup_overlay(assets, backup_devices))
+
 
-    assets["metadata"]["backup_enriched_at"] = datetime.utcnow().isoformat() + "Z"
+def apply_backup_enrichment(assets: Dict, backup_report_path: str) -> Dict:
+    """
+    Enriches an in-memory asset snapshot and returns it
+    """
+    return apply_backup_data(assets, parse_backup_pdf(backup_report_path))
 
-    save_assets(assets, output_path)
+
+def run_backup_enrichment(
+    asset_snapshot_path: str,
+    backup_report_path: str,
+    output_path: str,
+    history: str = "",
+    client: str = LEGACY_CLIENT,
+    month: str = ""
+):
+    """
+    Writes the backup overlay of the asset snapshot. With a history
+    store, the snapshot is read from it when no snapshot file is given,
+    and the overlay is recorded as backup observations.
+    """
+    if asset_snapshot_path:
+        assets = load_assets(asset_snapshot_path)
+    else:
+        assets = history_store.load_month(history, client, month, "assets", enriched=False)
+
+    overlay = build_backup_overlay(assets, parse_backup_pdf(backup_report_path))
+
+    written = overlays.save_overlay(overlay, output_path)
 
     print("✅ Backup enrichment completed")
-    print(f"📄 Enriched asset file written to: {output_path}")
+    print(f"📄 Backup overlay written to: {written}")
+
+    if history:
+        history_store.record_enrichment(history, client, overlay)
+        print(f"🗄 History store: {history}")
 
 
 # =====================================================
@@ -227,16 +269,25 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Backup Enricher (Serial-safe)")
-    parser.add_argument("--assets", required=True, help="Asset snapshot JSON")
+    parser.add_argument("--assets", default="", help="Asset snapshot (.parquet, or legacy .json); omit to read it from --history")
     parser.add_argument("--backup-report", required=True, help="Backup PDF report")
-    parser.add_argument("--output", required=True, help="Output enriched JSON")
+    parser.add_argument("--output", required=True, help="Output backup overlay (.parquet)")
+    parser.add_argument("--history", default="", help="History store (SQLite) to read / record the month in")
+    parser.add_argument("--client", default=LEGACY_CLIENT, help="Client the month is recorded under")
+    parser.add_argument("--month", default="", help="Month to read from --history (YYYY-MM)")
 
     args = parser.parse_args()
 
+    if not args.assets and not (args.history and args.month):
+        parser.error("either --assets or --history with --month is required")
+
     run_backup_enrichment(
         asset_snapshot_path=args.assets,
         backup_report_path=args.backup_report,
-        output_path=args.output
+        output_path=args.output,
+        history=args.history,
+        client=args.client,
+        month=args.month
     )
 
 
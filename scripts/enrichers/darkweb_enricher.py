@@ -8,16 +8,19 @@ Design:
 - No new users created
 - Email-based matching
 - Safe enrichment only
+- Emits an overlay (email → risk_signals fields), not a copy of the
+  snapshot (common/overlays.py)
 """
 
-import json
-import os
-from datetime import datetime
 from typing import Dict
 
-import pdfplumber
 import pandas as pd
 
+from common import history_store, overlays, snapshot_store
+from common.metrics import timed
+from common.table_router import TableRouter
+from pipeline.layout import LEGACY_CLIENT
+
 
 # =====================================================
 # Utilities
@@ -30,22 +33,14 @@ def normalize_email(email: str) -> str:
 
 
 def load_users(path: str) -> Dict:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Users file not found: {path}")
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def save_users(data: Dict, path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    return snapshot_store.load_snapshot(path)
 
 
 # =====================================================
 # Dark Web Parsing (PDF)
 # =====================================================
 
+@timed
 def parse_darkweb_pdf(path: str) -> Dict[str, dict]:
     """
     Parses Dark Web PDF reports and returns:
@@ -60,47 +55,44 @@ def parse_darkweb_pdf(path: str) -> Dict[str, dict]:
 
     darkweb_data = {}
 
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            table = page.extract_table()
-            if not table or len(table) < 2:
-                continue
+    def on_table(headers, rows):
+        for row in rows:
+            data = dict(zip(headers, row))
 
-            headers = [str(h).strip().lower() for h in table[0]]
+            email = normalize_email(
+                data.get("email")
+                or data.get("email address")
+                or data.get("user")
+                or ""
+            )
 
-            for row in table[1:]:
-                data = dict(zip(headers, row))
-
-                email = normalize_email(
-                    data.get("email")
-                    or data.get("email address")
-                    or data.get("user")
-                    or ""
-                )
+            if not email:
+                continue
 
-                if not email:
-                    continue
+            source = (
+                str(data.get("breach source", "")).strip()
+                or str(data.get("source", "")).strip()
+                or "unknown"
+            )
 
-                source = (
-                    str(data.get("breach source", "")).strip()
-                    or str(data.get("source", "")).strip()
-                    or "unknown"
-                )
+            severity_raw = str(data.get("severity", "")).lower()
 
-                severity_raw = str(data.get("severity", "")).lower()
+            if "high" in severity_raw:
+                severity = "high"
+            elif "medium" in severity_raw:
+                severity = "medium"
+            else:
+                severity = "low"
 
-                if "high" in severity_raw:
-                    severity = "high"
-                elif "medium" in severity_raw:
-                    severity = "medium"
-                else:
-                    severity = "low"
+            darkweb_data[email] = {
+                "exposed": True,
+                "source": source,
+                "severity": severity
+            }
 
-                darkweb_data[email] = {
-                    "exposed": True,
-                    "source": source,
-                    "severity": severity
-                }
+    router = TableRouter("darkweb")
+    router.add("exposures", on_table, any_of=["email", "email address", "user"])
+    router.run(path)
 
     return darkweb_data
 
@@ -109,45 +101,90 @@ def parse_darkweb_pdf(path: str) -> Dict[str, dict]:
 # Enrichment Logic
 # =====================================================
 
-def enrich_users_with_darkweb(users: Dict, darkweb_data: Dict):
+@timed
+def darkweb_fields(users: Dict, darkweb_data: Dict) -> Dict[str, dict]:
     """
-    Merges dark web exposure data into existing users
+    The risk_signals fields dark web monitoring sets, per user:
+    {
+      email: {dark_web_exposed, dark_web_source, dark_web_severity}
+    }
     """
+    entities = {}
 
-    for email, user in users["users"].items():
+    for email in users["users"]:
 
         exposure = darkweb_data.get(email)
 
         if exposure:
-            user["risk_signals"]["dark_web_exposed"] = True
-            user["risk_signals"]["dark_web_source"] = exposure["source"]
-            user["risk_signals"]["dark_web_severity"] = exposure["severity"]
+            entities[email] = {
+                "dark_web_exposed": True,
+                "dark_web_source": exposure["source"],
+                "dark_web_severity": exposure["severity"]
+            }
 
         else:
-            user["risk_signals"]["dark_web_exposed"] = False
-            user["risk_signals"]["dark_web_severity"] = "none"
+            entities[email] = {
+                "dark_web_exposed": False,
+                "dark_web_severity": "none"
+            }
+
+    return entities
 
 
 # =====================================================
 # Main Orchestrator
 # =====================================================
 
+def build_darkweb_overlay(users: Dict, darkweb_data: Dict) -> Dict:
+    """
+    Dark Web overlay of a user snapshot from already-parsed dark web data
+    (the snapshot itself is not modified)
+    """
+    return overlays.make_overlay("darkweb", users, darkweb_fields(users, darkweb_data))
+
+
+def apply_darkweb_data(users: Dict, darkweb_data: Dict) -> Dict:
+    """
+    Enriches an in-memory user snapshot from already-parsed dark web data
+    """
+    return overlays.apply_overlay(users, build_darkweb_overlay(users, darkweb_data))
+
+
+def apply_darkweb_enrichment(users: Dict, darkweb_report_path: str) -> Dict:
+    """
+    Enriches an in-memory user snapshot and returns it
+    """
+    return apply_darkweb_data(users, parse_darkweb_pdf(darkweb_report_path))
+
+
 def run_darkweb_enrichment(
     user_snapshot_path: str,
     darkweb_report_path: str,
-    output_path: str
+    output_path: str,
+    history: str = "",
+    client: str = LEGACY_CLIENT,
+    month: str = ""
 ):
-    users = load_users(user_snapshot_path)
-    darkweb_data = parse_darkweb_pdf(darkweb_report_path)
-
-    enrich_users_with_darkweb(users, darkweb_data)
+    """
+    Writes the dark web overlay of the user snapshot. With a history
+    store, the snapshot is read from it when no snapshot file is given,
+    and the overlay is recorded as darkweb observations.
+    """
+    if user_snapshot_path:
+        users = load_users(user_snapshot_path)
+    else:
+        users = history_store.load_month(history, client, month, "users", enriched=False)
 
-    users["metadata"]["darkweb_enriched_at"] = datetime.utcnow().isoformat() + "Z"
+    overlay = build_darkweb_overlay(users, parse_darkweb_pdf(darkweb_report_path))
 
-    save_users(users, output_path)
+    written = overlays.save_overlay(overlay, output_path)
 
     print("✅ Dark Web enrichment completed")
-    print(f"📄 Enriched user file written to: {output_path}")
+    print(f"📄 Dark Web overlay written to: {written}")
+
+    if history:
+        history_store.record_enrichment(history, client, overlay)
+        print(f"🗄 History store: {history}")
 
 
 # =====================================================
@@ -158,14 +195,23 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Dark Web Enricher")
-    parser.add_argument("--users", required=True, help="Path to user snapshot JSON")
+    parser.add_argument("--users", default="", help="Path to user snapshot (.parquet, or legacy .json); omit to read it from --history")
     parser.add_argument("--darkweb-report", required=True, help="Path to Dark Web PDF report")
-    parser.add_argument("--output", required=True, help="Output enriched user JSON")
+    parser.add_argument("--output", required=True, help="Output dark web overlay (.parquet)")
+    parser.add_argument("--history", default="", help="History store (SQLite) to read / record the month in")
+    parser.add_argument("--client", default=LEGACY_CLIENT, help="Client the month is recorded under")
+    parser.add_argument("--month", default="", help="Month to read from --history (YYYY-MM)")
 
     args = parser.parse_args()
 
+    if not args.users and not (args.history and args.month):
+        parser.error("either --users or --history with --month is required")
+
     run_darkweb_enrichment(
         user_snapshot_path=args.users,
         darkweb_report_path=args.darkweb_report,
-        output_path=args.output
+        output_path=args.output,
+        history=args.history,
+        client=args.client,
+        month=args.month
     )
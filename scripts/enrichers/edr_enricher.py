@@ -8,15 +8,18 @@ Design:
 - No new assets created
 - Serial-number–based asset matching
 - Safe enrichment only
+- Emits an overlay (asset_id → security_state fields), not a copy of
+  the snapshot (common/overlays.py)
 """
 
-import json
-import os
-from datetime import datetime
 from typing import Dict
 
 import pandas as pd
-import pdfplumber
+
+from common import history_store, overlays, snapshot_store
+from common.metrics import timed
+from common.table_router import TableRouter
+from pipeline.layout import LEGACY_CLIENT
 
 
 # =====================================================
@@ -30,22 +33,14 @@ def normalize_serial(serial: str) -> str:
 
 
 def load_assets(path: str) -> Dict:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Assets file not found: {path}")
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def save_assets(data: Dict, path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    return snapshot_store.load_snapshot(path)
 
 
 # =====================================================
 # EDR Parsing (PDF)
 # =====================================================
 
+@timed
 def parse_edr_pdf(path: str) -> Dict[str, dict]:
     """
     Parses EDR PDF reports and returns:
@@ -59,33 +54,30 @@ def parse_edr_pdf(path: str) -> Dict[str, dict]:
 
     edr_data = {}
 
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            table = page.extract_table()
-            if not table or len(table) < 2:
-                continue
+    def on_table(headers, rows):
+        for row in rows:
+            data = dict(zip(headers, row))
 
-            headers = [str(h).strip().lower() for h in table[0]]
+            serial = normalize_serial(
+                data.get("serial number")
+                or data.get("serial")
+                or ""
+            )
 
-            for row in table[1:]:
-                data = dict(zip(headers, row))
-
-                serial = normalize_serial(
-                    data.get("serial number")
-                    or data.get("serial")
-                    or ""
-                )
+            if not serial:
+                continue
 
-                if not serial:
-                    continue
+            alerts = int(data.get("alerts", 0) or 0)
+            incidents = int(data.get("incidents", 0) or 0)
 
-                alerts = int(data.get("alerts", 0) or 0)
-                incidents = int(data.get("incidents", 0) or 0)
+            edr_data[serial] = {
+                "alerts": alerts,
+                "incidents": incidents
+            }
 
-                edr_data[serial] = {
-                    "alerts": alerts,
-                    "incidents": incidents
-                }
+    router = TableRouter("edr")
+    router.add("devices", on_table, any_of=["serial number", "serial"])
+    router.run(path)
 
     return edr_data
 
@@ -94,10 +86,15 @@ def parse_edr_pdf(path: str) -> Dict[str, dict]:
 # Enrichment Logic
 # =====================================================
 
-def enrich_assets_with_edr(assets: Dict, edr_data: Dict):
+@timed
+def edr_fields(assets: Dict, edr_data: Dict) -> Dict[str, dict]:
     """
-    Merges EDR data into existing assets
+    The security_state fields EDR sets, per asset:
+    {
+      asset_id: {edr_installed, edr_alerts, edr_incidents, risk_level}
+    }
     """
+    entities = {}
 
     for asset_id, asset in assets["assets"].items():
 
@@ -109,42 +106,83 @@ def enrich_assets_with_edr(assets: Dict, edr_data: Dict):
         edr = edr_data.get(serial)
 
         if edr:
-            asset["security_state"]["edr_installed"] = True
-            asset["security_state"]["edr_alerts"] = edr["alerts"]
-            asset["security_state"]["edr_incidents"] = edr["incidents"]
-
             if edr["incidents"] > 0:
-                asset["security_state"]["risk_level"] = "high"
+                risk_level = "high"
             elif edr["alerts"] > 0:
-                asset["security_state"]["risk_level"] = "medium"
+                risk_level = "medium"
             else:
-                asset["security_state"]["risk_level"] = "low"
+                risk_level = "low"
+
+            entities[asset_id] = {
+                "edr_installed": True,
+                "edr_alerts": edr["alerts"],
+                "edr_incidents": edr["incidents"],
+                "risk_level": risk_level
+            }
 
         else:
-            asset["security_state"]["edr_installed"] = False
-            asset["security_state"]["risk_level"] = "unknown"
+            entities[asset_id] = {
+                "edr_installed": False,
+                "risk_level": "unknown"
+            }
+
+    return entities
 
 
 # =====================================================
 # Main Orchestrator
 # =====================================================
 
+def build_edr_overlay(assets: Dict, edr_data: Dict) -> Dict:
+    """
+    EDR overlay of an asset snapshot from already-parsed EDR data
+    (the snapshot itself is not modified)
+    """
+    return overlays.make_overlay("edr", assets, edr_fields(assets, edr_data))
+
+
+def apply_edr_data(assets: Dict, edr_data: Dict) -> Dict:
+    """
+    Enriches an in-memory asset snapshot from already-parsed EDR data
+    """
+    return overlays.apply_overlay(assets, build_edr_overlay(assets, edr_data))
+
+
+def apply_edr_enrichment(assets: Dict, edr_report_path: str) -> Dict:
+    """
+    Enriches an in-memory asset snapshot and returns it
+    """
+    return apply_edr_data(assets, parse_edr_pdf(edr_report_path))
+
+
 def run_edr_enrichment(
     asset_snapshot_path: str,
     edr_report_path: str,
-    output_path: str
+    output_path: str,
+    history: str = "",
+    client: str = LEGACY_CLIENT,
+    month: str = ""
 ):
-    assets = load_assets(asset_snapshot_path)
-    edr_data = parse_edr_pdf(edr_report_path)
-
-    enrich_assets_with_edr(assets, edr_data)
+    """
+    Writes the EDR overlay of the asset snapshot. With a history store,
+    the snapshot is read from it when no snapshot file is given, and the
+    overlay is recorded as edr observations.
+    """
+    if asset_snapshot_path:
+        assets = load_assets(asset_snapshot_path)
+    else:
+        assets = history_store.load_month(history, client, month, "assets", enriched=False)
 
-    assets["metadata"]["edr_enriched_at"] = datetime.utcnow().isoformat() + "Z"
+    overlay = build_edr_overlay(assets, parse_edr_pdf(edr_report_path))
 
-    save_assets(assets, output_path)
+    written = overlays.save_overlay(overlay, output_path)
 
     print("✅ EDR enrichment completed")
-    print(f"📄 Enriched asset file written to: {output_path}")
+    print(f"📄 EDR overlay written to: {written}")
+
+    if history:
+        history_store.record_enrichment(history, client, overlay)
+        print(f"🗄 History store: {history}")
 
 
 # =====================================================
@@ -155,14 +193,23 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="EDR Enricher")
-    parser.add_argument("--assets", required=True, help="Path to asset snapshot JSON")
+    parser.add_argument("--assets", default="", help="Path to asset snapshot (.parquet, or legacy .json); omit to read it from --history")
     parser.add_argument("--edr-report", required=True, help="Path to EDR PDF report")
-    parser.add_argument("--output", required=True, help="Output enriched asset JSON")
+    parser.add_argument("--output", required=True, help="Output EDR overlay (.parquet)")
+    parser.add_argument("--history", default="", help="History store (SQLite) to read / record the month in")
+    parser.add_argument("--client", default=LEGACY_CLIENT, help="Client the month is recorded under")
+    parser.add_argument("--month", default="", help="Month to read from --history (YYYY-MM)")
 
     args = parser.parse_args()
 
+    if not args.assets and not (args.history and args.month):
+        parser.error("either --assets or --history with --month is required")
+
     run_edr_enrichment(
         asset_snapshot_path=args.assets,
         edr_report_path=args.edr_report,
-        output_path=args.output
+        output_path=args.output,
+        history=args.history,
+        client=args.client,
+        month=args.month
     )
@@ -8,16 +8,19 @@ Design:
 - No new users created
 - Email-based matching
 - Safe enrichment only
+- Emits an overlay (email → risk_signals fields), not a copy of the
+  snapshot (common/overlays.py)
 """
 
-import json
-import os
-from datetime import datetime
 from typing import Dict
 
-import pdfplumber
 import pandas as pd
 
+from common import history_store, overlays, snapshot_store
+from common.metrics import timed
+from common.table_router import TableRouter
+from pipeline.layout import LEGACY_CLIENT
+
 
 # =====================================================
 # Utilities
@@ -30,22 +33,14 @@ def normalize_email(email: str) -> str:
 
 
 def load_users(path: str) -> Dict:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Users file not found: {path}")
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def save_users(data: Dict, path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    return snapshot_store.load_snapshot(path)
 
 
 # =====================================================
 # Phishing Parsing (PDF)
 # =====================================================
 
+@timed
 def parse_phishing_pdf(path: str) -> Dict[str, dict]:
     """
     Parses Phishing PDF reports and returns:
@@ -59,34 +54,31 @@ def parse_phishing_pdf(path: str) -> Dict[str, dict]:
 
     phishing_data = {}
 
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            table = page.extract_table()
-            if not table or len(table) < 2:
-                continue
+    def on_table(headers, rows):
+        for row in rows:
+            data = dict(zip(headers, row))
 
-            headers = [str(h).strip().lower() for h in table[0]]
+            email = normalize_email(
+                data.get("email")
+                or data.get("user")
+                or data.get("email address")
+                or ""
+            )
 
-            for row in table[1:]:
-                data = dict(zip(headers, row))
-
-                email = normalize_email(
-                    data.get("email")
-                    or data.get("user")
-                    or data.get("email address")
-                    or ""
-                )
+            if not email:
+                continue
 
-                if not email:
-                    continue
+            sent = int(data.get("emails sent", 1) or 1)
+            clicked = int(data.get("clicked", 0) or 0)
 
-                sent = int(data.get("emails sent", 1) or 1)
-                clicked = int(data.get("clicked", 0) or 0)
+            phishing_data[email] = {
+                "sent": sent,
+                "clicked": clicked
+            }
 
-                phishing_data[email] = {
-                    "sent": sent,
-                    "clicked": clicked
-                }
+    router = TableRouter("phishing")
+    router.add("results", on_table, any_of=["email", "user", "email address"])
+    router.run(path)
 
     return phishing_data
 
@@ -95,51 +87,92 @@ def parse_phishing_pdf(path: str) -> Dict[str, dict]:
 # Enrichment Logic
 # =====================================================
 
-def enrich_users_with_phishing(users: Dict, phishing_data: Dict):
+@timed
+def phishing_fields(users: Dict, phishing_data: Dict) -> Dict[str, dict]:
     """
-    Merges phishing data into existing users
+    The risk_signals fields phishing sets, per user:
+    {
+      email: {phishing_clicked, phishing_failures, phishing_campaigns, phishing_risk}
+    }
     """
+    entities = {}
 
-    for email, user in users["users"].items():
+    for email in users["users"]:
 
         phishing = phishing_data.get(email)
 
         if phishing:
-            user["risk_signals"]["phishing_clicked"] = phishing["clicked"] > 0
-            user["risk_signals"]["phishing_failures"] = phishing["clicked"]
-            user["risk_signals"]["phishing_campaigns"] = phishing["sent"]
-
-            if phishing["clicked"] > 0:
-                user["risk_signals"]["phishing_risk"] = "high"
-            else:
-                user["risk_signals"]["phishing_risk"] = "low"
+            entities[email] = {
+                "phishing_clicked": phishing["clicked"] > 0,
+                "phishing_failures": phishing["clicked"],
+                "phishing_campaigns": phishing["sent"],
+                "phishing_risk": "high" if phishing["clicked"] > 0 else "low"
+            }
 
         else:
-            user["risk_signals"]["phishing_campaigns"] = 0
-            user["risk_signals"]["phishing_failures"] = 0
-            user["risk_signals"]["phishing_risk"] = "unknown"
+            entities[email] = {
+                "phishing_campaigns": 0,
+                "phishing_failures": 0,
+                "phishing_risk": "unknown"
+            }
+
+    return entities
 
 
 # =====================================================
 # Main Orchestrator
 # =====================================================
 
+def build_phishing_overlay(users: Dict, phishing_data: Dict) -> Dict:
+    """
+    Phishing overlay of a user snapshot from already-parsed phishing data
+    (the snapshot itself is not modified)
+    """
+    return overlays.make_overlay("phishing", users, phishing_fields(users, phishing_data))
+
+
+def apply_phishing_data(users: Dict, phishing_data: Dict) -> Dict:
+    """
+    Enriches an in-memory user snapshot from already-parsed phishing data
+    """
+    return overlays.apply_overlay(users, build_phishing_overlay(users, phishing_data))
+
+
+def apply_phishing_enrichment(users: Dict, phishing_report_path: str) -> Dict:
+    """
+    Enriches an in-memory user snapshot and returns it
+    """
+    return apply_phishing_data(users, parse_phishing_pdf(phishing_report_path))
+
+
 def run_phishing_enrichment(
     user_snapshot_path: str,
     phishing_report_path: str,
-    output_path: str
+    output_path: str,
+    history: str = "",
+    client: str = LEGACY_CLIENT,
+    month: str = ""
 ):
-    users = load_users(user_snapshot_path)
-    phishing_data = parse_phishing_pdf(phishing_report_path)
-
-    enrich_users_with_phishing(users, phishing_data)
+    """
+    Writes the phishing overlay of the user snapshot. With a history
+    store, the snapshot is read from it when no snapshot file is given,
+    and the overlay is recorded as phishing observations.
+    """
+    if user_snapshot_path:
+        users = load_users(user_snapshot_path)
+    else:
+        users = history_store.load_month(history, client, month, "users", enriched=False)
 
-    users["metadata"]["phishing_enriched_at"] = datetime.utcnow().isoformat() + "Z"
+    overlay = build_phishing_overlay(users, parse_phishing_pdf(phishing_report_path))
 
-    save_users(users, output_path)
+    written = overlays.save_overlay(overlay, output_path)
 
     print("✅ Phishing enrichment completed")
-    print(f"📄 Enriched user file written to: {output_path}")
+    print(f"📄 Phishing overlay written to: {written}")
+
+    if history:
+        history_store.record_enrichment(history, client, overlay)
+        print(f"🗄 History store: {history}")
 
 
 # =====================================================
@@ -150,14 +183,23 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Phishing Enricher")
-    parser.add_argument("--users", required=True, help="Path to user snapshot JSON")
+    parser.add_argument("--users", default="", help="Path to user snapshot (.parquet, or legacy .json); omit to read it from --history")
     parser.add_argument("--phishing-report", required=True, help="Path to Phishing PDF report")
-    parser.add_argument("--output", required=True, help="Output enriched user JSON")
+    parser.add_argument("--output", required=True, help="Output phishing overlay (.parquet)")
+    parser.add_argument("--history", default="", help="History store (SQLite) to read / record the month in")
+    parser.add_argument("--client", default=LEGACY_CLIENT, help="Client the month is recorded under")
+    parser.add_argument("--month", default="", help="Month to read from --history (YYYY-MM)")
 
     args = parser.parse_args()
 
+    if not args.users and not (args.history and args.month):
+        parser.error("either --users or --history with --month is required")
+
     run_phishing_enrichment(
         user_snapshot_path=args.users,
         phishing_report_path=args.phishing_report,
-        output_path=args.output
+        output_path=args.output,
+        history=args.history,
+        client=args.client,
+        month=args.month
     )
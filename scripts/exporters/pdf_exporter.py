@@ -61,16 +61,9 @@ def header_footer(canvas, doc):
 # Main Exporter
 # =====================================================
 
-def export_pdf(markdown_path: str, output_pdf_path: str, client: str, month: str):
-    ensure_file(markdown_path)
+def build_pdf(md_text: str, output_pdf_path: str, client: str, month: str):
     os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
 
-    # -------------------------
-    # Load Markdown
-    # -------------------------
-    with open(markdown_path, "r", encoding="utf-8") as f:
-        md_text = f.read()
-
     html = markdown2.markdown(md_text)
 
     # -------------------------
@@ -163,6 +156,18 @@ def export_pdf(markdown_path: str, output_pdf_path: str, client: str, month: str
         onLaterPages=header_footer
     )
 
+
+def export_pdf(markdown_path: str, output_pdf_path: str, client: str, month: str):
+    ensure_file(markdown_path)
+
+    # -------------------------
+    # Load Markdown
+    # -------------------------
+    with open(markdown_path, "r", encoding="utf-8") as f:
+        md_text = f.read()
+
+    build_pdf(md_text, output_pdf_path, client, month)
+
     print("✅ Executive PDF generated")
     print(f"📄 PDF saved to: {os.path.abspath(output_pdf_path)}")
 
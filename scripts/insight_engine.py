@@ -9,11 +9,16 @@ Design:
 - Fully explainable
 - Executive & auditor friendly
 - Emits BOTH metrics and entity-level facts
+- Reads enriched users / assets as slotted records (common/records.py):
+  the normalized snapshot with the enrichment overlays (common/overlays.py)
+  applied as it is read
 """
 
-import json
 import os
-from typing import Dict, List
+from typing import Dict, List, Sequence
+
+from common import overlays, records, serialization, snapshot_store
+from common.records import BackupState, RiskLevel, RiskSignals, SecurityState
 
 
 # =====================================================
@@ -23,8 +28,7 @@ from typing import Dict, List
 def load_json(path: str) -> Dict:
     if not os.path.exists(path):
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return serialization.load_json(path)
 
 
 def empty_diff() -> Dict:
@@ -44,6 +48,12 @@ def empty_diff() -> Dict:
     }
 
 
+# Stand-ins for a nested object a record does not have (every field MISSING)
+NO_SIGNALS = RiskSignals()
+NO_BACKUP = BackupState()
+NO_SECURITY = SecurityState()
+
+
 # =====================================================
 # Identity Insights
 # =====================================================
@@ -103,26 +113,24 @@ def analyze_security(users: Dict, assets: Dict) -> Dict:
     edr_affected_devices = []
 
     for email, user in users["users"].items():
-        signals = user.get("risk_signals", {})
+        signals = user.risk_signals or NO_SIGNALS
 
-        if signals.get("phishing_clicked"):
+        if signals.phishing_clicked:
             phishing_failed_users.append(email)
             risks.append(f"User {email} failed a phishing simulation.")
 
-        if signals.get("dark_web_exposed"):
+        if signals.dark_web_exposed:
             darkweb_exposed_users.append(email)
             risks.append(f"User {email} credentials were found on the dark web.")
 
     for asset in assets["assets"].values():
-        name = asset.get("device_name") or asset.get("serial_number")
-        backup = asset.get("backup_state", {})
-        security = asset.get("security_state", {})
+        name = records.value(asset.device_name or asset.serial_number)
 
-        if backup.get("enabled") is False:
+        if (asset.backup_state or NO_BACKUP).enabled is False:
             devices_without_backup.append(name)
             risks.append(f"Asset {name} does not have backups configured.")
 
-        if security.get("risk_level") == "high":
+        if (asset.security_state or NO_SECURITY).risk_level == RiskLevel.HIGH:
             edr_affected_devices.append(name)
             risks.append(f"Asset {name} has unresolved EDR incidents.")
 
@@ -142,13 +150,13 @@ def analyze_security(users: Dict, assets: Dict) -> Dict:
 def analyze_positives(users: Dict, assets: Dict) -> List[str]:
     positives = []
 
-    if not any(u.get("risk_signals", {}).get("phishing_clicked") for u in users["users"].values()):
+    if not any((u.risk_signals or NO_SIGNALS).phishing_clicked for u in users["users"].values()):
         positives.append("No users failed phishing simulations this period.")
 
-    if not any(a.get("backup_state", {}).get("enabled") is False for a in assets["assets"].values()):
+    if not any((a.backup_state or NO_BACKUP).enabled is False for a in assets["assets"].values()):
         positives.append("All monitored devices have healthy backup status.")
 
-    if not any(a.get("security_state", {}).get("risk_level") == "high" for a in assets["assets"].values()):
+    if not any((a.security_state or NO_SECURITY).risk_level == RiskLevel.HIGH for a in assets["assets"].values()):
         positives.append("No high-severity EDR incidents were detected.")
 
     return positives
@@ -185,11 +193,14 @@ def build_summary(users: Dict, assets: Dict, diff: Dict, identity: Dict, assets_
 # Main Engine
 # =====================================================
 
-def run_insight_engine(users_path: str, assets_path: str, diff_path: str, output_path: str):
-    users = load_json(users_path)
-    assets = load_json(assets_path)
-
-    diff = load_json(diff_path) or empty_diff()
+def build_insights(users: Dict, assets: Dict, diff: Dict) -> Dict:
+    """
+    users / assets: dict snapshots, enriched views or record snapshots
+    (common/records.py); scanned as records.
+    """
+    diff = diff or empty_diff()
+    users = records.as_records(users)
+    assets = records.as_records(assets)
 
     identity = analyze_identity(diff)
     assets_i = analyze_assets(diff)
@@ -222,9 +233,24 @@ def run_insight_engine(users_path: str, assets_path: str, diff_path: str, output
         ]
     }
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(insights, f, indent=2)
+    return insights
+
+
+def run_insight_engine(
+    users_path: str,
+    assets_path: str,
+    diff_path: str,
+    output_path: str,
+    overlay_paths: Sequence[str] = ()
+):
+    enrichment = [overlays.load_overlay(path) for path in overlay_paths]
+    users = records.from_snapshot(snapshot_store.load_snapshot(users_path), *enrichment)
+    assets = records.from_snapshot(snapshot_store.load_snapshot(assets_path), *enrichment)
+    diff = load_json(diff_path)
+
+    insights = build_insights(users, assets, diff)
+
+    serialization.save_json(insights, output_path)
 
     print("✅ Insight Engine completed")
     print(f"📄 Insights written to: {output_path}")
@@ -242,6 +268,10 @@ if __name__ == "__main__":
     parser.add_argument("--assets", required=True)
     parser.add_argument("--diff", required=True)
     parser.add_argument("--output", required=True)
+    parser.add_argument(
+        "--overlay", nargs="*", default=[],
+        help="Enrichment overlays (.parquet) to merge into --users / --assets"
+    )
 
     args = parser.parse_args()
 
@@ -249,5 +279,6 @@ if __name__ == "__main__":
         users_path=args.users,
         assets_path=args.assets,
         diff_path=args.diff,
-        output_path=args.output
+        output_path=args.output,
+        overlay_paths=args.overlay
     )
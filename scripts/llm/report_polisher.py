@@ -12,12 +12,12 @@ Design:
 - No hallucination allowed
 """
 
-import json
 import os
 
-from prompt_templates import EXECUTIVE_REPORT_PROMPT
-from rag_context_loader import load_rag_context
-from llm_adapter import run_llm
+from common import serialization
+from llm.llm_adapter import run_llm
+from llm.prompt_templates import EXECUTIVE_REPORT_PROMPT
+from llm.rag_context_loader import load_rag_context
 
 
 # =====================================================
@@ -47,13 +47,11 @@ def fmt_paragraphs(items):
 # Main Logic
 # =====================================================
 
-def polish_report(narrative_path: str, output_path: str):
-    # -------------------------
-    # Load narrative
-    # -------------------------
-    with open(narrative_path, "r", encoding="utf-8") as f:
-        narrative = json.load(f)
-
+def render_report(narrative: dict) -> str:
+    """
+    Builds the factual prompt from an in-memory narrative and returns
+    the LLM-polished Markdown report.
+    """
     rag_context = load_rag_context()
 
     # -------------------------
@@ -180,7 +178,16 @@ RECOMMENDATIONS & NEXT STEPS
     # Run LLM
     # -------------------------
     print("🔹 Generating executive report with Mistral...")
-    polished_text = run_llm(prompt)
+    return run_llm(prompt)
+
+
+def polish_report(narrative_path: str, output_path: str):
+    # -------------------------
+    # Load narrative
+    # -------------------------
+    narrative = serialization.load_json(narrative_path)
+
+    polished_text = render_report(narrative)
 
     # -------------------------
     # Write output
@@ -7,11 +7,12 @@ for executive report generation.
 Phase: 2.6
 """
 
-import json
 import os
 import sys
 from datetime import datetime
 
+from common import serialization
+
 
 # =====================================================
 # Utilities
@@ -20,8 +21,7 @@ from datetime import datetime
 def load_json(path: str):
     if not os.path.exists(path):
         sys.exit(f"❌ Insights file not found: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return serialization.load_json(path)
 
 
 def safe_list(value):
@@ -107,11 +107,9 @@ def run_narrative_builder(insights_path: str, output_path: str):
     insights = load_json(insights_path)
     narrative = build_narrative(insights)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     abs_output_path = os.path.abspath(output_path)
 
-    with open(abs_output_path, "w", encoding="utf-8") as f:
-        json.dump(narrative, f, indent=2)
+    serialization.save_json(narrative, abs_output_path)
 
     print("✅ Narrative Builder completed")
     print(f"📄 Narrative written to: {abs_output_path}")
@@ -1,7 +1,7 @@
 """
 Asset List Parser (Serial-Based IDs)
 -----------------------------------
-Parses Asset List reports (PDF / XLSX) into canonical JSON asset objects.
+Parses Asset List reports (PDF / XLSX / CSV / Parquet) into canonical JSON asset objects.
 
 Key Design:
 - Asset ID = Serial Number (preferred)
@@ -13,13 +13,24 @@ Key Design:
 Phase: 1
 """
 
-import json
 import os
 from datetime import datetime
-from typing import Dict
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
+import openpyxl
 import pandas as pd
-import pdfplumber
+
+from common import history_store, snapshot_store
+from common.metrics import timed
+from common.pdf_tables import iter_tables
+from common.tabular import (
+    NAN, XLSX_CHUNK_ROWS, common_dtype, convert_cell, date_kind, excel_cell, excel_column,
+    has_text, is_missing, iter_csv_rows, iterrows_values, nat_row, nat_values, numeric_class,
+    parquet_columns, read_csv_columns, read_parquet_columns, sanitize_cells
+)
+from pipeline.layout import LEGACY_CLIENT
 
 
 # =====================================================
@@ -61,112 +72,369 @@ def month_to_str(month: str) -> str:
 
 
 def load_previous_snapshot(path: str) -> Dict:
-    if not path or not os.path.exists(path):
-        return {}
-    with open(path, "r") as f:
-        return json.load(f).get("assets", {})
+    return snapshot_store.load_entities(path, "assets")
+
+
+def load_previous_history(history: str, client: str, month: str) -> Dict:
+    """Latest month on record in the history store before month (not only month - 1)."""
+    prev_month, previous = history_store.load_previous_entities(history, client, month, "assets")
+    print(f"ℹ️ Previous assets on record: {prev_month or 'none'}")
+    return previous
 
 
 # =====================================================
 # Excel Parser (ROBUST)
 # =====================================================
 
-def parse_asset_list_xlsx(path: str, month: str) -> Dict[str, dict]:
+ASSET_HEADER_KEYWORDS = [
+    "device", "computer", "asset",
+    "user", "model", "serial",
+    "operating", "os"
+]
+
+# A row is the header once this many keyword hits are found in it
+MIN_HEADER_MATCHES = 3
+
+# Column fallbacks, first non-empty value wins
+DEVICE_COLUMNS = ["Device Name", "Computer Name", "Asset Name"]
+SERIAL_COLUMNS = ["Serial Number", "Serial", "Serial No"]
+USER_COLUMNS = ["Last User", "User", "Assigned User"]
+OS_COLUMNS = ["Operating System", "OS"]
+
+# Columns the columnar engine keeps; everything else is dropped while reading
+ASSET_COLUMNS = DEVICE_COLUMNS + SERIAL_COLUMNS + USER_COLUMNS + ["Model"] + OS_COLUMNS
+
+# "columnar" (pandas column ops) or "rows" (one row at a time)
+ASSET_ENGINE = os.environ.get("ASSET_ENGINE", "columnar")
+
+# Arrow-backed strings make the columnar engine's .str ops native;
+# without pyarrow they fall back to object columns (same output)
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = "object"
+
+
+def iter_sheet_rows(path: str) -> Iterator[List]:
     """
-    Robust Excel asset parser:
-    - Auto-detects header row
-    - Fuzzy column matching
-    - Serial-based asset IDs
+    Rows of the first sheet, streamed with openpyxl read_only, as
+    read_excel's reader produces them: excel_cell values with trailing
+    empty cells trimmed. Blank rows inside the data are kept (read_excel
+    keeps them as NaN rows); blank rows at the end are dropped, as
+    read_excel does.
     """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        blank_run = []
+        for values in workbook.worksheets[0].iter_rows(values_only=True):
+            row = [excel_cell(v) for v in values]
+            while row and row[-1] == "":
+                row.pop()
+            if not row:
+                blank_run.append(row)
+                continue
+            yield from blank_run
+            blank_run.clear()
+            yield row
+    finally:
+        workbook.close()
+
+
+def is_header_row(row: List) -> bool:
+    row_values = [str(v).strip().lower() for v in row if not is_missing(v)]
+
+    matches = sum(
+        1 for cell in row_values
+        for kw in ASSET_HEADER_KEYWORDS
+        if kw in cell
+    )
 
-    raw = pd.read_excel(path, header=None)
+    return matches >= MIN_HEADER_MATCHES
 
-    header_keywords = [
-        "device", "computer", "asset",
-        "user", "model", "serial",
-        "operating", "os"
+
+def header_names(row: List) -> List[str]:
+    return [
+        f"Unnamed: {i}" if is_missing(v) else str(v).strip()
+        for i, v in enumerate(row)
     ]
 
-    header_row_index = None
 
-    for i in range(len(raw)):
-        row_values = [
-            str(v).strip().lower()
-            for v in raw.iloc[i].values
-            if pd.notna(v)
-        ]
+def open_xlsx_table(path: str) -> Tuple[List[str], Iterator[List]]:
+    """
+    Single scan: rows above the header are skipped and the header row is
+    detected in passing. Returns the column names (as wide as the widest
+    row so far, as read_excel pads rows) and an iterator over the
+    remaining rows, which continues the same scan.
+    """
+    rows = iter_sheet_rows(path)
+    width = 0
+
+    for row in rows:
+        width = max(width, len(row))
+        cells = [convert_cell(v) for v in row]
+        if is_header_row(cells):
+            return header_names(cells + [NAN] * (width - len(cells))), rows
+
+    raise ValueError("❌ Could not detect header row in Asset List Excel file")
+
+
+def iter_xlsx_records(path: str) -> Iterator[Dict]:
+    """Rows below the header as {column: value}, asset columns only."""
+    return frame_records(collect_columns(*open_xlsx_table(path)))
+
+
+def first_of(row: Dict, names: List[str]):
+    """`row.get(a) or row.get(b) or ... or ""`."""
+    for name in names:
+        value = row.get(name)
+        if value:
+            return value
+    return ""
 
-        matches = sum(
-            1 for cell in row_values
-            for kw in header_keywords
-            if kw in cell
-        )
 
-        if matches >= 3:
-            header_row_index = i
+def build_xlsx_asset(row: Dict, month: str):
+    """(asset_id, asset) for one Excel row, or None if it has no identity."""
+
+    # -------- Device name --------
+    device_name = normalize_device_name(first_of(row, DEVICE_COLUMNS))
+
+    # -------- Serial number --------
+    serial = normalize_serial(first_of(row, SERIAL_COLUMNS))
+
+    if not device_name and not serial:
+        print("⚠️ Skipped row (no device name or serial):", row)
+        return None
+
+    # -------- Assigned user --------
+    user_raw = first_of(row, USER_COLUMNS)
+
+    user_email = (
+        normalize_email(str(user_raw).split("\\")[-1])
+        if "@" in str(user_raw)
+        else ""
+    )
+
+    return generate_asset_id(device_name, serial), {
+        "device_name": device_name,
+        "serial_number": serial or None,
+        "assigned_user": user_email or None,
+        "type": "workstation",
+        "model": str(row.get("Model", "")).strip(),
+        "os": (
+            str(row.get("Operating System", "")).strip()
+            or str(row.get("OS", "")).strip()
+        ),
+        "status": "active",
+        "first_seen": None,   # resolved later
+        "last_seen": month,
+        "security_state": {
+            "edr_installed": False,
+            "backup_enabled": False,
+            "patched": False
+        }
+    }
+
+
+# -------------------------
+# Columnar engine
+# -------------------------
+
+def asset_positions(columns: List[str]) -> Dict[str, int]:
+    """{name: position} of the ASSET_COLUMNS present in a header."""
+    # First occurrence wins for duplicated headers, as in the row engine
+    positions = {}
+    for i, name in enumerate(columns):
+        if name in ASSET_COLUMNS:
+            positions.setdefault(name, i)
+    return positions
+
+
+def collect_columns(columns: List[str], rows: Iterator[List]) -> pd.DataFrame:
+    """
+    Only the ASSET_COLUMNS present in the sheet, picked straight from the
+    row lists (no per-row dicts), typed as read_excel types them and held
+    as the values iterrows() handed over.
+
+    Rows are taken XLSX_CHUNK_ROWS at a time. A column found to hold text
+    stays object whatever else it holds, so from that chunk on its cells
+    are sanitized as they come and kept as openpyxl handed them over (no
+    copies). Only the other columns (numbers, bools, dates) are typed once
+    the sheet is read, with excel_column.
+    """
+    positions = asset_positions(columns)
+    width = len(columns)
+
+    cells: Dict[str, List] = {name: [] for name in positions}
+    # Columns known to hold text -> sanitize_cells memo
+    text: Dict[str, Dict] = {}
+    # iterrows() upcasts whole rows when every column is numeric (an int
+    # serial next to a float column comes out as 12345.0). While the sheet
+    # could still be all-numeric, one cell per numeric_class is kept for
+    # each column: that is enough to know the column's dtype
+    witnesses: Optional[Dict[int, Dict]] = {}
+    first_row: List = []
+    shortest = None
+    # iterrows() also infers a dtype per row: a row of only blanks and
+    # dates comes out as datetimes, its blanks as NaT. A blank under a
+    # date column counts as a date, and which columns hold only dates is
+    # known at the end, so such rows are set aside (as their date kinds)
+    column_kinds: Dict[int, str] = {}
+    other_columns: Set[int] = set()
+    date_rows: List[Tuple[int, Set]] = []
+
+    index = 0
+    while True:
+        chunk = list(islice(rows, XLSX_CHUNK_ROWS))
+        if not chunk:
             break
 
-    if header_row_index is None:
-        raise ValueError("❌ Could not detect header row in Asset List Excel file")
+        for row in chunk:
+            if index == 0:
+                first_row = row
+            width = max(width, len(row))
+            shortest = len(row) if shortest is None else min(shortest, len(row))
 
-    df = pd.read_excel(path, header=header_row_index)
-    df.columns = [str(c).strip() for c in df.columns]
+            kinds = [date_kind(value) for value in row]
+            for i, kind in enumerate(kinds):
+                if i in other_columns:
+                    continue
+                if kind is None or kind != "na" and column_kinds.setdefault(i, kind) != kind:
+                    other_columns.add(i)
+            if all(kinds):
+                date_rows.append((index, set(kinds)))
+
+            if witnesses is not None:
+                for i, value in enumerate(row):
+                    numeric = numeric_class(value)
+                    if numeric is None:
+                        witnesses = None
+                        break
+                    witnesses.setdefault(i, {}).setdefault(numeric, value)
+            index += 1
+
+        for name, i in positions.items():
+            values = [row[i] if i < len(row) else "" for row in chunk]
+            if name not in text and has_text(values):
+                text[name] = {}
+                cells[name] = sanitize_cells(cells[name], text[name])
+            cells[name] += sanitize_cells(values, text[name]) if name in text else values
+
+    typed = pd.DataFrame(
+        {
+            name: pd.Series(values, dtype=object) if name in text or not values else excel_column(values)
+            for name, values in cells.items()
+        },
+        index=pd.RangeIndex(index)
+    )
 
-    assets = {}
+    if witnesses is not None and index:
+        # Cells past a short row are blank, as read_excel pads rows
+        dtypes = [
+            excel_column(
+                [first_row[i] if i < len(first_row) else "", *witnesses.get(i, {}).values()]
+                + ([""] if i >= shortest else [])
+            ).dtype
+            for i in range(width)
+        ]
+        common = common_dtype(dtypes)
+        if common != object:
+            typed = typed.astype(common)
 
-    for _, row in df.iterrows():
-
-        # -------- Device name --------
-        device_name = (
-            row.get("Device Name")
-            or row.get("Computer Name")
-            or row.get("Asset Name")
-            or ""
-        )
-        device_name = normalize_device_name(device_name)
-
-        # -------- Serial number --------
-        serial = (
-            row.get("Serial Number")
-            or row.get("Serial")
-            or row.get("Serial No")
-            or ""
-        )
-        serial = normalize_serial(serial)
-
-        if not device_name and not serial:
-            print("⚠️ Skipped row (no device name or serial):", row.to_dict())
-            continue
+    typed = iterrows_values(typed)
+    date_columns = set(column_kinds) - other_columns
+    for index, kinds in date_rows:
+        if nat_row(kinds, date_columns):
+            typed.iloc[index] = nat_values(typed.iloc[index].tolist())
+    return typed
 
-        asset_id = generate_asset_id(device_name, serial)
 
-        if asset_id in assets:
-            print("⚠️ Duplicate asset_id detected (overwriting):", asset_id)
+def frame_records(frame: pd.DataFrame) -> Iterator[Dict]:
+    """{column: value} per row, one dict at a time (to_dict("records") would build them all)."""
+    names = list(frame.columns)
+    if not names:
+        yield from ({} for _ in range(len(frame)))
+        return
+    for values in zip(*(frame[name].tolist() for name in names)):
+        yield dict(zip(names, values))
+
+
+def first_truthy(frame: pd.DataFrame, names: List[str]) -> pd.Series:
+    """Column-wise `row.get(a) or row.get(b) or ... or ""`."""
+    result = pd.Series("", index=frame.index, dtype=object)
+    for name in reversed(names):
+        if name in frame:
+            column = frame[name]
+            result = column.where(column.astype(bool), result)
+    return result
+
+
+def as_text(values: pd.Series) -> pd.Series:
+    """str() of every value, as the row engine does (NaN becomes "nan", NaT "NaT")."""
+    if TEXT_DTYPE == "object":
+        return values.map(str).astype(object)
+    text = values.astype(TEXT_DTYPE)
+    return text.fillna(values[text.isna()].map(str))
 
-        # -------- Assigned user --------
-        user_raw = (
-            row.get("Last User")
-            or row.get("User")
-            or row.get("Assigned User")
-            or ""
-        )
-
-        user_email = (
-            normalize_email(str(user_raw).split("\\")[-1])
-            if "@" in str(user_raw)
-            else ""
-        )
-
-        assets[asset_id] = {
-            "device_name": device_name,
-            "serial_number": serial or None,
-            "assigned_user": user_email or None,
+
+def blank_column(frame: pd.DataFrame) -> pd.Series:
+    return pd.Series("", index=frame.index, dtype=TEXT_DTYPE)
+
+
+def normalized_upper(values: pd.Series) -> pd.Series:
+    """normalize_device_name / normalize_serial on a whole column."""
+    return as_text(values.where(values.astype(bool), "")).str.strip().str.upper()
+
+
+def text_column(frame: pd.DataFrame, name: str) -> pd.Series:
+    """Column-wise `str(row.get(name, "")).strip()`."""
+    if name not in frame:
+        return blank_column(frame)
+    return as_text(frame[name]).str.strip()
+
+
+def assets_from_frame(frame: pd.DataFrame, month: str) -> Dict[str, dict]:
+    """
+    Normalization, ID generation and duplicate detection on whole
+    columns; asset dicts are only built for the rows that survive.
+    Same result as the row engine, key order included.
+    """
+    device = normalized_upper(first_truthy(frame, DEVICE_COLUMNS))
+    serial = normalized_upper(first_truthy(frame, SERIAL_COLUMNS))
+
+    keep = (device != "") | (serial != "")
+    for row in frame[~keep].to_dict("records"):
+        print("⚠️ Skipped row (no device name or serial):", row)
+
+    frame, device, serial = frame[keep], device[keep], serial[keep]
+
+    asset_id = ("SN:" + serial).where(serial != "", "DN:" + device)
+
+    user_raw = as_text(first_truthy(frame, USER_COLUMNS))
+    user_email = (
+        # Everything after the last backslash (DOMAIN\user)
+        user_raw.str.replace(r"(?s)^.*\\", "", regex=True).str.strip().str.lower()
+        .where(user_raw.str.contains("@", regex=False), "")
+    )
+
+    model = text_column(frame, "Model")
+    os_name = text_column(frame, "Operating System")
+    os_name = os_name.where(os_name != "", text_column(frame, "OS"))
+
+    # Later rows overwrite earlier ones but keep the first row's position,
+    # as repeated dict assignment did
+    for duplicate in asset_id[asset_id.duplicated()]:
+        print("⚠️ Duplicate asset_id detected (overwriting):", duplicate)
+    last = ~asset_id.duplicated(keep="last")
+
+    assets = {
+        aid: {
+            "device_name": dev,
+            "serial_number": sn or None,
+            "assigned_user": email or None,
             "type": "workstation",
-            "model": str(row.get("Model", "")).strip(),
-            "os": (
-                str(row.get("Operating System", "")).strip()
-                or str(row.get("OS", "")).strip()
-            ),
+            "model": mdl,
+            "os": osn,
             "status": "active",
             "first_seen": None,   # resolved later
             "last_seen": month,
@@ -176,68 +444,160 @@ def parse_asset_list_xlsx(path: str, month: str) -> Dict[str, dict]:
                 "patched": False
             }
         }
+        for aid, dev, sn, email, mdl, osn in zip(*(
+            column[last].tolist()
+            for column in (asset_id, device, serial, user_email, model, os_name)
+        ))
+    }
+
+    if not last.all():
+        assets = {aid: assets[aid] for aid in asset_id[~asset_id.duplicated()].tolist()}
 
     return assets
 
 
+# -------------------------
+# Row engine
+# -------------------------
+
+def assets_from_rows(records: Iterator[Dict], month: str) -> Dict[str, dict]:
+    assets = {}
+
+    for row in records:
+        built = build_xlsx_asset(row, month)
+        if not built:
+            continue
+        asset_id, asset = built
+        if asset_id in assets:
+            print("⚠️ Duplicate asset_id detected (overwriting):", asset_id)
+        assets[asset_id] = asset
+
+    return assets
+
+
+@timed
+def parse_asset_list_xlsx(path: str, month: str, engine: str = None) -> Dict[str, dict]:
+    """
+    Robust Excel asset parser:
+    - Auto-detects header row
+    - Fuzzy column matching
+    - Serial-based asset IDs
+    - One pass over the workbook (openpyxl read_only); only the asset
+      columns are held, typed as read_excel types them
+    - engine: "columnar" (default, see ASSET_ENGINE) normalizes those
+      columns with pandas string ops; "rows" builds one asset per row
+    """
+    engine = engine or ASSET_ENGINE
+
+    if engine == "columnar":
+        return assets_from_frame(collect_columns(*open_xlsx_table(path)), month)
+    if engine == "rows":
+        return assets_from_rows(iter_xlsx_records(path), month)
+    raise ValueError(f"Unknown asset engine: {engine}")
+
+
+# =====================================================
+# CSV / Parquet Parsers
+# =====================================================
+
+def find_csv_header(path: str) -> Tuple[int, List]:
+    """(rows to skip, header row) — title rows above the header are skipped."""
+    for i, row in enumerate(iter_csv_rows(path)):
+        row = [convert_cell(v) for v in row]
+        if is_header_row(row):
+            return i + 1, row
+
+    raise ValueError("❌ Could not detect header row in Asset List CSV file")
+
+
+@timed
+def parse_asset_list_csv(path: str, month: str) -> Dict[str, dict]:
+    """
+    CSV exports (RMM): header detected like the Excel parser, then only
+    the asset columns are read, in chunks (common/tabular.py), and
+    normalized by the columnar engine.
+    """
+    skip_rows, header = find_csv_header(path)
+    columns = header_names(header)
+
+    frame = read_csv_columns(path, skip_rows, len(columns), asset_positions(columns))
+    return assets_from_frame(frame, month)
+
+
+@timed
+def parse_asset_list_parquet(path: str, month: str) -> Dict[str, dict]:
+    """Parquet exports: column names are the header; only asset columns are read."""
+    names = {}
+    for name in parquet_columns(path):
+        names.setdefault(str(name).strip(), name)
+
+    if not is_header_row(list(names)):
+        raise ValueError(f"❌ No asset columns found in Parquet file. Columns: {list(names)}")
+
+    picked = [names[name] for name in ASSET_COLUMNS if name in names]
+
+    frame = read_parquet_columns(path, picked)
+    frame.columns = [str(c).strip() for c in frame.columns]
+    return assets_from_frame(frame, month)
+
+
 # =====================================================
 # PDF Parser (Fallback)
 # =====================================================
 
+@timed
 def parse_asset_list_pdf(path: str, month: str) -> Dict[str, dict]:
     assets = {}
 
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            table = page.extract_table()
-            if not table or len(table) < 2:
-                continue
+    for _, table in iter_tables(path, family="asset_list"):
+        if not table or len(table) < 2:
+            continue
 
-            headers = [str(h).strip() if h else "" for h in table[0]]
+        headers = [str(h).strip() if h else "" for h in table[0]]
 
-            for row in table[1:]:
-                data = dict(zip(headers, row))
+        for row in table[1:]:
+            data = dict(zip(headers, row))
 
-                device_name = normalize_device_name(
-                    data.get("Device Name")
-                    or data.get("Computer Name")
-                    or ""
-                )
+            device_name = normalize_device_name(
+                data.get("Device Name")
+                or data.get("Computer Name")
+                or ""
+            )
 
-                serial = normalize_serial(
-                    data.get("Serial Number")
-                    or data.get("Serial")
-                    or ""
-                )
+            serial = normalize_serial(
+                data.get("Serial Number")
+                or data.get("Serial")
+                or ""
+            )
 
-                if not device_name and not serial:
-                    continue
+            if not device_name and not serial:
+                continue
 
-                asset_id = generate_asset_id(device_name, serial)
-
-                user_raw = str(data.get("Last User", ""))
-                user_email = (
-                    normalize_email(user_raw.split("\\")[-1])
-                    if "@" in user_raw
-                    else ""
-                )
-
-                assets[asset_id] = {
-                    "device_name": device_name,
-                    "serial_number": serial or None,
-                    "assigned_user": user_email or None,
-                    "type": "workstation",
-                    "model": str(data.get("Model", "")).strip(),
-                    "os": str(data.get("Operating System", "")).strip(),
-                    "status": "active",
-                    "first_seen": None,
-                    "last_seen": month,
-                    "security_state": {
-                        "edr_installed": False,
-                        "backup_enabled": False,
-                        "patched": False
-                    }
+            asset_id = generate_asset_id(device_name, serial)
+
+            user_raw = str(data.get("Last User", ""))
+            user_email = (
+                normalize_email(user_raw.split("\\")[-1])
+                if "@" in user_raw
+                else ""
+            )
+
+            assets[asset_id] = {
+                "device_name": device_name,
+                "serial_number": serial or None,
+                "assigned_user": user_email or None,
+                "type": "workstation",
+                "model": str(data.get("Model", "")).strip(),
+                "os": str(data.get("Operating System", "")).strip(),
+                "status": "active",
+                "first_seen": None,
+                "last_seen": month,
+                "security_state": {
+                    "edr_installed": False,
+                    "backup_enabled": False,
+                    "patched": False
                 }
+            }
 
     return assets
 
@@ -274,29 +634,40 @@ def validate_assets(assets: Dict):
 # Main Orchestrator
 # =====================================================
 
-def parse_asset_list(
-    input_path: str,
-    month: str,
-    previous_snapshot_path: str,
-    output_path: str
-):
+def parse_asset_file(input_path: str, month: str) -> Dict[str, dict]:
+    """
+    Raw parse only (no previous-month resolution). Independent per month,
+    so backfills can run it for many months in parallel.
+    """
     month = month_to_str(month)
-    previous_assets = load_previous_snapshot(previous_snapshot_path)
 
     if input_path.lower().endswith(".xlsx"):
-        current_assets = parse_asset_list_xlsx(input_path, month)
-    elif input_path.lower().endswith(".pdf"):
-        current_assets = parse_asset_list_pdf(input_path, month)
-    else:
-        raise ValueError("Unsupported file format")
+        return parse_asset_list_xlsx(input_path, month)
+    if input_path.lower().endswith(".csv"):
+        return parse_asset_list_csv(input_path, month)
+    if input_path.lower().endswith(".parquet"):
+        return parse_asset_list_parquet(input_path, month)
+    if input_path.lower().endswith(".pdf"):
+        return parse_asset_list_pdf(input_path, month)
+    raise ValueError("Unsupported file format")
 
+
+def finalize_asset_snapshot(current_assets: Dict, previous_assets: Dict, month: str) -> Dict:
+    """
+    Resolves first_seen / retirement against the previous month and wraps
+    the result in the canonical snapshot.
+    """
     resolve_first_seen(current_assets, previous_assets, month)
     retired_assets = mark_retired_assets(current_assets, previous_assets)
     final_assets = {**current_assets, **retired_assets}
 
     validate_assets(final_assets)
 
-    snapshot = {
+    print("✅ Asset list parsed successfully")
+    print(f"   Active devices : {len(current_assets)}")
+    print(f"   Retired devices: {len(retired_assets)}")
+
+    return {
         "metadata": {
             "generated_at": datetime.utcnow().isoformat() + "Z",
             "month": month,
@@ -305,15 +676,46 @@ def parse_asset_list(
         "assets": final_assets
     }
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, "w") as f:
-        json.dump(snapshot, f, indent=2)
+def build_asset_snapshot(input_path: str, month: str, previous_assets: Dict) -> Dict:
+    """
+    Parses an asset list and resolves first-seen / retirement against
+    the previous month in memory. Returns the canonical snapshot.
+    """
+    current_assets = parse_asset_file(input_path, month)
+    return finalize_asset_snapshot(current_assets, previous_assets, month)
 
-    print("✅ Asset list parsed successfully")
-    print(f"   Active devices : {len(current_assets)}")
-    print(f"   Retired devices: {len(retired_assets)}")
-    print(f"📄 Output written to: {output_path}")
+
+def save_snapshot(snapshot: Dict, output_path: str) -> Path:
+    return snapshot_store.save_snapshot(snapshot, output_path)
+
+
+def parse_asset_list(
+    input_path: str,
+    month: str,
+    previous_snapshot_path: str,
+    output_path: str,
+    history: str = "",
+    client: str = LEGACY_CLIENT
+):
+    """
+    With a history store, the previous month is read from it unless a
+    previous snapshot file is given, and the snapshot is recorded in it.
+    """
+    if history and not previous_snapshot_path:
+        previous_assets = load_previous_history(history, client, month)
+    else:
+        previous_assets = load_previous_snapshot(previous_snapshot_path)
+
+    snapshot = build_asset_snapshot(input_path, month, previous_assets)
+
+    written = save_snapshot(snapshot, output_path)
+
+    print(f"📄 Output written to: {written}")
+
+    if history:
+        history_store.record_snapshot(history, client, snapshot)
+        print(f"🗄 History store: {history}")
 
 
 # =====================================================
@@ -328,6 +730,8 @@ if __name__ == "__main__":
     parser.add_argument("--month", required=True)
     parser.add_argument("--previous", default="")
     parser.add_argument("--output", required=True)
+    parser.add_argument("--history", default="", help="History store (SQLite) to read / record months in")
+    parser.add_argument("--client", default=LEGACY_CLIENT, help="Client the month is recorded under")
 
     args = parser.parse_args()
 
@@ -335,7 +739,9 @@ if __name__ == "__main__":
         input_path=args.input,
         month=args.month,
         previous_snapshot_path=args.previous,
-        output_path=args.output
+        output_path=args.output,
+        history=args.history,
+        client=args.client
     )
 
 
@@ -1,7 +1,7 @@
 """
 User List Parser
 ----------------
-Parses User List reports (PDF / XLSX) into canonical JSON user objects.
+Parses User List reports (PDF / XLSX / CSV / Parquet) into canonical JSON user objects.
 
 Phase: 1 (DB-less)
 Hardened for:
@@ -10,15 +10,23 @@ Hardened for:
 - Duplicate safety
 """
 
-import json
 import os
 from datetime import datetime
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, List, Optional
 
 import pandas as pd
-import pdfplumber
 import unicodedata
 
+from common import history_store, snapshot_store
+from common.metrics import timed
+from common.pdf_tables import iter_tables
+from common.tabular import (
+    convert_cell, is_missing, iter_csv_rows, parquet_columns,
+    read_csv_columns, read_parquet_columns
+)
+from pipeline.layout import LEGACY_CLIENT
+
 
 # =========================
 # Column Synonyms
@@ -79,10 +87,14 @@ def month_to_str(month: str) -> str:
 
 
 def load_previous_snapshot(path: str) -> Dict:
-    if not path or not os.path.exists(path):
-        return {}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f).get("users", {})
+    return snapshot_store.load_entities(path, "users")
+
+
+def load_previous_history(history: str, client: str, month: str) -> Dict:
+    """Latest month on record in the history store before month (not only month - 1)."""
+    prev_month, previous = history_store.load_previous_entities(history, client, month, "users")
+    print(f"ℹ️ Previous users on record: {prev_month or 'none'}")
+    return previous
 
 
 def find_column(df: pd.DataFrame, candidates: List[str]):
@@ -120,30 +132,31 @@ def build_user(email, name, status_raw, products_raw, month):
 
 
 # =========================
-# Excel Parser
+# Engines
 # =========================
 
-def parse_user_list_xlsx(path: str, month: str) -> Dict[str, dict]:
-    df = pd.read_excel(path)
-    df.columns = [str(c).strip() for c in df.columns]
+# "vectorized" (pandas column ops) or "rows" (iterrows + build_user)
+USER_ENGINE = os.environ.get("USER_ENGINE", "vectorized")
 
-    email_col = find_column(df, EMAIL_COLUMNS)
-    if not email_col:
-        raise ValueError(f"❌ No email column found. Columns: {list(df.columns)}")
+ACTIVE_STATUSES = ("yes", "true", "enabled", "active", "1")
+M365_PATTERN = "office 365|microsoft 365|m365"
 
-    first_col = find_column(df, FIRST_NAME_COLUMNS)
-    last_col = find_column(df, LAST_NAME_COLUMNS)
-    name_col = find_column(df, NAME_COLUMNS)
-    status_col = find_column(df, STATUS_COLUMNS)
-    product_col = find_column(df, PRODUCT_COLUMNS)
 
-    users = {}
-    duplicates = set()
+def resolve_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    return {
+        "email": find_column(df, EMAIL_COLUMNS),
+        "first": find_column(df, FIRST_NAME_COLUMNS),
+        "last": find_column(df, LAST_NAME_COLUMNS),
+        "name": find_column(df, NAME_COLUMNS),
+        "status": find_column(df, STATUS_COLUMNS),
+        "product": find_column(df, PRODUCT_COLUMNS),
+    }
 
-    for _, row in df.iterrows():
-        raw_email = str(row.get(email_col, "")).strip()
-        email = normalize_email(raw_email)
 
+def add_users_rows(df: pd.DataFrame, cols: Dict, month: str, users: Dict, duplicates: set):
+    """Row engine: one normalize_email / build_user call per row."""
+    for _, row in df.iterrows():
+        email = normalize_email(str(row.get(cols["email"], "")).strip())
         if not email:
             continue
 
@@ -151,101 +164,252 @@ def parse_user_list_xlsx(path: str, month: str) -> Dict[str, dict]:
             duplicates.add(email)
             continue
 
-        if name_col:
-            name = str(row.get(name_col, "")).strip()
+        if cols["name"]:
+            name = str(row.get(cols["name"], "")).strip()
         else:
-            first = str(row.get(first_col, "")).strip() if first_col else ""
-            last = str(row.get(last_col, "")).strip() if last_col else ""
+            first = str(row.get(cols["first"], "")).strip() if cols["first"] else ""
+            last = str(row.get(cols["last"], "")).strip() if cols["last"] else ""
             name = f"{first} {last}".strip()
 
         users[email] = build_user(
             email,
             name,
-            row.get(status_col, "active") if status_col else "active",
-            row.get(product_col, "") if product_col else "",
+            row.get(cols["status"], "active") if cols["status"] else "active",
+            row.get(cols["product"], "") if cols["product"] else "",
             month
         )
 
+
+def as_text(values: pd.Series) -> pd.Series:
+    """str() of every cell, as the row engine does (NaN → "nan", None → "None")."""
+    return values.map(str).astype(object)
+
+
+def normalize_email_column(raw: pd.Series) -> pd.Series:
+    """normalize_email on a whole column ("" where it would return "")."""
+    email = raw.str.normalize("NFKC").str.strip().str.lower()
+    email = email.where(email.str.contains("@", regex=False), "")
+
+    for old, new in DOMAIN_ALIASES.items():
+        aliased = email.str.endswith(old)
+        email = email.where(~aliased, email.str.replace(old, new, regex=False))
+
+    return email
+
+
+def optional_text(df: pd.DataFrame, column: Optional[str], default: str) -> pd.Series:
+    """
+    Lower-cased text of an optional column; blank cells count as empty.
+    (The row engine raised on blank XLSX cells, which come through as NaN.)
+    """
+    if not column:
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[column]
+    values = values.where(values.notna() & values.astype(bool), "")
+    return as_text(values).str.lower()
+
+
+def user_columns(df: pd.DataFrame, cols: Dict) -> pd.DataFrame:
+    """
+    Vectorized engine: normalized email, name, status and M365 flag for
+    every row with a usable email, as columns.
+    """
+    email = normalize_email_column(as_text(df[cols["email"]]).str.strip())
+
+    if cols["name"]:
+        name = as_text(df[cols["name"]]).str.strip()
+    else:
+        first = as_text(df[cols["first"]]).str.strip() if cols["first"] else ""
+        last = as_text(df[cols["last"]]).str.strip() if cols["last"] else ""
+        name = pd.Series(first + " " + last, index=df.index, dtype=object).str.strip()
+    name = name.where(name != "", email.str.split("@").str[0])
+
+    frame = pd.DataFrame({
+        "email": email,
+        "name": name,
+        "active": optional_text(df, cols["status"], "active").isin(ACTIVE_STATUSES),
+        "m365": optional_text(df, cols["product"], "").str.contains(M365_PATTERN, regex=True),
+    })
+    return frame[frame["email"] != ""]
+
+
+def users_from_frames(frames: List[pd.DataFrame], month: str, duplicates: set) -> Dict[str, dict]:
+    """First row per email wins; the users dict is built in one pass."""
+    if not frames:
+        return {}
+
+    frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    repeated = frame["email"].duplicated()
+    duplicates.update(frame.loc[repeated, "email"].tolist())
+    frame = frame[~repeated]
+
+    return {
+        email: {
+            "name": name,
+            "status": "active" if active else "inactive",
+            "first_seen": None,
+            "last_seen": month,
+            "services": {
+                "m365": bool(m365),
+                "edr": False,
+                "backup": False,
+                "phishing_training": False,
+                "dark_web_monitoring": False
+            },
+            "risk_signals": {
+                "phishing_clicked": False,
+                "dark_web_exposed": False,
+                "edr_incidents": 0
+            }
+        }
+        for email, name, active, m365 in zip(
+            frame["email"].tolist(), frame["name"].tolist(),
+            frame["active"].tolist(), frame["m365"].tolist()
+        )
+    }
+
+
+# =========================
+# Excel / CSV / Parquet Parsers
+# =========================
+
+def users_from_table(df: pd.DataFrame, month: str, engine: str, source: str) -> Dict[str, dict]:
+    """One header row + rows (Excel, CSV or Parquet) → users."""
+    engine = engine or USER_ENGINE
+
+    cols = resolve_columns(df)
+    if not cols["email"]:
+        raise ValueError(f"❌ No email column found. Columns: {list(df.columns)}")
+
+    users = {}
+    duplicates = set()
+
+    if engine == "vectorized":
+        users = users_from_frames([user_columns(df, cols)], month, duplicates)
+    elif engine == "rows":
+        add_users_rows(df, cols, month, users, duplicates)
+    else:
+        raise ValueError(f"Unknown user engine: {engine}")
+
     if duplicates:
         print(f"⚠️ Skipped {len(duplicates)} duplicate users after normalization")
 
     if not users:
-        raise ValueError("❌ Parsed 0 users from XLSX")
+        raise ValueError(f"❌ Parsed 0 users from {source}")
 
     return users
 
 
+def header_columns(names: List) -> pd.DataFrame:
+    """An empty frame with read_excel's column names, for resolve_columns."""
+    return pd.DataFrame(columns=[
+        f"Unnamed: {i}" if is_missing(convert_cell(c)) else str(c).strip()
+        for i, c in enumerate(names)
+    ])
+
+
+@timed
+def parse_user_list_xlsx(path: str, month: str, engine: str = None) -> Dict[str, dict]:
+    df = pd.read_excel(path)
+    df.columns = [str(c).strip() for c in df.columns]
+
+    return users_from_table(df, month, engine, "XLSX")
+
+
+@timed
+def parse_user_list_csv(path: str, month: str, engine: str = None) -> Dict[str, dict]:
+    """
+    CSV exports (Entra): the first row is the header, as in the Excel
+    parser; only the resolved columns are read, in chunks (common/tabular.py).
+    """
+    header = next(iter_csv_rows(path), [])
+    columns = header_columns(header)
+
+    # First occurrence wins for duplicated headers
+    positions = {}
+    for name in resolve_columns(columns).values():
+        if name and name not in positions:
+            positions[name] = list(columns.columns).index(name)
+
+    # Without an email column, resolve_columns reports the header as is
+    df = read_csv_columns(path, 1, len(header), positions) if positions else columns
+
+    return users_from_table(df, month, engine, "CSV")
+
+
+@timed
+def parse_user_list_parquet(path: str, month: str, engine: str = None) -> Dict[str, dict]:
+    """Parquet exports: only the resolved columns are read."""
+    names = parquet_columns(path)
+    columns = header_columns(names)
+
+    picked = {}
+    for name in resolve_columns(columns).values():
+        if name and name not in picked:
+            picked[name] = names[list(columns.columns).index(name)]
+
+    df = columns
+    if picked:
+        df = read_parquet_columns(path, list(picked.values()))
+        df.columns = list(picked)
+
+    return users_from_table(df, month, engine, "Parquet")
+
+
 # =========================
 # PDF Parser (HARDENED)
 # =========================
 
-def parse_user_list_pdf(path: str, month: str) -> Dict[str, dict]:
+@timed
+def parse_user_list_pdf(path: str, month: str, engine: str = None) -> Dict[str, dict]:
+    engine = engine or USER_ENGINE
+    if engine not in ("vectorized", "rows"):
+        raise ValueError(f"Unknown user engine: {engine}")
+
     users = {}
     duplicates = set()
+    frames = []
+
+    for _, table in iter_tables(path, family="user_list"):
+        if not table or len(table) < 2:
+            continue
 
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            table = page.extract_table()
-            if not table or len(table) < 2:
-                continue
-
-            header_row_index = None
-            for i, row in enumerate(table):
-                if row and any("email" in str(c).lower() for c in row if c):
-                    header_row_index = i
-                    break
-
-            if header_row_index is None:
-                continue
-
-            headers = [
-                normalize_col(h) if h else f"col_{i}"
-                for i, h in enumerate(table[header_row_index])
-            ]
-
-            rows = [
-                r for r in table[header_row_index + 1 :]
-                if r and len(r) == len(headers)
-            ]
-
-            if not rows:
-                continue
-
-            df = pd.DataFrame(rows, columns=headers)
-
-            email_col = find_column(df, EMAIL_COLUMNS)
-            if not email_col:
-                continue
-
-            first_col = find_column(df, FIRST_NAME_COLUMNS)
-            last_col = find_column(df, LAST_NAME_COLUMNS)
-            name_col = find_column(df, NAME_COLUMNS)
-            status_col = find_column(df, STATUS_COLUMNS)
-            product_col = find_column(df, PRODUCT_COLUMNS)
-
-            for _, row in df.iterrows():
-                email = normalize_email(str(row.get(email_col, "")).strip())
-                if not email:
-                    continue
-
-                if email in users:
-                    duplicates.add(email)
-                    continue
-
-                if name_col:
-                    name = str(row.get(name_col, "")).strip()
-                else:
-                    first = str(row.get(first_col, "")).strip() if first_col else ""
-                    last = str(row.get(last_col, "")).strip() if last_col else ""
-                    name = f"{first} {last}".strip()
-
-                users[email] = build_user(
-                    email,
-                    name,
-                    row.get(status_col, "active") if status_col else "active",
-                    row.get(product_col, "") if product_col else "",
-                    month
-                )
+        header_row_index = None
+        for i, row in enumerate(table):
+            if row and any("email" in str(c).lower() for c in row if c):
+                header_row_index = i
+                break
+
+        if header_row_index is None:
+            continue
+
+        headers = [
+            normalize_col(h) if h else f"col_{i}"
+            for i, h in enumerate(table[header_row_index])
+        ]
+
+        rows = [
+            r for r in table[header_row_index + 1 :]
+            if r and len(r) == len(headers)
+        ]
+
+        if not rows:
+            continue
+
+        df = pd.DataFrame(rows, columns=headers)
+
+        cols = resolve_columns(df)
+        if not cols["email"]:
+            continue
+
+        if engine == "vectorized":
+            frames.append(user_columns(df, cols))
+        else:
+            add_users_rows(df, cols, month, users, duplicates)
+
+    if engine == "vectorized":
+        users = users_from_frames(frames, month, duplicates)
 
     if duplicates:
         print(f"⚠️ Skipped {len(duplicates)} duplicate users after normalization")
@@ -284,21 +448,35 @@ def validate_users(users: Dict):
 # Main Orchestrator
 # =========================
 
-def parse_user_list(input_path, month, previous_snapshot_path, output_path):
+def parse_user_file(input_path: str, month: str) -> Dict[str, dict]:
+    """
+    Raw parse only (no previous-month resolution). Independent per month,
+    so backfills can run it for many months in parallel.
+    """
     month = month_to_str(month)
-    previous_users = load_previous_snapshot(previous_snapshot_path)
 
     if input_path.lower().endswith(".xlsx"):
-        current_users = parse_user_list_xlsx(input_path, month)
-    elif input_path.lower().endswith(".pdf"):
-        current_users = parse_user_list_pdf(input_path, month)
-    else:
-        raise ValueError("Unsupported file type")
-
+        return parse_user_list_xlsx(input_path, month)
+    if input_path.lower().endswith(".csv"):
+        return parse_user_list_csv(input_path, month)
+    if input_path.lower().endswith(".parquet"):
+        return parse_user_list_parquet(input_path, month)
+    if input_path.lower().endswith(".pdf"):
+        return parse_user_list_pdf(input_path, month)
+    raise ValueError("Unsupported file type")
+
+
+def finalize_user_snapshot(current_users: Dict, previous_users: Dict, month: str) -> Dict:
+    """
+    Resolves first_seen against the previous month and wraps the result
+    in the canonical snapshot.
+    """
     resolve_first_seen(current_users, previous_users, month)
     validate_users(current_users)
 
-    snapshot = {
+    print(f"✅ User list parsed successfully: {len(current_users)} users")
+
+    return {
         "metadata": {
             "generated_at": datetime.utcnow().isoformat() + "Z",
             "month": month,
@@ -307,13 +485,46 @@ def parse_user_list(input_path, month, previous_snapshot_path, output_path):
         "users": current_users
     }
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, indent=2)
+def build_user_snapshot(input_path: str, month: str, previous_users: Dict) -> Dict:
+    """
+    Parses a user list and resolves it against the previous month in memory.
+    Returns the canonical snapshot without touching disk.
+    """
+    current_users = parse_user_file(input_path, month)
+    return finalize_user_snapshot(current_users, previous_users, month)
+
+
+def save_snapshot(snapshot: Dict, output_path: str) -> Path:
+    return snapshot_store.save_snapshot(snapshot, output_path)
+
+
+def parse_user_list(
+    input_path,
+    month,
+    previous_snapshot_path,
+    output_path,
+    history: str = "",
+    client: str = LEGACY_CLIENT
+):
+    """
+    With a history store, the previous month is read from it unless a
+    previous snapshot file is given, and the snapshot is recorded in it.
+    """
+    if history and not previous_snapshot_path:
+        previous_users = load_previous_history(history, client, month)
+    else:
+        previous_users = load_previous_snapshot(previous_snapshot_path)
 
-    print(f"✅ User list parsed successfully: {len(current_users)} users")
-    print(f"📄 Output written to: {output_path}")
+    snapshot = build_user_snapshot(input_path, month, previous_users)
+
+    written = save_snapshot(snapshot, output_path)
+
+    print(f"📄 Output written to: {written}")
+
+    if history:
+        history_store.record_snapshot(history, client, snapshot)
+        print(f"🗄 History store: {history}")
 
 
 # =========================
@@ -328,6 +539,8 @@ if __name__ == "__main__":
     parser.add_argument("--month", required=True)
     parser.add_argument("--previous", default="")
     parser.add_argument("--output", required=True)
+    parser.add_argument("--history", default="", help="History store (SQLite) to read / record months in")
+    parser.add_argument("--client", default=LEGACY_CLIENT, help="Client the month is recorded under")
 
     args = parser.parse_args()
 
@@ -335,5 +548,7 @@ if __name__ == "__main__":
         input_path=args.input,
         month=args.month,
         previous_snapshot_path=args.previous,
-        output_path=args.output
+        output_path=args.output,
+        history=args.history,
+        client=args.client
     )
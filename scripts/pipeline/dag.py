@@ -0,0 +1,321 @@
+"""
+Pipeline DAG
+------------
+In-process pipeline engine. Stages are declared as a DAG of Python callables
+that hand in-memory objects to each other.
+
+Design:
+- One interpreter, one import of pandas / pdfplumber / reportlab
+- Stage outputs passed by reference (no JSON round-trip between stages)
+- JSON written only as a checkpoint of each stage's output (compact,
+  through common/serialization.py)
+- Deterministic execution order (declaration order breaks ties)
+- Independent branches (e.g. asset vs user enrichment) run concurrently
+  on a process pool and join where the DAG joins
+- Stages whose inputs, parameters and code are unchanged are skipped and
+  their checkpoint is loaded instead (see pipeline/incremental.py)
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from common import serialization
+from common.metrics import drain, track
+from pipeline.incremental import is_fresh, source_file, stage_fingerprint, write_manifest
+
+
+# =====================================================
+# Checkpoint Writers / Readers
+# =====================================================
+
+def write_json(data: Any, path: str):
+    serialization.save_json(data, path)
+
+
+def read_json(path: str) -> Any:
+    return serialization.load_json(path)
+
+
+def write_text(data: str, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+
+
+def read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def written_by_stage(data: Any, path: str):
+    """For stages that write their own output file (e.g. the PDF)."""
+
+
+# =====================================================
+# Stage Model
+# =====================================================
+
+class PipelineError(Exception):
+    def __init__(self, stage: "Stage", cause: Any):
+        super().__init__(f"{stage.label}: {cause}")
+        self.stage = stage
+        self.cause = cause
+
+
+@dataclass
+class Stage:
+    """
+    A single pipeline step.
+
+    func is called as func(*[result of each dep], **params). A stage whose
+    result is None writes no checkpoint (e.g. diff skipped on first month).
+
+    inputs lists the raw files the stage reads and code the source files
+    that implement it (hashed with the project modules they import, see
+    pipeline/incremental.py); together with params and upstream keys they
+    form the stage key. Only stages with a checkpoint can be skipped.
+    """
+    name: str
+    func: Callable[..., Any]
+    deps: List[str] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)
+    checkpoint: Optional[str] = None
+    save: Callable[[Any, str], None] = write_json
+    load: Callable[[str], Any] = read_json
+    inputs: List[str] = field(default_factory=list)
+    code: List[str] = field(default_factory=list)
+    label: str = ""
+    manifest: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.label = self.label or self.name
+
+
+class Pipeline:
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+        self.force = False
+        self.records: List[Dict[str, Any]] = []
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        deps: Optional[List[str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        checkpoint: Optional[str] = None,
+        save: Callable[[Any, str], None] = write_json,
+        load: Callable[[str], Any] = read_json,
+        inputs: Optional[List[str]] = None,
+        code: Optional[List[Any]] = None,
+        label: str = ""
+    ) -> Stage:
+        """
+        code accepts functions, modules or paths; it defaults to func and
+        is stored as source paths so stages stay picklable.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+
+        stage = Stage(
+            name=name,
+            func=func,
+            deps=list(deps or []),
+            params=dict(params or {}),
+            checkpoint=checkpoint,
+            save=save,
+            load=load,
+            inputs=[str(path) for path in inputs or []],
+            code=[source_file(obj) for obj in [func, *(code or [])]],
+            label=label
+        )
+        self.stages[name] = stage
+        return stage
+
+    # -------------------------
+    # Graph
+    # -------------------------
+
+    def order(self) -> List[Stage]:
+        """
+        Topological order (Kahn). Ready stages are taken in declaration
+        order so runs are reproducible.
+        """
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        remaining = {name: set(stage.deps) for name, stage in self.stages.items()}
+        ordered = []
+
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Cycle detected between stages: {sorted(remaining)}")
+
+            name = ready[0]
+            ordered.append(self.stages[name])
+            del remaining[name]
+            for deps in remaining.values():
+                deps.discard(name)
+
+        return ordered
+
+    def branches(self) -> List[List[Stage]]:
+        """
+        Splits the DAG into branches: maximal linear chains where each stage
+        has a single dependency and is that dependency's only consumer.
+        A branch is scheduled as one unit, so in-memory hand-off inside a
+        branch never crosses a process boundary.
+        """
+        consumers: Dict[str, List[str]] = {name: [] for name in self.stages}
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                consumers[dep].append(stage.name)
+
+        chains: List[List[Stage]] = []
+        chain_of: Dict[str, List[Stage]] = {}
+
+        for stage in self.order():
+            if len(stage.deps) == 1 and len(consumers[stage.deps[0]]) == 1:
+                chain = chain_of[stage.deps[0]]
+            else:
+                chain = []
+                chains.append(chain)
+            chain.append(stage)
+            chain_of[stage.name] = chain
+
+        return chains
+
+    def fingerprint(self):
+        """
+        Computes every stage key up front (keys depend only on the graph,
+        input files and code, never on results), so skip decisions can be
+        made wherever the stage ends up running.
+        """
+        for stage in self.order():
+            stage.manifest = stage_fingerprint(
+                name=stage.name,
+                params=stage.params,
+                inputs=stage.inputs,
+                code=stage.code,
+                dep_keys={dep: self.stages[dep].manifest["key"] for dep in stage.deps}
+            )
+
+    # -------------------------
+    # Execution
+    # -------------------------
+
+    def run_stage(self, stage: Stage, results: Dict[str, Any]) -> Any:
+        key = stage.manifest.get("key")
+
+        with track(stage.name, kind="stage", label=stage.label) as metrics:
+            if stage.checkpoint and key and not self.force and is_fresh(stage.checkpoint, key):
+                print(f"\n⏭ {stage.label} (up to date)")
+                metrics["status"] = "skipped"
+                return stage.load(stage.checkpoint)
+
+            print(f"\n▶ {stage.label}")
+
+            args = [results[dep] for dep in stage.deps]
+            try:
+                result = stage.func(*args, **stage.params)
+            except Exception as exc:
+                raise PipelineError(stage, exc) from exc
+
+            if stage.checkpoint and result is not None:
+                with track(f"{stage.name}:checkpoint"):
+                    stage.save(result, stage.checkpoint)
+                if key:
+                    write_manifest(stage.checkpoint, stage.manifest)
+
+            return result
+
+    def run(self, workers: int = 1, force: bool = False) -> Dict[str, Any]:
+        """
+        workers <= 1 runs every stage in this process, in topological order.
+        workers > 1 runs independent branches concurrently on a process pool.
+        force ignores manifests and rebuilds every stage.
+        Per-stage metrics are collected in self.records either way.
+        """
+        self.force = force
+        self.fingerprint()
+
+        if workers > 1:
+            return self.run_parallel(workers)
+
+        results: Dict[str, Any] = {}
+
+        try:
+            for stage in self.order():
+                results[stage.name] = self.run_stage(stage, results)
+        finally:
+            self.records.extend(drain())
+
+        return results
+
+    def run_parallel(self, workers: int) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        remaining = self.branches()
+        running = {}
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while remaining or running:
+                ready = [
+                    chain for chain in remaining
+                    if all(dep in results for dep in chain[0].deps)
+                ]
+
+                if len(ready) > 1:
+                    print(f"\n⇉ Running {len(ready)} branches in parallel: "
+                          + " | ".join(" → ".join(s.name for s in chain) for chain in ready))
+
+                remaining = [chain for chain in remaining if chain not in ready]
+
+                for chain in ready:
+                    inputs = {dep: results[dep] for dep in chain[0].deps}
+                    running[pool.submit(run_branch, self, chain, inputs)] = chain
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    chain = running.pop(future)
+                    outputs, failure, records = future.result()
+                    self.records.extend(records)
+                    if failure:
+                        name, message = failure
+                        for other in running:
+                            other.cancel()
+                        raise PipelineError(self.stages[name], message)
+                    results.update(outputs)
+
+        return results
+
+
+# =====================================================
+# Process Pool Entry Point
+# =====================================================
+
+def run_branch(
+    pipeline: Pipeline,
+    chain: List[Stage],
+    inputs: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[Tuple[str, str]], List[Dict[str, Any]]]:
+    """
+    Runs one branch inside a worker. Failures and metrics are returned
+    rather than raised / kept so they cross the process boundary as data.
+    """
+    results = dict(inputs)
+    outputs = {}
+
+    for stage in chain:
+        try:
+            results[stage.name] = outputs[stage.name] = pipeline.run_stage(stage, results)
+        except PipelineError as exc:
+            return outputs, (stage.name, f"{type(exc.cause).__name__}: {exc.cause}"), drain()
+
+    return outputs, None, drain()
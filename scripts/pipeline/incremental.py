@@ -0,0 +1,156 @@
+"""
+Incremental Rebuild
+-------------------
+Content-hash fingerprints that let pipeline stages skip themselves when
+nothing they depend on has changed (make / bazel style).
+
+A stage key covers:
+- SHA-256 of every raw input file the stage reads
+- Stage parameters
+- Code version (SHA-256 of the source files that implement the stage
+  and of every project module under scripts/ they import, transitively)
+- Keys of upstream stages (so a change propagates downstream only)
+
+The key is recorded in a manifest next to the stage checkpoint.
+"""
+
+import ast
+import hashlib
+import inspect
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from common import serialization
+from common.hashing import file_sha256
+
+
+# Bump to invalidate every manifest (e.g. checkpoint format change)
+MANIFEST_VERSION = 2
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+# =====================================================
+# Hashing
+# =====================================================
+
+def source_file(obj: Any) -> str:
+    """Source file of a function / module, or a path given directly."""
+    if isinstance(obj, (str, Path)):
+        return str(obj)
+    return inspect.getsourcefile(obj)
+
+
+def module_file(name: str) -> Optional[Path]:
+    """scripts/ source file of a dotted module name, if it is a project module."""
+    base = SCRIPTS.joinpath(*name.split("."))
+    for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+@lru_cache(maxsize=None)
+def imported_files(path: Path) -> FrozenSet[Path]:
+    """Project modules path imports, including imports inside functions."""
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        return frozenset()
+
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            # `from common import tabular` names a module, `from common.tabular import x` does not
+            names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        found.update(file for file in map(module_file, names) if file is not None)
+
+    return frozenset(found)
+
+
+def is_entry_script(path: Path) -> bool:
+    # run_*.py import every stage's module; their stages list what they call in code=
+    return path.parent == SCRIPTS and path.name.startswith("run_")
+
+
+def code_files(code: List[Any]) -> List[Path]:
+    """The code sources plus the project modules they import, transitively."""
+    seen = set()
+    pending = [Path(source_file(obj)).resolve() for obj in code]
+
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        if not is_entry_script(path):
+            pending.extend(imported_files(path))
+
+    return sorted(seen)
+
+
+def code_version(code: List[Any]) -> str:
+    digest = hashlib.sha256(f"v{MANIFEST_VERSION}".encode())
+    for path in code_files(code):
+        name = path.relative_to(SCRIPTS).as_posix() if path.is_relative_to(SCRIPTS) else path.name
+        digest.update(name.encode())
+        digest.update((file_sha256(path) or "missing").encode())
+    return digest.hexdigest()
+
+
+def stage_fingerprint(
+    name: str,
+    params: Dict[str, Any],
+    inputs: List[str],
+    code: List[Any],
+    dep_keys: Dict[str, str]
+) -> Dict[str, Any]:
+    """
+    Returns the manifest body for a stage; manifest["key"] is the
+    combined hash used for the up-to-date check.
+    """
+    manifest = {
+        "stage": name,
+        "manifest_version": MANIFEST_VERSION,
+        "code_version": code_version(code),
+        "params": json.loads(json.dumps(params, sort_keys=True, default=str)),
+        "inputs": {path: file_sha256(path) for path in sorted(inputs)},
+        "deps": dict(sorted(dep_keys.items()))
+    }
+
+    manifest["key"] = hashlib.sha256(
+        json.dumps(manifest, sort_keys=True).encode()
+    ).hexdigest()
+
+    return manifest
+
+
+# =====================================================
+# Manifests
+# =====================================================
+
+def manifest_path(checkpoint: str) -> str:
+    return str(Path(checkpoint).with_suffix(".manifest.json"))
+
+
+def is_fresh(checkpoint: str, key: str) -> bool:
+    path = manifest_path(checkpoint)
+    if not os.path.exists(checkpoint) or not os.path.exists(path):
+        return False
+    try:
+        return serialization.load_json(path).get("key") == key
+    except (OSError, ValueError):
+        return False
+
+
+def write_manifest(checkpoint: str, manifest: Dict[str, Any]):
+    body = dict(manifest, built_at=datetime.utcnow().isoformat() + "Z")
+    serialization.save_json(body, manifest_path(checkpoint))
@@ -0,0 +1,131 @@
+"""
+Month Ingestion
+---------------
+Discovers every raw report of a month and parses them all concurrently
+into one in-memory intermediate, before any join / enrichment runs.
+
+Usage:
+    reports = index_reports(raw_dir).found()  # {"users": Path, "edr": Path, ...}
+    ingest = ingest_month(reports, month)     # {"metadata", "reports", "parsed"}
+
+Design:
+- Reports are identified by content (common/report_classifier.py)
+- Each report is parsed in its own worker process; the parse functions
+  are the ones the parsers / enrichers already use
+- Reports without a parser (patch, SaaS, RocketCyber, ...) are still read
+  once, which warms the PDF table cache for later consumers
+- Worker metrics are merged back under the ingest stage
+- The result is checkpointed by the DAG (data/ingest/<month>.json), so
+  downstream stages read the parsed reports from memory or that cache
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from common.metrics import drain, merge, track
+from common.pdf_tables import iter_pdf_pages
+from enrichers.backup_enricher import parse_backup_pdf
+from enrichers.darkweb_enricher import parse_darkweb_pdf
+from enrichers.edr_enricher import parse_edr_pdf
+from enrichers.phishing_enricher import parse_phishing_pdf
+from parsers.asset_list_parser import parse_asset_file
+from parsers.user_list_parser import parse_user_file
+
+
+# =====================================================
+# Parsers
+# =====================================================
+
+# Parse function per report kind (see common/report_classifier.py);
+# user / asset lists also take the month
+PARSERS: Dict[str, Callable[..., Dict]] = {
+    "users": parse_user_file,
+    "assets": parse_asset_file,
+    "edr": parse_edr_pdf,
+    "backup": parse_backup_pdf,
+    "phishing": parse_phishing_pdf,
+    "darkweb": parse_darkweb_pdf,
+}
+
+
+# =====================================================
+# Workers
+# =====================================================
+
+def warm_tables(path: str) -> Dict[str, int]:
+    """Reads a report that has no parser yet, so its tables are cached."""
+    pages = 0
+    for _ in iter_pdf_pages(path):
+        pages += 1
+    return {"pages": pages}
+
+
+def parse_report(kind: str, path: str, month: str) -> Any:
+    with track(f"ingest:{kind}", report=Path(path).name):
+        if kind in ("users", "assets"):
+            parsed = PARSERS[kind](path, month)
+        elif kind in PARSERS:
+            parsed = PARSERS[kind](path)
+        elif path.lower().endswith(".pdf"):
+            parsed = warm_tables(path)
+        else:
+            parsed = None
+
+    return parsed
+
+
+def run_report(kind: str, path: str, month: str) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Worker entry point. Returns (parsed, metrics records) so the records
+    cross the process boundary as data.
+    """
+    return parse_report(kind, path, month), drain()
+
+
+def init_worker(share: int):
+    # Reports already run side by side, so each gets a slice of the cores
+    # for its own page sharding (an explicit setting still wins)
+    os.environ.setdefault("PDF_EXTRACT_WORKERS", str(share))
+
+
+# =====================================================
+# Stage
+# =====================================================
+
+def ingest_month(reports: Dict[str, str], month: str, workers: int = None) -> Dict:
+    """
+    Parses every report of the month, one process per report.
+    workers defaults to one per report, capped at the core count.
+    """
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, len(reports) or 1))
+    kinds = list(reports)
+
+    print(f"📥 Ingesting {len(kinds)} report(s) with {workers} worker(s): {', '.join(kinds)}")
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(max(1, cpus // workers),)
+        ) as pool:
+            futures = {kind: pool.submit(run_report, kind, reports[kind], month) for kind in kinds}
+            parsed = {}
+            for kind, future in futures.items():
+                parsed[kind], records = future.result()
+                merge(records)
+    else:
+        parsed = {kind: parse_report(kind, reports[kind], month) for kind in kinds}
+
+    return {
+        "metadata": {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "month": month,
+            "source": "ingest"
+        },
+        "reports": {kind: Path(path).name for kind, path in reports.items()},
+        "parsed": parsed
+    }
@@ -0,0 +1,109 @@
+"""
+Data Layout
+-----------
+Resolves where a client's raw reports, checkpoints and reports live.
+
+Layout:
+- Namespaced (portfolio): data/clients/<slug>/{raw,normalized,enriched,...}
+                          reports/<slug>/<month>/
+- Legacy (single client): data/{raw,normalized,enriched,...}
+                          reports/<month>/
+
+A client uses the namespaced tree as soon as data/clients/<slug>/ exists,
+so the original single-tenant tree keeps working unchanged. The client's
+display name is kept in data/clients/<slug>/client.json (written the
+first time the tree is resolved by name), so discovered tenants keep it.
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from common import serialization
+
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DATA = ROOT / "data"
+REPORTS = ROOT / "reports"
+CLIENTS = DATA / "clients"
+CLIENT_FILE = "client.json"
+
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+
+# The client the legacy single-tenant tree (data/raw, data/normalized, ...) belongs to
+LEGACY_CLIENT = "Altera Fund Advisors"
+
+
+def client_slug(client: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", client.lower()).strip("-")
+
+
+@dataclass(frozen=True)
+class ClientLayout:
+    client: str
+    data_dir: Path
+    reports_dir: Path
+
+    def raw(self, month: str) -> Path:
+        return self.data_dir / "raw" / month
+
+    def reports(self, month: str) -> Path:
+        return self.reports_dir / month
+
+    def months(self) -> List[str]:
+        """Months with a raw report directory, oldest first."""
+        raw_root = self.data_dir / "raw"
+        if not raw_root.exists():
+            return []
+        return sorted(
+            d.name for d in raw_root.iterdir()
+            if d.is_dir() and MONTH_PATTERN.match(d.name)
+        )
+
+
+def namespaced_layout(client: str) -> ClientLayout:
+    slug = client_slug(client)
+    return ClientLayout(client, CLIENTS / slug, REPORTS / slug)
+
+
+def legacy_layout(client: str) -> ClientLayout:
+    return ClientLayout(client, DATA, REPORTS)
+
+
+def client_name(data_dir: Path) -> Optional[str]:
+    """Display name recorded in a namespaced tree, if any."""
+    try:
+        name = serialization.load_json(data_dir / CLIENT_FILE).get("client")
+    except (OSError, ValueError, AttributeError):
+        return None
+    # Only a name that still maps to this directory
+    return name if isinstance(name, str) and client_slug(name) == data_dir.name else None
+
+
+def record_client_name(layout: ClientLayout):
+    recorded = client_name(layout.data_dir)
+    # A name recorded as the bare slug (discovered tree) gives way to a real one
+    if recorded is None or (recorded == layout.data_dir.name and layout.client != recorded):
+        serialization.save_json({"client": layout.client}, layout.data_dir / CLIENT_FILE, pretty=True)
+
+
+def resolve_layout(client: str) -> ClientLayout:
+    layout = namespaced_layout(client)
+    if layout.data_dir.exists():
+        record_client_name(layout)
+        return layout
+    return legacy_layout(client)
+
+
+def discover_clients() -> List[str]:
+    """
+    Display names of the clients with a namespaced data tree (the slug
+    for a tree that has never been run by name).
+    """
+    if not CLIENTS.exists():
+        return []
+    return sorted(
+        client_name(d) or d.name
+        for d in CLIENTS.iterdir() if d.is_dir()
+    )
@@ -0,0 +1,147 @@
+"""
+Run Manifest
+------------
+Writes the metrics of one pipeline run to runs/<client>/<month>/manifest.json
+and compares two such manifests.
+
+Manifest layout:
+- metadata : client, month, status, workers, host
+- totals   : wall / CPU time, max peak RSS, pages (and pre-filter skips), rows
+- stages   : one record per DAG stage (status ok | skipped | failed)
+- steps    : inner steps (parse_backup_pdf, build_device_index, checkpoints, ...)
+"""
+
+import os
+import platform
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from common import serialization
+from pipeline.layout import ROOT, client_slug
+
+
+RUNS = ROOT / "runs"
+
+METRICS = ("wall_s", "cpu_s", "peak_rss_mb")
+
+
+# =====================================================
+# Writing
+# =====================================================
+
+def run_manifest_path(client: str, month: str) -> Path:
+    return RUNS / client_slug(client) / month / "manifest.json"
+
+
+def build_run_manifest(
+    records: List[Dict],
+    client: str,
+    month: str,
+    status: str,
+    wall_s: float,
+    workers: int,
+    error: Optional[str] = None
+) -> Dict:
+    stages = [r for r in records if r.get("kind") == "stage"]
+    steps = [r for r in records if r.get("kind") != "stage"]
+    peaks = [r["peak_rss_mb"] for r in records if r.get("peak_rss_mb") is not None]
+
+    return {
+        "metadata": {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "client": client,
+            "month": month,
+            "status": status,
+            "error": error,
+            "workers": workers,
+            "host": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            }
+        },
+        "totals": {
+            "wall_s": round(wall_s, 4),
+            "cpu_s": round(sum(r["cpu_s"] for r in stages), 4),
+            "peak_rss_mb": max(peaks, default=None),
+            "pages": sum(r.get("pages") or 0 for r in stages),
+            "pages_skipped": sum(r.get("pages_skipped") or 0 for r in stages),
+            "rows": sum(r.get("rows") or 0 for r in steps),
+            "stages_run": sum(1 for r in stages if r["status"] == "ok"),
+            "stages_skipped": sum(1 for r in stages if r["status"] == "skipped")
+        },
+        "stages": stages,
+        "steps": steps
+    }
+
+
+def write_run_manifest(manifest: Dict) -> Path:
+    meta = manifest["metadata"]
+    path = run_manifest_path(meta["client"], meta["month"])
+    return serialization.save_json(manifest, path)
+
+
+# =====================================================
+# Comparison
+# =====================================================
+
+def load_run_manifest(path: str) -> Dict:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Run manifest not found: {path}")
+    return serialization.load_json(path)
+
+
+def _index(manifest: Dict) -> Dict[str, Dict]:
+    """step key → record; repeated steps (e.g. per-page calls) are summed."""
+    index = {"TOTAL": dict(manifest["totals"], kind="total")}
+
+    for record in manifest["stages"] + manifest["steps"]:
+        key = record["step"] if record.get("kind") == "stage" else f"{record.get('parent')}/{record['step']}"
+        if key in index:
+            entry = index[key]
+            for metric in ("wall_s", "cpu_s"):
+                entry[metric] = round((entry.get(metric) or 0) + (record.get(metric) or 0), 4)
+            entry["peak_rss_mb"] = max(entry.get("peak_rss_mb") or 0, record.get("peak_rss_mb") or 0)
+        else:
+            index[key] = dict(record)
+
+    return index
+
+
+def compare_run_manifests(
+    base: Dict,
+    head: Dict,
+    threshold_pct: float = 10.0,
+    min_seconds: float = 0.05
+) -> List[Dict]:
+    """
+    Per-step deltas for wall time, CPU time and peak RSS. A delta is a
+    regression when head is more than threshold_pct worse than base;
+    timings below min_seconds in base are too noisy to flag.
+    Skipped stages are excluded: a cache hit is not a speed-up.
+    """
+    base_index = _index(base)
+    head_index = _index(head)
+    rows = []
+
+    for key in list(base_index) + [k for k in head_index if k not in base_index]:
+        b = base_index.get(key)
+        h = head_index.get(key)
+        if b and h and "skipped" in (b.get("status"), h.get("status")):
+            continue
+
+        row = {"step": key, "regressions": []}
+        for metric in METRICS:
+            bv = b.get(metric) if b else None
+            hv = h.get(metric) if h else None
+            delta_pct = None
+            if bv and hv is not None:
+                delta_pct = round((hv - bv) / bv * 100, 1)
+                noisy = metric != "peak_rss_mb" and bv < min_seconds
+                if delta_pct > threshold_pct and not noisy:
+                    row["regressions"].append(metric)
+            row[metric] = {"base": bv, "head": hv, "delta_pct": delta_pct}
+        rows.append(row)
+
+    return rows
@@ -10,11 +10,12 @@ Design:
 - AI-optional
 """
 
-import json
 import os
 from datetime import datetime
 from typing import Dict
 
+from common import serialization
+
 
 # =====================================================
 # Load / Save
@@ -23,8 +24,7 @@ from typing import Dict
 def load_json(path: str) -> Dict:
     if not os.path.exists(path):
         raise FileNotFoundError(f"File not found: {path}")
-    with open(path, "r") as f:
-        return json.load(f)
+    return serialization.load_json(path)
 
 
 def save_text(content: str, path: str):
@@ -4,11 +4,42 @@ Full Pipeline Runner
 Runs the entire Cybersecurity Reporting System end-to-end.
 
 Phase 1 → Phase 3.5 (PDF Export + Dashboard)
+
+Every phase runs in-process as a stage of a DAG (see pipeline/dag.py).
+Stages hand their outputs to each other in memory; the files under data/
+and reports/ are written as checkpoints only (asset / user snapshots as
+Parquet through common/snapshot_store.py, everything else as JSON /
+Markdown). Enrichers write overlays on the normalized snapshots
+(common/overlays.py); the insight engine applies them onto slotted
+records (common/records.py).
+Snapshots, alerts and the overlays are also recorded in the history
+store (common/history_store.py).
 """
 
-import subprocess
+import os
 import sys
+import time
 from pathlib import Path
+from typing import Optional, Tuple
+
+from common import history_store, overlays, records
+from common.history_store import history_path
+from common.overlays import load_overlay, save_overlay
+from common.snapshot_store import snapshot_path
+from dash_app.dashboard_aggregator import assemble_dashboard
+from enrichers import backup_enricher, darkweb_enricher, edr_enricher, phishing_enricher
+from insight_engine import build_insights
+from narrative_builder import build_narrative
+from pipeline.dag import (
+    Pipeline,
+    PipelineError,
+    read_text,
+    write_text,
+    written_by_stage,
+)
+from pipeline.layout import LEGACY_CLIENT, ClientLayout, resolve_layout
+from pipeline.run_manifest import build_run_manifest, write_run_manifest
+from run_month import add_month_stages
 
 
 # =====================================================
@@ -17,71 +48,100 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 SCRIPTS = ROOT / "scripts"
-DATA = ROOT / "data"
-REPORTS = ROOT / "reports"
 
-PYTHON = sys.executable
+# The four enrichment overlays only read the normalized snapshots, so
+# they are independent of each other: four workers cover the widest part
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# Reports Phase 2 joins onto the snapshots (kind → display name)
+ENRICHMENT_REPORTS = {
+    "edr": "EDR",
+    "backup": "Backup",
+    "phishing": "Phishing",
+    "darkweb": "Dark Web",
+}
 
 
 # =====================================================
-# Helpers
+# Stages
 # =====================================================
 
-def run(cmd: list, step: str):
-    print(f"\n▶ {step}")
-    print(" ".join(cmd))
-    result = subprocess.run(cmd)
-    if result.returncode != 0:
-        sys.exit(f"❌ Failed at step: {step}")
+# Enrichment joins the reports already parsed by the ingest stage; every
+# enricher emits an overlay on the normalized snapshot, not a new snapshot
+
+def edr_stage(assets: dict, ingested: dict) -> dict:
+    return edr_enricher.build_edr_overlay(assets, ingested["parsed"]["edr"])
+
+
+def backup_stage(assets: dict, ingested: dict) -> dict:
+    return backup_enricher.build_backup_overlay(assets, ingested["parsed"]["backup"])
+
+
+def phishing_stage(users: dict, ingested: dict) -> dict:
+    return phishing_enricher.build_phishing_overlay(users, ingested["parsed"]["phishing"])
+
+
+def darkweb_stage(users: dict, ingested: dict) -> dict:
+    return darkweb_enricher.build_darkweb_overlay(users, ingested["parsed"]["darkweb"])
+
+
+def observations_stage(*enrichment: dict, history: str, client: str) -> dict:
+    written = {
+        overlay["metadata"]["source"]: history_store.record_enrichment(history, client, overlay)
+        for overlay in enrichment
+    }
 
+    changed = [source for source, done in written.items() if done]
+    print(f"🗄 History store: {', '.join(changed) if changed else 'up to date'} ({history})")
+    return written
 
-def find_file(directory: Path, keywords: list):
-    if not directory.exists():
-        return None
 
-    for file in directory.iterdir():
-        if file.is_file():
-            name = file.name.lower()
-            if all(k.lower() in name for k in keywords):
-                return file
-    return None
+def insights_stage(users: dict, assets: dict, diff: dict, *enrichment: dict) -> dict:
+    # Enriched users / assets as records, the overlays set on them directly
+    return build_insights(
+        records.from_snapshot(users, *enrichment),
+        records.from_snapshot(assets, *enrichment),
+        diff
+    )
+
+
+def dashboard_stage(insights: dict, client: str, month: str, reports_dir: str) -> dict:
+    # The DAG passes dep results positionally; assemble_dashboard takes insights third
+    return assemble_dashboard(client, month, insights, reports_dir)
+
+
+def polish_stage(narrative: dict) -> str:
+    # Imported lazily: only this stage needs the LLM toolchain
+    from llm.report_polisher import render_report
+    return render_report(narrative)
+
+
+def pdf_stage(markdown: str, output_pdf_path: str, client: str, month: str) -> str:
+    # Imported lazily: only this stage needs reportlab / markdown2
+    from exporters.pdf_exporter import build_pdf
+    build_pdf(markdown, output_pdf_path, client, month)
+    return output_pdf_path
 
 
 # =====================================================
-# Main Pipeline
+# Pipeline Definition
 # =====================================================
 
-def run_pipeline(client: str, month: str):
-    print(f"\n🚀 Running full pipeline for {client} — {month}")
+def build_pipeline(client: str, month: str, layout: ClientLayout = None) -> Pipeline:
+    layout = layout or resolve_layout(client)
+    data = layout.data_dir
+    reports = layout.reports(month)
+    raw_dir = layout.raw(month)
 
-    raw_dir = DATA / "raw" / month
-    if not raw_dir.exists():
-        sys.exit(f"❌ Raw data directory not found: {raw_dir}")
+    pipeline = Pipeline(f"{client}:{month}")
 
     # -------------------------
-    # Phase 1 — Ingestion
+    # Phase 1 — Ingestion (every raw report, parsed concurrently)
     # -------------------------
-    run(
-        [PYTHON, str(SCRIPTS / "run_month.py"), "--month", month],
-        "Phase 1: Ingestion & Normalization",
-    )
+    index = add_month_stages(pipeline, month, raw_dir, data, client)
 
-    # -------------------------
-    # Discover Reports
-    # -------------------------
-    edr_report = find_file(raw_dir, ["edr"])
-    backup_report = find_file(raw_dir, ["backup"])
-    phishing_report = find_file(raw_dir, ["phishing"])
-    darkweb_report = find_file(raw_dir, ["dark", "web"])
-
-    missing = [
-        name for name, file in {
-            "EDR": edr_report,
-            "Backup": backup_report,
-            "Phishing": phishing_report,
-            "Dark Web": darkweb_report,
-        }.items() if not file
-    ]
+    missing = [name for kind, name in ENRICHMENT_REPORTS.items() if not index.get(kind)]
 
     if missing:
         sys.exit(f"❌ Missing required report(s): {', '.join(missing)}")
@@ -89,98 +149,178 @@ def run_pipeline(client: str, month: str):
     # -------------------------
     # Phase 2 — Enrichment
     # -------------------------
-    run(
-        [PYTHON, str(SCRIPTS / "enrichers/edr_enricher.py"),
-         "--assets", f"data/normalized/{month}-assets.json",
-         "--edr-report", str(edr_report),
-         "--output", f"data/enriched/{month}-assets-edr.json"],
-        "Phase 2.1: EDR Enrichment",
+    pipeline.add(
+        "edr", edr_stage, deps=["assets", "ingest"],
+        checkpoint=str(snapshot_path(data / "enriched" / f"{month}-assets-edr-overlay")),
+        save=save_overlay,
+        load=load_overlay,
+        code=[edr_enricher, overlays],
+        label="Phase 2.1: EDR Enrichment"
     )
 
-    run(
-        [PYTHON, str(SCRIPTS / "enrichers/backup_enricher.py"),
-         "--assets", f"data/enriched/{month}-assets-edr.json",
-         "--backup-report", str(backup_report),
-         "--output", f"data/enriched/{month}-assets-edr-backup.json"],
-        "Phase 2.2: Backup Enrichment",
+    pipeline.add(
+        "backup", backup_stage, deps=["assets", "ingest"],
+        checkpoint=str(snapshot_path(data / "enriched" / f"{month}-assets-backup-overlay")),
+        save=save_overlay,
+        load=load_overlay,
+        code=[backup_enricher, overlays],
+        label="Phase 2.2: Backup Enrichment"
     )
 
-    run(
-        [PYTHON, str(SCRIPTS / "enrichers/phishing_enricher.py"),
-         "--users", f"data/normalized/{month}-users.json",
-         "--phishing-report", str(phishing_report),
-         "--output", f"data/enriched/{month}-users-phishing.json"],
-        "Phase 2.3: Phishing Enrichment",
+    pipeline.add(
+        "phishing", phishing_stage, deps=["users", "ingest"],
+        checkpoint=str(snapshot_path(data / "enriched" / f"{month}-users-phishing-overlay")),
+        save=save_overlay,
+        load=load_overlay,
+        code=[phishing_enricher, overlays],
+        label="Phase 2.3: Phishing Enrichment"
     )
 
-    run(
-        [PYTHON, str(SCRIPTS / "enrichers/darkweb_enricher.py"),
-         "--users", f"data/enriched/{month}-users-phishing.json",
-         "--darkweb-report", str(darkweb_report),
-         "--output", f"data/enriched/{month}-users-phishing-darkweb.json"],
-        "Phase 2.4: Dark Web Enrichment",
+    pipeline.add(
+        "darkweb", darkweb_stage, deps=["users", "ingest"],
+        checkpoint=str(snapshot_path(data / "enriched" / f"{month}-users-darkweb-overlay")),
+        save=save_overlay,
+        load=load_overlay,
+        code=[darkweb_enricher, overlays],
+        label="Phase 2.4: Dark Web Enrichment"
     )
 
+    history = history_path(data)
+    if history is not None:
+        pipeline.add(
+            "observations", observations_stage, deps=["edr", "backup", "phishing", "darkweb"],
+            params={"history": str(history), "client": client},
+            code=[history_store],
+            label="Phase 2: Enrichment History"
+        )
+
     # -------------------------
     # Phase 2.5 — Insight Engine
     # -------------------------
-    run(
-        [PYTHON, str(SCRIPTS / "insight_engine.py"),
-         "--users", f"data/enriched/{month}-users-phishing-darkweb.json",
-         "--assets", f"data/enriched/{month}-assets-edr-backup.json",
-         "--diff", f"data/diffs/{month}-diff.json",
-         "--output", f"data/insights/{month}-insights.json"],
-        "Phase 2.5: Insight Engine",
+    pipeline.add(
+        "insights", insights_stage, deps=["users", "assets", "diff", "edr", "backup", "phishing", "darkweb"],
+        checkpoint=str(data / "insights" / f"{month}-insights.json"),
+        code=[build_insights, overlays, records],
+        label="Phase 2.5: Insight Engine"
     )
 
     # -------------------------
     # Phase 2.6 — Narrative Builder
     # -------------------------
-    run(
-        [PYTHON, str(SCRIPTS / "narrative_builder.py"),
-         "--insights", f"data/insights/{month}-insights.json",
-         "--output", f"data/narratives/{month}-narrative.json"],
-        "Phase 2.6: Narrative Builder",
+    pipeline.add(
+        "narrative", build_narrative, deps=["insights"],
+        checkpoint=str(data / "narratives" / f"{month}-narrative.json"),
+        label="Phase 2.6: Narrative Builder"
     )
 
     # -------------------------
-    # Phase 2.7 — Dashboard Aggregation ✅ FIXED
+    # Phase 2.7 — Dashboard Aggregation
     # -------------------------
-    run(
-        [PYTHON, str(SCRIPTS / "dash_app/dashboard_aggregator.py"),
-         "--client", client,
-         "--month", month,
-         "--insights", f"data/insights/{month}-insights.json",
-         "--output", f"data/dashboard/{month}-dashboard.json"],
-        "Phase 2.7: Dashboard Aggregation",
+    pipeline.add(
+        "dashboard", dashboard_stage, deps=["insights"],
+        params={
+            "client": client,
+            "month": month,
+            "reports_dir": str(reports.relative_to(ROOT))
+        },
+        checkpoint=str(data / "dashboard" / f"{month}-dashboard.json"),
+        code=[assemble_dashboard],
+        label="Phase 2.7: Dashboard Aggregation"
     )
 
     # -------------------------
     # Phase 3 — LLM Report
     # -------------------------
-    run(
-        [PYTHON, str(SCRIPTS / "llm/report_polisher.py"),
-         "--narrative", f"data/narratives/{month}-narrative.json",
-         "--output", f"reports/{month}/executive_report_polished.md"],
-        "Phase 3: LLM-Polished Executive Report",
+    pipeline.add(
+        "report", polish_stage, deps=["narrative"],
+        checkpoint=str(reports / "executive_report_polished.md"),
+        save=write_text,
+        load=read_text,
+        code=[SCRIPTS / "llm" / "report_polisher.py", SCRIPTS / "llm" / "prompt_templates.py"],
+        label="Phase 3: LLM-Polished Executive Report"
     )
 
     # -------------------------
     # Phase 3.5 — PDF Export
     # -------------------------
-    run(
-        [PYTHON, str(SCRIPTS / "exporters/pdf_exporter.py"),
-         "--input", f"reports/{month}/executive_report_polished.md",
-         "--output", f"reports/{month}/executive_report.pdf",
-         "--client", client,
-         "--month", month],
-        "Phase 3.5: Executive PDF Export",
+    pipeline.add(
+        "pdf", pdf_stage, deps=["report"],
+        params={
+            "output_pdf_path": str(reports / "executive_report.pdf"),
+            "client": client,
+            "month": month
+        },
+        checkpoint=str(reports / "executive_report.pdf"),
+        save=written_by_stage,
+        load=str,
+        code=[SCRIPTS / "exporters" / "pdf_exporter.py"],
+        label="Phase 3.5: Executive PDF Export"
+    )
+
+    return pipeline
+
+
+# =====================================================
+# Main Pipeline
+# =====================================================
+
+def run_and_record(
+    pipeline: Pipeline,
+    client: str,
+    month: str,
+    workers: int,
+    force: bool = False
+) -> Tuple[Optional[str], Path]:
+    """
+    Runs the pipeline and always writes runs/<client>/<month>/manifest.json,
+    failed runs included. Returns (error or None, manifest path).
+    """
+    started = time.perf_counter()
+    error = None
+
+    try:
+        pipeline.run(workers=workers, force=force)
+    except PipelineError as exc:
+        error = str(exc)
+
+    manifest = build_run_manifest(
+        pipeline.records,
+        client=client,
+        month=month,
+        status="failed" if error else "ok",
+        wall_s=time.perf_counter() - started,
+        workers=workers,
+        error=error
     )
 
+    return error, write_run_manifest(manifest)
+
+
+def run_pipeline(
+    client: str,
+    month: str,
+    workers: int = DEFAULT_WORKERS,
+    force: bool = False
+):
+    print(f"\n🚀 Running full pipeline for {client} — {month}")
+
+    layout = resolve_layout(client)
+    raw_dir = layout.raw(month)
+    if not raw_dir.exists():
+        sys.exit(f"❌ Raw data directory not found: {raw_dir}")
+
+    pipeline = build_pipeline(client, month, layout)
+
+    error, manifest_path = run_and_record(pipeline, client, month, workers, force)
+    if error:
+        print(f"⏱ Run manifest     : {manifest_path}")
+        sys.exit(f"❌ Failed at step: {error}")
+
     print("\n✅ FULL PIPELINE COMPLETED SUCCESSFULLY")
-    print(f"📄 Markdown Report : reports/{month}/executive_report_polished.md")
-    print(f"📄 PDF Report      : reports/{month}/executive_report.pdf")
-    print(f"📊 Dashboard Data  : data/dashboard/{month}-dashboard.json")
+    print(f"📄 Markdown Report : {layout.reports(month) / 'executive_report_polished.md'}")
+    print(f"📄 PDF Report      : {layout.reports(month) / 'executive_report.pdf'}")
+    print(f"📊 Dashboard Data  : {layout.data_dir / 'dashboard' / f'{month}-dashboard.json'}")
+    print(f"⏱ Run manifest     : {manifest_path}")
 
 
 # =====================================================
@@ -191,8 +331,22 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Run full cybersecurity reporting pipeline")
-    parser.add_argument("--client", default="Altera Fund Advisors")
+    parser.add_argument("--client", default=LEGACY_CLIENT)
     parser.add_argument("--month", required=True)
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help="Process pool size for independent branches (1 = sequential)"
+    )
+
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Rebuild every stage even if its manifest is up to date"
+    )
 
     args = parser.parse_args()
-    run_pipeline(client=args.client, month=args.month)
+    run_pipeline(
+        client=args.client,
+        month=args.month,
+        workers=args.workers,
+        force=args.force
+    )
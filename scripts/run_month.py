@@ -4,12 +4,33 @@ Monthly Runner
 Runs all parsers and diff engine for a given month.
 
 Phase: 1 (DB-less)
+In-process: parsers and diff engine are called directly and hand their
+snapshots to each other in memory. Snapshots are checkpointed through
+the snapshot store (common/snapshot_store.py); the diff as JSON.
+Every month is also recorded in the history store (common/history_store.py),
+which the previous month is read from when it is on record there.
 """
 
-import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List, Optional, Tuple
+import os
 import sys
 
+import diff_engine
+from diff_engine import build_diff
+from common import history_store, report_classifier
+from common.history_store import HistoryStore, history_path
+from common.report_classifier import ReportIndex, index_reports
+from common.snapshot_store import (
+    existing_snapshot, load_snapshot, save_snapshot, snapshot_file, snapshot_path
+)
+from parsers import asset_list_parser, user_list_parser
+from pipeline import ingest
+from pipeline.dag import Pipeline, PipelineError
+from pipeline.ingest import ingest_month
+from pipeline.layout import LEGACY_CLIENT, ClientLayout, resolve_layout
+
 
 # =========================
 # CONFIG
@@ -19,138 +40,358 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 SCRIPTS_DIR = PROJECT_ROOT / "scripts"
 
-PARSERS_DIR = SCRIPTS_DIR / "parsers"
-
-USER_PARSER = PARSERS_DIR / "user_list_parser.py"
-ASSET_PARSER = PARSERS_DIR / "asset_list_parser.py"
-DIFF_ENGINE = SCRIPTS_DIR / "diff_engine.py"
-
 
 # =========================
 # HELPERS
 # =========================
 
-def find_file(directory: Path, keywords: list):
-    for file in directory.iterdir():
-        if file.is_file():
-            name = file.name.lower()
-            if all(k in name for k in keywords):
-                return file
-    return None
+def previous_month(month: str) -> str:
+    year, mon = map(int, month.split("-"))
+    return f"{year}-{mon-1:02d}" if mon > 1 else f"{year-1}-12"
+
+
+def month_range(start: str, end: str) -> List[str]:
+    year, mon = map(int, start.split("-"))
+    months = []
+    while f"{year}-{mon:02d}" <= end:
+        months.append(f"{year}-{mon:02d}")
+        year, mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return months
+
+
+# =========================
+# STAGES
+# =========================
 
+def previous_sources(
+    month: str,
+    normalized_dir: Path,
+    history: Optional[Path] = None,
+    client: str = LEGACY_CLIENT
+) -> Tuple[str, dict, list]:
+    """
+    (previous month, load_previous params, input files).
 
-def run_command(cmd: list):
+    The month before is read from the history store when it is on record
+    there, else from its snapshot files. When it is missing altogether,
+    the latest earlier month on record is used, so a gap in the chain no
+    longer resets first_seen / retirement.
+    """
+    prev_month = previous_month(month)
+
+    # Months written before the snapshot store still have .json snapshots
+    prev_users = snapshot_file(normalized_dir / f"{prev_month}-users")
+    prev_assets = snapshot_file(normalized_dir / f"{prev_month}-assets")
+    params = {"prev_users_path": str(prev_users), "prev_assets_path": str(prev_assets)}
+
+    if history is None:
+        return prev_month, params, [prev_users, prev_assets]
+
+    with HistoryStore(history) as store:
+        on_record = store.previous_month(client, month)
+        on_disk = prev_users.exists() and prev_assets.exists()
+
+        if on_record is None or (on_record != prev_month and on_disk):
+            return prev_month, params, [prev_users, prev_assets]
+
+        params.update(
+            history=str(history),
+            client=client,
+            history_month=on_record,
+            revision=store.revision(client, on_record)
+        )
+        return on_record, params, []
+
+
+def load_previous(
+    prev_users_path: str,
+    prev_assets_path: str,
+    history: str = "",
+    client: str = LEGACY_CLIENT,
+    history_month: str = "",
+    revision: str = ""
+) -> dict:
     """
-    Always use the same Python executable that launched this script
-    (critical for macOS and virtualenvs)
+    Previous month snapshots ({} when missing). Read once and shared by
+    the parsers (first_seen / retirement) and the diff engine.
+    With history_month they come from the history store; revision only
+    keys the stage (it changes when that month is rewritten).
     """
-    cmd[0] = sys.executable
-    print("▶", " ".join(cmd))
-    result = subprocess.run(cmd)
-    if result.returncode != 0:
-        sys.exit(f"❌ Command failed: {' '.join(cmd)}")
+    if history_month:
+        with HistoryStore(history) as store:
+            return {
+                "users": store.load_entities(client, history_month, "users"),
+                "assets": store.load_entities(client, history_month, "assets"),
+                "complete": True
+            }
+
+    return {
+        "users": user_list_parser.load_previous_snapshot(prev_users_path),
+        "assets": asset_list_parser.load_previous_snapshot(prev_assets_path),
+        "complete": bool(existing_snapshot(prev_users_path) and existing_snapshot(prev_assets_path))
+    }
+
+
+def resolve_users(previous: dict, ingested: dict, month: str) -> dict:
+    current_users = ingested["parsed"]["users"]
+    return user_list_parser.finalize_user_snapshot(current_users, previous["users"], month)
+
+
+def resolve_assets(previous: dict, ingested: dict, month: str) -> dict:
+    current_assets = ingested["parsed"]["assets"]
+    return asset_list_parser.finalize_asset_snapshot(current_assets, previous["assets"], month)
+
+
+def diff_month(previous: dict, users: dict, assets: dict, from_month: str, to_month: str):
+    if not previous["complete"]:
+        print("ℹ️ Previous month not found — diff skipped")
+        return None
+
+    diff_report = build_diff(
+        prev_users=previous["users"],
+        curr_users=users["users"],
+        prev_assets=previous["assets"],
+        curr_assets=assets["assets"],
+        from_month=from_month,
+        to_month=to_month
+    )
+
+    metrics = diff_report["metrics"]
+    print("✅ Diff generated successfully")
+    print(f"👤 User change: {metrics['user_count_change']}")
+    print(f"💻 Device change: {metrics['device_count_change']}")
+
+    return diff_report
+
+
+def record_history(users: dict, assets: dict, diff_report, history: str, client: str, month: str) -> dict:
+    """Records the month's snapshots and alerts; unchanged months are not rewritten."""
+    with HistoryStore(history) as store:
+        written = {
+            "users": store.write_snapshot(client, users),
+            "assets": store.write_snapshot(client, assets),
+            "alerts": store.write_alerts(client, month, diff_report["alerts"] if diff_report else [])
+        }
+
+    changed = [name for name, done in written.items() if done]
+    print(f"🗄 History store: {', '.join(changed) if changed else 'up to date'} ({history})")
+    return written
 
 
 # =========================
-# MAIN
+# PIPELINE
 # =========================
 
-def run_month(month: str):
-    raw_dir = DATA_DIR / "raw" / month
-    normalized_dir = DATA_DIR / "normalized"
-    diffs_dir = DATA_DIR / "diffs"
+def add_month_stages(
+    pipeline: Pipeline,
+    month: str,
+    raw_dir: Path,
+    data_dir: Path = DATA_DIR,
+    client: str = LEGACY_CLIENT
+) -> ReportIndex:
+    """
+    Declares Phase 1 (ingest all raw reports → previous snapshots →
+    first_seen / retirement → diff → history store) on a pipeline.
+    Stage names: ingest, previous, users, assets, diff, history (unless
+    HISTORY_STORE=0).
+    Returns the month's report index.
+    """
+    normalized_dir = data_dir / "normalized"
+    diffs_dir = data_dir / "diffs"
+    history = history_path(data_dir)
 
-    if not raw_dir.exists():
-        sys.exit(f"❌ Raw data folder not found: {raw_dir}")
+    index = index_reports(raw_dir)
+    reports = index.found()
 
-    normalized_dir.mkdir(parents=True, exist_ok=True)
-    diffs_dir.mkdir(parents=True, exist_ok=True)
+    if not index.users:
+        sys.exit("❌ User list file not found")
+    if not index.assets:
+        sys.exit("❌ Asset list file not found")
 
-    # Infer previous month
-    year, mon = map(int, month.split("-"))
-    prev_month = f"{year}-{mon-1:02d}" if mon > 1 else f"{year-1}-12"
+    for kind, file in reports.items():
+        print(f"📄 {kind:<12}: {file.name}")
+    for file in index.unknown:
+        print(f"ℹ️ Unrecognised report skipped: {file.name}")
+
+    prev_month, previous_params, previous_inputs = previous_sources(
+        month, normalized_dir, history, client
+    )
 
-    # =========================
-    # Discover Input Files
-    # =========================
+    pipeline.add(
+        "ingest", ingest_month,
+        params={"reports": {kind: str(file) for kind, file in reports.items()}, "month": month},
+        checkpoint=str(data_dir / "ingest" / f"{month}.json"),
+        inputs=list(reports.values()),
+        # The classifier decides which parser reads which file
+        code=[ingest, *ingest.PARSERS.values(), report_classifier],
+        label=f"Phase 1.0: Ingest raw reports ({len(reports)})"
+    )
 
-    user_file = (
-        find_file(raw_dir, ["user", "list"]) or
-        find_file(raw_dir, ["user"])
+    pipeline.add(
+        "previous", load_previous,
+        params=previous_params,
+        inputs=previous_inputs,
+        label=f"Phase 1: Load previous snapshots ({prev_month})"
     )
 
-    asset_file = (
-        find_file(raw_dir, ["asset", "list"]) or
-        find_file(raw_dir, ["asset"])
+    pipeline.add(
+        "users", resolve_users, deps=["previous", "ingest"],
+        params={"month": month},
+        checkpoint=str(snapshot_path(normalized_dir / f"{month}-users")),
+        save=save_snapshot,
+        load=load_snapshot,
+        code=[user_list_parser],
+        label="Phase 1.1: User List Parser"
     )
 
-    if not user_file:
-        sys.exit("❌ User list file not found")
-    if not asset_file:
-        sys.exit("❌ Asset list file not found")
+    pipeline.add(
+        "assets", resolve_assets, deps=["previous", "ingest"],
+        params={"month": month},
+        checkpoint=str(snapshot_path(normalized_dir / f"{month}-assets")),
+        save=save_snapshot,
+        load=load_snapshot,
+        code=[asset_list_parser],
+        label="Phase 1.2: Asset List Parser"
+    )
 
-    print(f"📄 User list : {user_file.name}")
-    print(f"📄 Asset list: {asset_file.name}")
-
-    # =========================
-    # Output Paths
-    # =========================
-
-    curr_users = normalized_dir / f"{month}-users.json"
-    curr_assets = normalized_dir / f"{month}-assets.json"
-
-    prev_users = normalized_dir / f"{prev_month}-users.json"
-    prev_assets = normalized_dir / f"{prev_month}-assets.json"
-
-    diff_output = diffs_dir / f"{month}-diff.json"
-
-    # =========================
-    # Run User Parser
-    # =========================
-
-    run_command([
-        sys.executable, str(USER_PARSER),
-        "--input", str(user_file),
-        "--month", month,
-        "--previous", str(prev_users),
-        "--output", str(curr_users)
-    ])
-
-    # =========================
-    # Run Asset Parser
-    # =========================
-
-    run_command([
-        sys.executable, str(ASSET_PARSER),
-        "--input", str(asset_file),
-        "--month", month,
-        "--previous", str(prev_assets),
-        "--output", str(curr_assets)
-    ])
-
-    # =========================
-    # Run Diff Engine (if possible)
-    # =========================
-
-    if prev_users.exists() and prev_assets.exists():
-        run_command([
-            sys.executable, str(DIFF_ENGINE),
-            "--prev-users", str(prev_users),
-            "--curr-users", str(curr_users),
-            "--prev-assets", str(prev_assets),
-            "--curr-assets", str(curr_assets),
-            "--from-month", prev_month,
-            "--to-month", month,
-            "--output", str(diff_output)
-        ])
+    pipeline.add(
+        "diff", diff_month, deps=["previous", "users", "assets"],
+        params={"from_month": prev_month, "to_month": month},
+        checkpoint=str(diffs_dir / f"{month}-diff.json"),
+        code=[diff_engine],
+        label="Phase 1.3: Diff Engine"
+    )
+
+    if history is not None:
+        pipeline.add(
+            "history", record_history, deps=["users", "assets", "diff"],
+            params={"history": str(history), "client": client, "month": month},
+            code=[history_store],
+            label="Phase 1.4: History Store"
+        )
+
+    return index
+
+
+# =========================
+# BACKFILL
+# =========================
+
+def parse_month_reports(month: str, user_file: str, asset_file: str) -> Tuple[dict, dict]:
+    """
+    Worker: raw parse of one month. Parsing has no cross-month dependency,
+    so every month of a backfill runs this in parallel.
+    """
+    return (
+        user_list_parser.parse_user_file(user_file, month),
+        asset_list_parser.parse_asset_file(asset_file, month)
+    )
+
+
+def backfill(
+    start: str,
+    end: str,
+    workers: int = 1,
+    client: str = LEGACY_CLIENT,
+    layout: ClientLayout = None
+):
+    """
+    Rebuilds Phase 1 for every month in [start, end] of the client's data
+    tree (pipeline/layout.py).
+
+    1. Raw reports of all months are parsed in parallel.
+    2. first_seen / retirement / diff are chained month by month in memory
+       (a month without raw data is bridged, not reset), seeded from the
+       latest month before start on record or on disk.
+    """
+    layout = layout or resolve_layout(client)
+    data_dir = layout.data_dir
+    normalized_dir = data_dir / "normalized"
+    diffs_dir = data_dir / "diffs"
+    history = history_path(data_dir)
+
+    jobs = {}
+    for month in month_range(start, end):
+        raw_dir = layout.raw(month)
+        if not raw_dir.exists():
+            print(f"ℹ️ {month}: no raw data — skipped")
+            continue
+
+        index = index_reports(raw_dir)
+        if not index.users or not index.assets:
+            sys.exit(f"❌ {month}: user list or asset list file not found")
+        jobs[month] = (str(index.users), str(index.assets))
+
+    if not jobs:
+        sys.exit(f"❌ No raw data between {start} and {end}")
+
+    # -------------------------
+    # 1. Parse all months (parallel)
+    # -------------------------
+    print(f"▶ Parsing {len(jobs)} month(s) with {workers} worker(s)")
+
+    months = list(jobs)
+    args = [months, [jobs[m][0] for m in months], [jobs[m][1] for m in months]]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = dict(zip(months, pool.map(parse_month_reports, *args)))
     else:
-        print("ℹ️ Previous month not found — diff skipped")
+        parsed = dict(zip(months, map(parse_month_reports, *args)))
 
-    print("\n✅ Monthly run completed successfully")
+    # -------------------------
+    # 2. Chain months (sequential, in memory)
+    # -------------------------
+    prev_month, previous_params, _ = previous_sources(months[0], normalized_dir, history, client)
+    previous = load_previous(**previous_params)
+
+    for month in months:
+        print(f"\n▶ {month}: resolving against {prev_month}")
+
+        current_users, current_assets = parsed.pop(month)
+        users = user_list_parser.finalize_user_snapshot(current_users, previous["users"], month)
+        assets = asset_list_parser.finalize_asset_snapshot(current_assets, previous["assets"], month)
+        diff_report = diff_month(previous, users, assets, prev_month, month)
+
+        user_list_parser.save_snapshot(users, str(normalized_dir / f"{month}-users"))
+        asset_list_parser.save_snapshot(assets, str(normalized_dir / f"{month}-assets"))
+        if diff_report:
+            diff_engine.save_diff(diff_report, str(diffs_dir / f"{month}-diff.json"))
+        if history is not None:
+            record_history(users, assets, diff_report, str(history), client, month)
+
+        previous = {"users": users["users"], "assets": assets["assets"], "complete": True}
+        prev_month = month
+
+    print(f"\n✅ Backfill completed: {months[0]} → {months[-1]} ({len(months)} month(s))")
     print(f"📂 Normalized output: {normalized_dir}")
     print(f"📂 Diff output      : {diffs_dir}")
 
 
+# =========================
+# MAIN
+# =========================
+
+def run_month(month: str, workers: int = 1, force: bool = False, client: str = LEGACY_CLIENT):
+    layout = resolve_layout(client)
+    raw_dir = layout.raw(month)
+
+    if not raw_dir.exists():
+        sys.exit(f"❌ Raw data folder not found: {raw_dir}")
+
+    pipeline = Pipeline(f"month:{month}")
+    add_month_stages(pipeline, month, raw_dir, layout.data_dir, client)
+
+    try:
+        pipeline.run(workers=workers, force=force)
+    except PipelineError as exc:
+        sys.exit(f"❌ Failed at step: {exc}")
+
+    print("\n✅ Monthly run completed successfully")
+    print(f"📂 Normalized output: {layout.data_dir / 'normalized'}")
+    print(f"📂 Diff output      : {layout.data_dir / 'diffs'}")
+
+
 # =========================
 # CLI
 # =========================
@@ -159,12 +400,34 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Run monthly cybersecurity pipeline")
-    parser.add_argument("--month", required=True, help="Month in YYYY-MM format")
+    parser.add_argument("--month", help="Month in YYYY-MM format")
+    parser.add_argument("--from", dest="start", help="Backfill: first month (YYYY-MM)")
+    parser.add_argument("--to", dest="end", help="Backfill: last month (YYYY-MM)")
+    parser.add_argument(
+        "--workers", type=int,
+        help="Process pool size (default: 2 for one month, all cores for a backfill)"
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+    parser.add_argument(
+        "--client", default=LEGACY_CLIENT,
+        help="Client whose data tree is read (pipeline/layout.py) and the months are recorded under"
+    )
 
     args = parser.parse_args()
 
-    run_month(args.month)
-
+    if args.start or args.end:
+        if not (args.start and args.end) or args.month:
+            parser.error("backfill needs both --from and --to (and no --month)")
+        backfill(args.start, args.end, workers=args.workers or os.cpu_count() or 1, client=args.client)
+    elif args.month:
+        run_month(
+            args.month,
+            workers=args.workers or min(2, os.cpu_count() or 1),
+            force=args.force,
+            client=args.client
+        )
+    else:
+        parser.error("either --month or --from/--to is required")
 
 
 
@@ -0,0 +1,248 @@
+"""
+Portfolio Runner
+----------------
+Runs the full pipeline for a client × month matrix on a bounded
+process pool.
+
+Design:
+- Each client has its own data tree (data/clients/<slug>/, see pipeline/layout.py)
+- Global worker bound (--max-workers) plus per-client bound (--per-client)
+- A client's months are started oldest first; with --per-client 1 (default)
+  each month sees the previous month's snapshot for first_seen / diff
+- Per-job output captured to runs/<slug>/<month>/pipeline.log
+- Summary of throughput and failures printed and written as JSON
+"""
+
+import contextlib
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from common import serialization
+from pipeline.layout import client_slug, discover_clients, resolve_layout
+
+
+# =====================================================
+# Paths
+# =====================================================
+
+ROOT = Path(__file__).resolve().parent.parent
+RUNS = ROOT / "runs"
+
+
+# =====================================================
+# Job (runs inside a worker process)
+# =====================================================
+
+def run_job(client: str, month: str, force: bool = False) -> Dict:
+    log_path = RUNS / client_slug(client) / month / "pipeline.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    status, error = "ok", None
+
+    # Jobs already fill the pool; page-sharded PDF extraction would oversubscribe it
+    os.environ.setdefault("PDF_EXTRACT_WORKERS", "1")
+
+    with open(log_path, "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            from run_full_pipeline import build_pipeline, run_and_record
+
+            layout = resolve_layout(client)
+            if not layout.raw(month).exists():
+                raise FileNotFoundError(f"Raw data directory not found: {layout.raw(month)}")
+
+            # Stages run sequentially inside the job; the pool parallelises jobs
+            pipeline = build_pipeline(client, month, layout)
+            failure, _ = run_and_record(pipeline, client, month, workers=1, force=force)
+            if failure:
+                status, error = "failed", f"Failed at step: {failure}"
+        except SystemExit as exc:
+            status, error = "failed", str(exc.code)
+        except Exception as exc:
+            status, error = "failed", f"{type(exc).__name__}: {exc}"
+            traceback.print_exc()
+
+    return {
+        "client": client,
+        "month": month,
+        "status": status,
+        "error": error,
+        "seconds": round(time.perf_counter() - started, 3),
+        "log": str(log_path)
+    }
+
+
+# =====================================================
+# Scheduler
+# =====================================================
+
+def build_matrix(clients: List[str], months: List[str]) -> Dict[str, deque]:
+    """
+    client → queue of months (oldest first). Without explicit months every
+    raw month found in the client's tree is used.
+    """
+    matrix = {}
+    for client in clients:
+        client_months = months or resolve_layout(client).months()
+        matrix[client] = deque(sorted(client_months))
+    return matrix
+
+
+def run_portfolio(
+    clients: List[str],
+    months: List[str],
+    max_workers: int,
+    per_client: int = 1,
+    force: bool = False
+) -> Dict:
+    matrix = build_matrix(clients, months)
+    total = sum(len(q) for q in matrix.values())
+
+    print(f"🚀 Portfolio run: {len(matrix)} client(s), {total} job(s), "
+          f"{max_workers} worker(s), ≤{per_client} per client")
+
+    started = time.perf_counter()
+    results = []
+    running = {}
+    active = {client: 0 for client in matrix}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while running or any(matrix.values()):
+            # Round-robin over clients so one large tenant cannot starve the rest
+            for client, queue in matrix.items():
+                while queue and active[client] < per_client and len(running) < max_workers:
+                    month = queue.popleft()
+                    running[pool.submit(run_job, client, month, force)] = client
+                    active[client] += 1
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                client = running.pop(future)
+                active[client] -= 1
+                result = future.result()
+                results.append(result)
+
+                icon = "✅" if result["status"] == "ok" else "❌"
+                print(f"{icon} {result['client']} {result['month']} "
+                      f"({result['seconds']}s) [{len(results)}/{total}]")
+                if result["error"]:
+                    print(f"   {result['error']}")
+
+    return summarize(results, time.perf_counter() - started, max_workers, per_client)
+
+
+# =====================================================
+# Summary
+# =====================================================
+
+def summarize(results: List[Dict], wall_seconds: float, max_workers: int, per_client: int) -> Dict:
+    failures = [r for r in results if r["status"] != "ok"]
+    job_seconds = [r["seconds"] for r in results]
+
+    per_client_summary = {}
+    for r in results:
+        entry = per_client_summary.setdefault(r["client"], {"ok": 0, "failed": 0, "seconds": 0.0})
+        entry["ok" if r["status"] == "ok" else "failed"] += 1
+        entry["seconds"] = round(entry["seconds"] + r["seconds"], 3)
+
+    return {
+        "metadata": {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "max_workers": max_workers,
+            "per_client": per_client
+        },
+        "totals": {
+            "jobs": len(results),
+            "succeeded": len(results) - len(failures),
+            "failed": len(failures),
+            "wall_seconds": round(wall_seconds, 3),
+            "job_seconds_total": round(sum(job_seconds), 3),
+            "job_seconds_max": max(job_seconds, default=0),
+            "jobs_per_minute": round(len(results) / wall_seconds * 60, 2) if wall_seconds else 0,
+            "parallel_speedup": round(sum(job_seconds) / wall_seconds, 2) if wall_seconds else 0
+        },
+        "clients": per_client_summary,
+        "failures": failures,
+        "jobs": sorted(results, key=lambda r: (r["client"], r["month"]))
+    }
+
+
+def print_summary(summary: Dict):
+    totals = summary["totals"]
+
+    print("\n📊 Portfolio summary")
+    print(f"   Jobs            : {totals['jobs']} "
+          f"({totals['succeeded']} ok, {totals['failed']} failed)")
+    print(f"   Wall time       : {totals['wall_seconds']}s")
+    print(f"   Throughput      : {totals['jobs_per_minute']} jobs/min")
+    print(f"   Parallel speedup: {totals['parallel_speedup']}x")
+
+    for failure in summary["failures"]:
+        print(f"   ❌ {failure['client']} {failure['month']}: {failure['error']}")
+        print(f"      log: {failure['log']}")
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the pipeline across a client × month matrix")
+    parser.add_argument(
+        "--clients", nargs="*", default=[],
+        help="Client names (default: every tenant under data/clients/)"
+    )
+    parser.add_argument("--clients-file", help="File with one client name per line")
+    parser.add_argument(
+        "--months", nargs="*", default=[],
+        help="Months YYYY-MM (default: every raw month of each client)"
+    )
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--per-client", type=int, default=1,
+        help="Concurrent months per client (>1 skips month-to-month ordering)"
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild every stage")
+    parser.add_argument("--summary", help="Summary JSON path (default: runs/portfolio-<timestamp>.json)")
+
+    args = parser.parse_args()
+
+    clients = list(args.clients)
+    if args.clients_file:
+        with open(args.clients_file, "r", encoding="utf-8") as f:
+            clients += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    clients = clients or discover_clients()
+
+    if not clients:
+        sys.exit("❌ No clients given and none found under data/clients/")
+
+    summary = run_portfolio(
+        clients=clients,
+        months=args.months,
+        max_workers=max(1, args.max_workers),
+        per_client=max(1, args.per_client),
+        force=args.force
+    )
+
+    print_summary(summary)
+
+    summary_path = Path(args.summary) if args.summary else (
+        RUNS / f"portfolio-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    serialization.save_json(summary, summary_path)
+
+    print(f"📄 Summary written to: {summary_path}")
+
+    if summary["totals"]["failed"]:
+        sys.exit(1)